@@ -0,0 +1,163 @@
+"""Archive pages of the published site, updated incrementally per post.
+
+Per job, e.g. `news-de`, there is a page per month with the TOC of its posts,
+article counts and top vocab, and an index page of all months:
+
+    <output_root>/archive/news-de/index.md
+    <output_root>/archive/news-de/2025-06.md
+
+Each month keeps its posts in a small json file under the state directory, and
+the index keeps totals per month, so that a new post rewrites only the page of
+its month and the index, without scanning the posts of other months.
+"""
+
+import json
+import logging
+import os
+from typing import List
+
+import pandas as pd
+
+from lingua_vitamin.common import utils
+
+ARCHIVE_DIR = "archive"
+INDEX_FILE = "index"
+TOP_WORDS = 20
+
+_TEMPLATE = (
+    """
+---
+title: "TITLE"
+layout: page
+---
+""".strip()
+    + "\n\n"
+)
+
+
+def get_page_dir(output_root: str, job: str) -> str:
+    """Directory of the archive pages of a job, e.g. `news-de`."""
+    return os.path.join(output_root, ARCHIVE_DIR, job)
+
+
+def get_state_dir(output_root: str, job: str) -> str:
+    """Directory of the archive state of a job."""
+    return utils.get_state_path(output_root, ARCHIVE_DIR, job)
+
+
+def _load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write(path: str, content: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+def _write_json(path: str, value) -> str:
+    return _write(
+        path, json.dumps(value, indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+    )
+
+
+def read_top_words(vocab_path: str, source_lang: str, target_langs, top_n: int):
+    """Top words of a vocab csv, sorted by count: {columns, rows}."""
+    df = pd.read_csv(vocab_path, index_col=0, nrows=top_n).fillna("")
+    columns = [f"word-{lang}" for lang in (source_lang, *target_langs)]
+    columns = [c for c in columns if c in df.columns]
+    return {
+        "columns": ["count"] + columns,
+        "rows": [
+            [int(count)] + [str(v) for v in values]
+            for count, *values in zip(df["count"], *(df[c] for c in columns))
+        ],
+    }
+
+
+def _render_month(job: str, month: str, state: dict, page_dir: str, root: str):
+    posts = sorted(state["posts"].items(), key=lambda x: (x[1]["date"], x[0]))
+    num_articles = sum(post["count"] for _, post in posts)
+    lines = [
+        _TEMPLATE.replace("TITLE", f"{job} @ {month}"),
+        f"[{job}]({INDEX_FILE}.md): {len(posts)} posts, {num_articles} articles\n\n",
+        "## Posts\n\n",
+    ]
+    for path, post in reversed(posts):
+        link = os.path.relpath(os.path.join(root, path), page_dir)
+        name = os.path.splitext(os.path.basename(path))[0]
+        lines.append(f"- {post['date']} | [{name}]({link}) | {post['count']:03d}\n")
+
+    vocab = state.get("vocab")
+    if vocab and vocab["rows"]:
+        lines.append(f"\n## Top {len(vocab['rows'])} Vocab\n\n")
+        lines.append(f"- {' | '.join(vocab['columns'])}\n")
+        lines += [f"- {' | '.join(str(v) for v in row)}\n" for row in vocab["rows"]]
+    return "".join(lines)
+
+
+def _render_index(job: str, index: dict):
+    lines = [
+        _TEMPLATE.replace("TITLE", f"{job} archive"),
+        f"{sum(m['posts'] for m in index.values())} posts, "
+        f"{sum(m['articles'] for m in index.values())} articles\n\n",
+    ]
+    for month, totals in sorted(index.items(), reverse=True):
+        lines.append(
+            f"- [{month}]({month}.md) | {totals['posts']} posts"
+            f" | {totals['articles']} articles\n"
+        )
+    return "".join(lines)
+
+
+def add_post(
+    output_root: str,
+    job: str,
+    md_path: str,
+    date_str: str,
+    count: int,
+    vocab_path: str = None,
+    source_lang: str = "",
+    target_langs=(),
+    top_n: int = TOP_WORDS,
+) -> List[str]:
+    """Add (or update) a post in the archive: Return the files written.
+
+    Only the page of the post's month and the index page are rewritten. Given
+    the month's `vocab_path`, its top words are shown on the month page.
+    """
+    month = date_str[:7]
+    state_dir = get_state_dir(output_root, job)
+    month_path = os.path.join(state_dir, f"{month}.json")
+    index_path = os.path.join(state_dir, f"{INDEX_FILE}.json")
+
+    state = _load_json(month_path, {"posts": {}})
+    state["posts"][os.path.relpath(md_path, output_root or ".")] = {
+        "date": date_str,
+        "count": count,
+    }
+    if vocab_path and os.path.exists(vocab_path):
+        state["vocab"] = read_top_words(vocab_path, source_lang, target_langs, top_n)
+
+    index = _load_json(index_path, {})
+    index[month] = {
+        "posts": len(state["posts"]),
+        "articles": sum(post["count"] for post in state["posts"].values()),
+    }
+
+    page_dir = get_page_dir(output_root, job)
+    files = [
+        _write_json(month_path, state),
+        _write_json(index_path, index),
+        _write(
+            os.path.join(page_dir, f"{month}.md"),
+            _render_month(job, month, state, page_dir, output_root or "."),
+        ),
+        _write(os.path.join(page_dir, f"{INDEX_FILE}.md"), _render_index(job, index)),
+    ]
+    logging.info("[%s] Archive of %s written to `%s`.", job, month, page_dir)
+    return files
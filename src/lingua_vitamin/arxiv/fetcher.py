@@ -2,10 +2,12 @@
 
 import datetime
 import logging
-from typing import List, Dict
 
 import feedparser
 
+from lingua_vitamin.common import articles
+from lingua_vitamin.common import text as text_utils
+
 KEY_ABSTRACT_RAW = "summary"
 KEY_ABSTRACT = "abstract"
 KEY_AUTHORS = "authors"
@@ -25,13 +27,13 @@ RSS_FEED_MAP = {
 
 
 def _normalize(text: str) -> str:
-    return " ".join(text.split("\n"))
+    return text_utils.collapse_whitespace(text)
 
 
 def _fetch(
     subject: str,
     top_n: int = 1000,
-) -> List[Dict[str, str]]:
+) -> articles.ArticleBatch:
     """Fetch hacker news from its API.
 
     <item>
@@ -52,12 +54,12 @@ def _fetch(
     url = RSS_FEED_MAP[subject]
     logging.info("URL: `%s`", url)
 
-    hacker_news = []
+    hacker_news = articles.ArticleBatch()
     feed = feedparser.parse(url)
     for entry in feed.entries:
         logging.info(entry)
-        title = _normalize(entry.get(KEY_TITLE))
-        abstract = _normalize(entry.get("summary"))
+        title = text_utils.html_to_text(entry.get(KEY_TITLE))
+        abstract = text_utils.html_to_text(entry.get("summary"))
         date = entry.get("published")
         url = entry.get("link")
         authors = entry.get("author")
@@ -83,26 +85,47 @@ def _fetch(
     return hacker_news
 
 
+def filter_english(papers: articles.ArticleBatch, lang_id) -> articles.ArticleBatch:
+    """Drop papers not in English, the source language of their translations."""
+    langs = lang_id.route(
+        (f"{t}\n{a}" for t, a in zip(papers[KEY_TITLE], papers[KEY_ABSTRACT])),
+        "en",
+        langs=("en",),
+    )
+    kept = []
+    for i, lang in enumerate(langs):
+        if lang is None:
+            logging.warning("Paper not in English: `%s`.", papers[KEY_TITLE][i])
+        else:
+            kept.append(i)
+    return papers if len(kept) == len(papers) else papers.take(kept)
+
+
 def fetch_arxiv_papers(
     subject: str,
     date: str,
     top_n: int = 1000,
     date_end: str = None,
-) -> List[Dict[str, str]]:
-    """Fetch arxiv papers from its API."""
+    lang_id=None,
+) -> articles.ArticleBatch:
+    """Fetch arxiv papers from its API.
+
+    Given a `langid.LanguageIdentifier`, papers not in English are dropped.
+    """
     if date_end is None:
         top = 4
         date_end = f"{int(date[:top]) + 1:4d}{date[top:]}"
 
     if subject in RSS_FEED_MAP:
-        return _fetch(subject, top_n=top_n)
+        papers = _fetch(subject, top_n=top_n)
+        return papers if lang_id is None else filter_english(papers, lang_id)
 
     url = RSS_FEED.format(
         arxiv_subject=subject, date_start=date, date_end=date_end, top_n=top_n
     )
     logging.info("URL: `%s`", url)
 
-    papers = []
+    papers = articles.ArticleBatch()
     feed = feedparser.parse(url)
     for entry in feed.entries:
         title = _normalize(entry.get(KEY_TITLE))
@@ -129,4 +152,4 @@ def fetch_arxiv_papers(
 
     logging.info("[%s] Len for %s: %d/ %d.", subject, date, len(papers), top_n)
 
-    return papers
+    return papers if lang_id is None else filter_english(papers, lang_id)
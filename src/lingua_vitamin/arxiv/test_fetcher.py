@@ -4,11 +4,10 @@ import datetime
 import logging
 import unittest
 
-import pandas as pd
 from parameterized import parameterized
 
 from lingua_vitamin.arxiv import fetcher
-
+from lingua_vitamin.common import articles
 
 _DATE = datetime.datetime.today() - datetime.timedelta(days=7)
 _DATE = f"{_DATE.year:04d}{_DATE.month:02d}{_DATE.day:02d}"
@@ -48,9 +47,9 @@ class TestFetcher(unittest.TestCase):
     def test_fetch_arxiv_papers(self, subject, date, kwargs):
         """Unit test for fetch_arxiv_papers."""
         papers = fetcher.fetch_arxiv_papers(subject=subject, date=date, **kwargs)
-        pd.DataFrame(papers).to_csv(f"/tmp/{subject}.csv")
+        papers.to_frame().to_csv(f"/tmp/{subject}.csv")
 
-        self.assertIsInstance(papers, list)
+        self.assertIsInstance(papers, articles.ArticleBatch)
         logging.info("Papers in `%s` (# = %s --> %d):", subject, kwargs, len(papers))
         logging.info("%s\n\n", papers)
 
@@ -78,7 +77,7 @@ class TestFetcher(unittest.TestCase):
 
     def test_invalid_fetch_arxiv_papers(self):
         """Unit test for fetch_arxiv_papers."""
-        self.assertEqual(fetcher.fetch_arxiv_papers(subject="xx", date=_DATE), [])
+        self.assertEqual(list(fetcher.fetch_arxiv_papers(subject="xx", date=_DATE)), [])
 
 
 if __name__ == "__main__":
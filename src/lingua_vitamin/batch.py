@@ -0,0 +1,390 @@
+"""Run many news/ arXiv jobs in one process, and publish them together.
+
+A job file is json, either a list of jobs or `{"defaults": {...}, "jobs": [...]}`,
+where each job overrides the command line args of `main.py`, e.g.
+
+    {
+      "defaults": {"output_root": "/tmp/LinguaVitaminArxiv", "target_langs": ["de", "zh"]},
+      "jobs": [
+        {"arxiv": "cs.DC", "arxiv_num_days": 8, "num_articles": 3000},
+        {"arxiv": "cs.PL", "arxiv_num_days": 8, "num_articles": 3000},
+        {"arxiv": "hacker-news", "target_langs": ["zh"]}
+      ]
+    }
+
+Translators are shared across jobs, news and arXiv titles are batched per model
+across jobs, and titles of all news jobs go before any news content. Each
+(output_root, github_repo) gets a single branch and PR, and all of them a single
+digest email.
+
+Flags of the whole process, e.g. `--time_budget` or `--shard_dir`, are given on
+the command line, and rejected in job files.
+"""
+
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import logging
+import os
+
+from lingua_vitamin import pipe
+from lingua_vitamin.common import articles as article_batch
+from lingua_vitamin.common import deadline as time_budget
+from lingua_vitamin.common import notify
+from lingua_vitamin.common import profiling
+from lingua_vitamin.translate import memory as translation_memory
+
+# Args of `main.py` applied once per process, or per batch: Not per job.
+PROCESS_KEYS = (
+    "autotune",
+    "batch_tag",
+    "from_email",
+    "git_backend",
+    "github_token",
+    "memory_limit_mb",
+    "memory_min_score",
+    "mmap_weights",
+    "profile",
+    "shard_dir",
+    "shard_lease",
+    "shard_size",
+    "shard_timeout",
+    "smtp_password",
+    "smtp_port",
+    "smtp_server",
+    "smtp_user",
+    "stage_cache_days",
+    "time_budget",
+    "to_emails",
+    "weights_dtype",
+)
+
+
+def load_jobs(jobs_file: str, defaults: dict):
+    """Load jobs from a json file, with defaults from the command line."""
+    with open(jobs_file, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if isinstance(config, list):
+        config = {"jobs": config}
+
+    defaults = {k: v for k, v in defaults.items() if k != "jobs"}
+    for job in [config.get("defaults", {})] + config["jobs"]:
+        process_keys = sorted(set(job) & set(PROCESS_KEYS))
+        if process_keys:
+            raise ValueError(
+                f"Keys {process_keys} in `{job}` apply to the whole process: "
+                "Give them on the command line."
+            )
+    defaults.update(config.get("defaults", {}))
+
+    jobs = []
+    for job in config["jobs"]:
+        unknown = sorted(set(job) - set(defaults))
+        if unknown:
+            raise ValueError(f"Unknown keys {unknown} in job `{job}`.")
+        jobs.append(argparse.Namespace(**{**defaults, **job, "jobs": ""}))
+
+    logging.info("Loaded %d jobs from `%s`.", len(jobs), jobs_file)
+    return jobs
+
+
+def _fetch(job, cache):
+    """Fetch articles or papers, sharing feeds across jobs and reruns."""
+    if job.arxiv:
+        key = ("arxiv", job.arxiv, job.arxiv_num_days, job.num_articles)
+    else:
+        key = ("news", job.source_lang, job.num_articles, job.output_root)
+
+    if key not in cache:
+        with profiling.stage("fetch"):
+            cache[key] = pipe.fetch(job, cache=pipe.get_stage_cache(job))
+    return cache[key]
+
+
+def run_jobs(args, github_token):
+    """Run all jobs in a job file: Return {(output_root, github_repo): pr_url}."""
+    jobs = load_jobs(args.jobs, vars(args))
+    date_str = datetime.date.today().isoformat()
+    deadline = time_budget.Deadline(args.time_budget)
+
+    cache = {}
+    outputs = defaultdict(list)
+    news_jobs = []
+    arxiv_jobs = []
+    manifests = {}
+    digests = {}
+    for job in jobs:
+        category, tag = pipe.get_tag(job)
+        _, _, md_path, csv_path = pipe.get_filenames(job, tag=f"{category}-{tag}")
+        group = (job.output_root, job.github_repo, job.base_branch)
+
+        try:
+            items = _fetch(job, cache)
+            if items and job.skip_unchanged:
+                if job.output_root not in manifests:
+                    manifests[job.output_root] = pipe.get_manifest(job.output_root)
+                digest = pipe.get_fingerprint(job, items)
+                if manifests[job.output_root].is_unchanged(f"{category}-{tag}", digest):
+                    logging.info(
+                        "[%s-%s] Articles are unchanged: Skipped.", category, tag
+                    )
+                    continue
+                digests[job.output_root, f"{category}-{tag}"] = digest
+
+            if job.arxiv:
+                papers = items
+                if papers:
+                    df = article_batch.ArticleBatch.of(papers).to_frame()
+                    arxiv_jobs.append((job, group, df, md_path, csv_path))
+                else:
+                    logging.warning("[%s] No papers fetched.", job.arxiv)
+                continue
+
+            articles = items
+            if articles:
+                news_jobs.append((job, group, articles, md_path, csv_path))
+            else:
+                logging.warning("[%s] No articles fetched.", job.source_lang)
+        except Exception as error:
+            logging.exception("Unable to run job `%s`: <<<%s>>>", job, error)
+
+    if news_jobs:
+        _run_news_jobs(news_jobs, outputs, digests, date_str, deadline=deadline)
+
+    if arxiv_jobs:
+        skipped = deadline.num_skipped
+        try:
+            _run_arxiv_jobs(arxiv_jobs, outputs, date_str, deadline=deadline)
+        except Exception as error:
+            logging.exception("Unable to run arXiv jobs: <<<%s>>>", error)
+        if deadline.num_skipped > skipped:
+            _set_incomplete(digests, [job for job, *_ in arxiv_jobs])
+
+    if deadline.num_skipped:
+        logging.warning("Time budget: %s.", deadline.summary())
+    memory_paths = translation_memory.save_all()
+
+    _skip_unchanged(outputs, manifests, digests)
+    _add_state(outputs, memory_paths)
+    return _publish(args, github_token, outputs, date_str)
+
+
+def _add_state(outputs, memory_paths):
+    """Publish the history index and translation memories of each output root.
+
+    The history index is updated once per output root, and memories go with the
+    groups of the output root they are under.
+    """
+    history_paths = {}
+    for group, results in outputs.items():
+        output_root = group[0]
+        if output_root not in history_paths:
+            history_paths[output_root] = pipe.update_history(output_root)
+        root = os.path.join(os.path.abspath(output_root or "."), "")
+        paths = history_paths[output_root] + [
+            path for path in memory_paths if os.path.abspath(path).startswith(root)
+        ]
+        tag, md_path, files = results[-1]
+        results[-1] = (tag, md_path, list(files) + paths)
+
+
+def _set_incomplete(digests, jobs):
+    """Incomplete jobs are redone, rather than skipped as unchanged."""
+    for job in jobs:
+        category, tag = pipe.get_tag(job)
+        if (job.output_root, f"{category}-{tag}") in digests:
+            digests[job.output_root, f"{category}-{tag}"] = None
+
+
+def _skip_unchanged(outputs, manifests, digests):
+    """Keep changed files only, and publish manifests along with them."""
+    for group in list(outputs):
+        output_root = group[0]
+        if output_root not in manifests:
+            continue
+
+        job_manifest = manifests[output_root]
+        results = []
+        for tag, md_path, files in outputs[group]:
+            if (output_root, tag) not in digests:
+                results.append((tag, md_path, files))
+                continue
+
+            changed = job_manifest.changed(files)
+            job_manifest.update(tag, digests[output_root, tag], files)
+            if changed:
+                results.append((tag, md_path, changed))
+            else:
+                logging.info("[%s] Output files are unchanged: Skipped.", tag)
+
+        path = job_manifest.save()
+        if results:
+            tag, md_path, files = results[-1]
+            results[-1] = (tag, md_path, list(files) + [path])
+            outputs[group] = results
+        else:
+            del outputs[group]
+
+
+def _run_news_jobs(news_jobs, outputs, digests, date_str, deadline=None):
+    """Translate titles of all news jobs together, then run each of them."""
+    deadline = deadline or time_budget.Deadline()
+    caches = [pipe.get_stage_cache(job) for job, *_ in news_jobs]
+    try:
+        with profiling.stage("translate"):
+            titles = pipe.translate_news_titles_batch(
+                [
+                    (articles, job.source_lang, job.target_langs, cache)
+                    for (job, _, articles, _, _), cache in zip(news_jobs, caches)
+                ],
+                deadline=deadline,
+            )
+    except Exception as error:
+        logging.exception("Unable to translate news titles: <<<%s>>>", error)
+        titles = [None] * len(news_jobs)
+
+    for (job, group, articles, md_path, csv_path), cache, job_titles in zip(
+        news_jobs, caches, titles
+    ):
+        category, tag = pipe.get_tag(job)
+        try:
+            skipped = deadline.num_skipped
+            files = pipe.run_news(
+                job,
+                md_path,
+                csv_path,
+                date_str,
+                articles=articles,
+                deadline=deadline,
+                cache=cache,
+                titles=job_titles,
+            )
+            # Titles skipped for the time budget too.
+            if deadline.num_skipped > skipped or any(
+                title == time_budget.PLACEHOLDER
+                for texts in (job_titles or {}).values()
+                for title in texts
+            ):
+                _set_incomplete(digests, [job])
+            if files:
+                outputs[group].append((f"{category}-{tag}", md_path, files))
+        except Exception as error:
+            logging.exception("Unable to run job `%s`: <<<%s>>>", job, error)
+
+
+def _run_arxiv_jobs(arxiv_jobs, outputs, date_str, deadline=None):
+    """Translate all arXiv jobs together, then write each of them."""
+    jobs = [
+        (df, job.target_langs or ("de", "zh"), job.arxiv)
+        for job, _, df, _, _ in arxiv_jobs
+    ]
+    # Cached per output root: Pending translations are still batched together.
+    caches = {job.output_root: pipe.get_stage_cache(job) for job, *_ in arxiv_jobs}
+    dfs = [None] * len(jobs)
+    for root, cache in caches.items():
+        indices = [
+            i for i, (job, *_) in enumerate(arxiv_jobs) if job.output_root == root
+        ]
+        with profiling.stage("translate"):
+            results = pipe.translate_papers_batch(
+                [jobs[i] for i in indices],
+                pipe.KEY_TITLE,
+                source_lang="en",
+                deadline=deadline,
+                cache=cache,
+            )
+        for i, df in zip(indices, results):
+            dfs[i] = df
+    for (job, group, _, md_path, csv_path), df in zip(arxiv_jobs, dfs):
+        category, tag = pipe.get_tag(job)
+        files = pipe.write_arxiv(
+            job, df, md_path, csv_path, date_str, cache=caches[job.output_root]
+        )
+        outputs[group].append((f"{category}-{tag}", md_path, files))
+
+
+def _publish_group(args, github_token, date_str, group, results):
+    """One branch and PR for a group of jobs: Return its PR url."""
+    output_root, github_repo, base_branch = group
+    branch_name = f"AUTO--{date_str}--{args.batch_tag}"
+    files = [file for _, _, job_files in results for file in job_files]
+    tags = [tag for tag, _, _ in results]
+
+    group_args = argparse.Namespace(
+        output_root=output_root,
+        github_repo=github_repo,
+        base_branch=base_branch,
+        git_backend=args.git_backend,
+    )
+    return pipe.publish(
+        group_args,
+        github_token,
+        branch_name,
+        files,
+        f"LinguaVitamin daily batch: {branch_name}",
+        f"Auto-generated daily {', '.join(tags)} for {date_str}.",
+    )
+
+
+def _notify(args, outputs, pr_urls, date_str):
+    """One digest email for all groups, with md files attached."""
+    notifier = notify.get_notifier(
+        args.smtp_server, args.smtp_port, args.smtp_user, args.smtp_password
+    )
+    for (output_root, github_repo, _), results in outputs.items():
+        pr_url = pr_urls.get((output_root, github_repo))
+        notifier.add(
+            github_repo or output_root,
+            "\n".join(
+                [f"Daily batch has been pushed and PR created: {pr_url or 'N/A'}", ""]
+                + [f"- {tag}: {md_path}" for tag, md_path, _ in results]
+            ),
+            attachments=[md_path for _, md_path, _ in results],
+            link=pr_url,
+        )
+
+    try:
+        notifier.flush(
+            f"LinguaVitamin daily batch: AUTO--{date_str}--{args.batch_tag}",
+            args.from_email,
+            args.to_emails,
+        )
+    except Exception as error:
+        logging.warning("Failed to send email: <<<%s>>>", error)
+
+
+def _publish(args, github_token, outputs, date_str):
+    """Publish groups of jobs, then send a digest: Return {(root, repo): pr_url}."""
+    with profiling.stage("publish"):
+        pr_urls = _publish_groups(args, github_token, outputs, date_str)
+    _notify(args, outputs, pr_urls, date_str)
+    return pr_urls
+
+
+def _publish_groups(args, github_token, outputs, date_str):
+    """Publish groups of jobs, in parallel unless the checkout is switched.
+
+    Return PR urls by (output_root, github_repo), as groups of the same output
+    root may go to different repos.
+    """
+    if args.git_backend == "checkout":
+        pr_urls = {}
+        cwd = os.getcwd()
+        for group, results in outputs.items():
+            pr_urls[group[:2]] = _publish_group(
+                args, github_token, date_str, group, results
+            )
+            # Each push switches into its output root.
+            os.chdir(cwd)
+        return pr_urls
+
+    with ThreadPoolExecutor(max_workers=max(len(outputs), 1)) as executor:
+        futures = {
+            group[:2]: executor.submit(
+                _publish_group, args, github_token, date_str, group, results
+            )
+            for group, results in outputs.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
@@ -0,0 +1,102 @@
+"""Articles as a columnar batch, from the fetchers through translation to csv.
+
+A batch keeps one list per column, e.g. `title` and `content` of news, or
+`title`, `abstract`, `date`, `url` and `authors` of papers. Translations are
+set as whole columns, e.g. `title-de`, rather than nested per article, and a
+batch becomes the DataFrame of its csv file without copying article by article.
+Iterating a batch yields articles as dicts, e.g. for fingerprints.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+
+class ArticleBatch:
+    """Articles by columns of equal length."""
+
+    __slots__ = ("columns",)
+
+    def __init__(self, columns: Optional[Dict[str, list]] = None):
+        self.columns = {
+            name: values if isinstance(values, list) else list(values)
+            for name, values in (columns or {}).items()
+        }
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of unequal lengths: {sorted(lengths)}")
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict]) -> "ArticleBatch":
+        """A batch of articles given as dicts, missing values as None."""
+        records = list(records)
+        names = dict.fromkeys(name for record in records for name in record)
+        return cls({name: [record.get(name) for record in records] for name in names})
+
+    @classmethod
+    def of(cls, articles) -> "ArticleBatch":
+        """A batch as is, or of articles given as dicts."""
+        if isinstance(articles, cls):
+            return articles
+        return cls.from_records(articles or ())
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def __iter__(self) -> Iterator[dict]:
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def __contains__(self, name) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, key):
+        """A column by name, or an article as a dict by index."""
+        if isinstance(key, str):
+            return self.columns[key]
+        return {name: values[key] for name, values in self.columns.items()}
+
+    def __setitem__(self, name: str, values) -> None:
+        """Set a column, e.g. the translations into a target."""
+        values = list(values)
+        if self.columns and len(values) != len(self):
+            raise ValueError(
+                f"Column `{name}` of length {len(values)} != {len(self)} articles."
+            )
+        self.columns[name] = values
+
+    def __repr__(self) -> str:
+        return f"ArticleBatch({len(self)} x {list(self.columns)})"
+
+    def append(self, article: dict) -> None:
+        """Append an article, where missing values are None."""
+        size = len(self)
+        for name in article:
+            if name not in self.columns:
+                self.columns[name] = [None] * size
+        for name, values in self.columns.items():
+            values.append(article.get(name))
+
+    def copy(self) -> "ArticleBatch":
+        """A batch of the same columns, where columns set later are its own."""
+        return ArticleBatch(dict(self.columns))
+
+    def take(self, indices: List[int]) -> "ArticleBatch":
+        """A batch of the articles at indices."""
+        return ArticleBatch(
+            {
+                name: [values[i] for i in indices]
+                for name, values in self.columns.items()
+            }
+        )
+
+    def to_frame(self, columns=None) -> pd.DataFrame:
+        """A DataFrame of all columns, or given ones as names or `{name: header}`."""
+        if columns is None:
+            columns = list(self.columns)
+        if not isinstance(columns, dict):
+            columns = {name: name for name in columns}
+        return pd.DataFrame(
+            {header: self.columns[name] for name, header in columns.items()}
+        )
@@ -0,0 +1,93 @@
+"""Time budgets for translation work, with throughput per stage.
+
+Work is scheduled by priority, e.g. titles, then news content, then arXiv
+abstracts, then vocab words: Before each batch, its time is estimated from the
+throughput of its stage so far, and batches which would not finish within the
+budget are skipped, to be rendered with placeholders instead. A batch in
+progress is never interrupted, so that a run stops cleanly at its deadline.
+"""
+
+import contextlib
+import logging
+import math
+import time
+from collections import defaultdict
+from typing import Dict
+
+# Rendered in place of translations skipped for the time budget.
+PLACEHOLDER = "[Translation pending: over the time budget]"
+
+
+class Deadline:
+    """A time budget in seconds from creation, or none if not positive."""
+
+    def __init__(self, budget: float = 0, clock=time.monotonic):
+        self.budget = budget or 0
+        self._clock = clock
+        self._start = clock()
+        self.stats: Dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.skipped: Dict[str, int] = defaultdict(int)
+
+    def remaining(self) -> float:
+        """Seconds left, infinite without a budget."""
+        if self.budget <= 0:
+            return math.inf
+        return self.budget - (self._clock() - self._start)
+
+    def throughput(self, stage: str) -> float:
+        """Items per second of a stage so far, or None if unknown."""
+        count, seconds = self.stats.get(stage, (0, 0.0))
+        return count / seconds if count and seconds > 0 else None
+
+    def fits(self, stage: str, items: int = 1) -> bool:
+        """Whether a batch of a stage is expected to finish within the budget.
+
+        The first batch of a stage is attempted as long as time is left.
+        """
+        remaining = self.remaining()
+        if remaining == math.inf:
+            return True
+        if remaining <= 0:
+            return False
+
+        count, seconds = self.stats.get(stage, (0, 0.0))
+        return not count or seconds / count * items <= remaining
+
+    def record(self, stage: str, items: int, seconds: float) -> None:
+        """Record a finished batch of a stage."""
+        self.stats[stage][0] += items
+        self.stats[stage][1] += seconds
+
+    def skip(self, stage: str, items: int) -> None:
+        """Record a batch skipped for the budget."""
+        if items:
+            logging.warning(
+                "[%s] %d items skipped: %.1f seconds left.",
+                stage,
+                items,
+                self.remaining(),
+            )
+        self.skipped[stage] += items
+
+    @contextlib.contextmanager
+    def timed(self, stage: str, items: int):
+        """Record the time of a batch of a stage."""
+        begin = self._clock()
+        yield
+        self.record(stage, items, self._clock() - begin)
+
+    @property
+    def num_skipped(self) -> int:
+        """Number of skipped items over all stages."""
+        return sum(self.skipped.values())
+
+    def summary(self) -> Dict[str, dict]:
+        """Throughput and skipped items per stage."""
+        return {
+            stage: {
+                "items": self.stats.get(stage, (0, 0.0))[0],
+                "items_per_second": self.throughput(stage),
+                "skipped": self.skipped.get(stage, 0),
+            }
+            for stage in list(self.stats) + list(self.skipped)
+        }
@@ -0,0 +1,151 @@
+"""Publish files to git branches with plumbing commands.
+
+Files are staged into a temporary index on top of the remote base branch, then
+committed with `commit-tree` and pointed to by a branch ref. The main checkout
+is never switched, the process cwd is never changed, and several branches
+go out in a single `git push`. Branches already on the remote, e.g. of a rerun
+of the same day, are replaced with a lease on their remote commits.
+"""
+
+import logging
+import os
+import subprocess
+import tempfile
+from typing import Dict, List
+
+
+def run(*args, cwd: str = None, env: Dict[str, str] = None, stdin: str = None) -> str:
+    """Run a git command: Return its stdout, or raise RuntimeError on failures."""
+    result = subprocess.run(
+        ["git"] + list(args),
+        cwd=cwd or None,
+        env=None if env is None else {**os.environ, **env},
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Git command failed: git {' '.join(args)}: {result.stderr.strip()}"
+        )
+    return result.stdout.strip()
+
+
+def _get_base(repo_dir: str, base_branch: str, remote: str, fetch: bool) -> str:
+    """Get the base commit, from the remote branch if any."""
+    if remote and fetch:
+        run("fetch", remote, base_branch, cwd=repo_dir)
+    for ref in (f"refs/remotes/{remote}/{base_branch}", f"refs/heads/{base_branch}"):
+        try:
+            return run("rev-parse", "--verify", f"{ref}^{{commit}}", cwd=repo_dir)
+        except RuntimeError:
+            continue
+    raise RuntimeError(f"Unknown base branch `{base_branch}` in `{repo_dir}`.")
+
+
+def commit_files(
+    repo_dir: str,
+    branch: str,
+    files: List[str],
+    base: str,
+    message: str,
+) -> str:
+    """Commit files on top of a base commit into a branch: Return the commit.
+
+    Return None when files are unchanged from the base commit.
+    """
+    top = run("rev-parse", "--show-toplevel", cwd=repo_dir)
+    paths = [os.path.abspath(file) for file in files]
+    rel_paths = [os.path.relpath(path, top) for path in paths]
+    for path, rel_path in zip(paths, rel_paths):
+        if rel_path.startswith(".."):
+            raise ValueError(f"File `{path}` is outside of the repo `{top}`.")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = {"GIT_INDEX_FILE": os.path.join(temp_dir, "index")}
+        run("read-tree", base, cwd=top, env=env)
+
+        shas = run(
+            "hash-object", "-w", "--stdin-paths", cwd=top, stdin="\n".join(paths)
+        ).split("\n")
+        run(
+            "update-index",
+            "--add",
+            "--index-info",
+            cwd=top,
+            env=env,
+            stdin="".join(
+                f"{_get_mode(path)} {sha}\t{rel_path}\n"
+                for path, sha, rel_path in zip(paths, shas, rel_paths)
+            ),
+        )
+        tree = run("write-tree", cwd=top, env=env)
+
+    if tree == run("rev-parse", f"{base}^{{tree}}", cwd=top):
+        logging.info("No changes for branch `%s`: Skipped.", branch)
+        return None
+
+    commit = run("commit-tree", tree, "-p", base, "-m", message, cwd=top)
+    run("update-ref", f"refs/heads/{branch}", commit, cwd=top)
+    logging.info("Committed %d files into `%s`: %s.", len(files), branch, commit)
+    return commit
+
+
+def _get_remote_heads(
+    repo_dir: str, remote: str, branches: List[str]
+) -> Dict[str, str]:
+    """{branch: commit} of the branches on the remote, if any."""
+    output = run(
+        "ls-remote",
+        "--heads",
+        remote,
+        *[f"refs/heads/{b}" for b in branches],
+        cwd=repo_dir,
+    )
+    heads = {}
+    for line in output.splitlines():
+        sha, ref = line.split("\t")
+        heads[ref[len("refs/heads/") :]] = sha
+    return heads
+
+
+def _get_mode(path: str) -> str:
+    return "100755" if os.access(path, os.X_OK) else "100644"
+
+
+def publish_branches(
+    repo_dir: str,
+    branches: Dict[str, List[str]],
+    base_branch: str,
+    remote: str = "origin",
+    push: bool = True,
+) -> List[str]:
+    """Commit files into branches on top of the base branch, and push them at once.
+
+    Return the pushed branches, i.e. the ones with changes.
+    """
+    repo_dir = repo_dir or "."
+    base = _get_base(repo_dir, base_branch, remote, fetch=push)
+
+    pushed = []
+    for branch, files in branches.items():
+        if isinstance(files, str):
+            files = [files]
+        if commit_files(repo_dir, branch, files, base, f"Add {branch}."):
+            pushed.append(branch)
+
+    if push and pushed:
+        # Each commit is on top of base, so existing branches are replaced, as
+        # long as they are still at the commits seen here (empty: not existing).
+        heads = _get_remote_heads(repo_dir, remote, pushed)
+        run(
+            "push",
+            *[f"--force-with-lease=refs/heads/{b}:{heads.get(b, '')}" for b in pushed],
+            remote,
+            *[f"{b}:refs/heads/{b}" for b in pushed],
+            cwd=repo_dir,
+        )
+        logging.info("Pushed %d branches to `%s`: %s.", len(pushed), remote, pushed)
+
+    return pushed
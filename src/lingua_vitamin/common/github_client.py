@@ -0,0 +1,198 @@
+"""A small GitHub REST client: Pooled, rate-limit aware, and reusing open PRs.
+
+One client keeps one HTTP session (and its connection pool) per token and
+thread, as sessions are not thread-safe, caches repo objects, and tracks
+`X-RateLimit-*` headers: Once the quota runs out, or
+on secondary rate limits with `Retry-After`, it sleeps and retries instead of
+failing. A PR for a branch that already has an open one is updated in place.
+"""
+
+import functools
+import logging
+import threading
+import time
+from typing import Dict
+
+import requests
+
+API_URL = "https://api.github.com"
+
+_MAX_RETRIES = 3
+# Never sleep longer than this on rate limits.
+_MAX_WAIT = 900
+
+
+class GitHubError(RuntimeError):
+    """GitHub API errors."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"GitHub API error {status}: {message}")
+        self.status = status
+
+
+class GitHubClient:
+    """GitHub REST client sharing one session across calls of each thread."""
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = API_URL,
+        max_retries: int = _MAX_RETRIES,
+        max_wait: float = _MAX_WAIT,
+        sleep=time.sleep,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self._sleep = sleep
+        self._repos: Dict[str, dict] = {}
+
+        # Rate limit from the last response: (remaining, reset epoch seconds).
+        self.remaining = None
+        self.reset = None
+
+        self._headers = {
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "LinguaVitamin",
+        }
+        if token:
+            self._headers["Authorization"] = f"Bearer {token}"
+
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """The session of the current thread, e.g. of a publish worker."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self._headers)
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """Close the sessions of all threads."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+    def _update_rate_limit(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset is not None:
+            self.reset = float(reset)
+
+    def _wait(self, seconds: float):
+        seconds = min(max(seconds, 0), self.max_wait)
+        logging.warning("GitHub rate limited: Sleeping for %.1f seconds.", seconds)
+        self._sleep(seconds)
+
+    def _get_wait(self, response) -> float:
+        """Seconds to wait before a retry, or None if not rate limited."""
+        if response.status_code not in (403, 429):
+            return None
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        if self.remaining == 0 and self.reset is not None:
+            return self.reset - time.time() + 1
+        return None
+
+    def request(self, method: str, path: str, **kwargs):
+        """Send a request: Return its json, or raise GitHubError."""
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        retry = 0
+        while True:
+            if self.remaining == 0 and self.reset is not None:
+                # Out of quota: Wait for the reset instead of a certain 403.
+                self.remaining = None
+                if self.reset > time.time():
+                    self._wait(self.reset - time.time() + 1)
+
+            response = self.session.request(method, url, timeout=30, **kwargs)
+            self._update_rate_limit(response)
+
+            # Not rate limited, or out of retries: Done, or failed once.
+            wait = self._get_wait(response)
+            if wait is None or retry >= self.max_retries:
+                break
+            retry += 1
+            self.remaining = None
+            self._wait(wait)
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+                errors = response.json().get("errors")
+                if errors:
+                    message = f"{message}: {errors}"
+            except ValueError:
+                message = response.text
+            raise GitHubError(response.status_code, message)
+
+        return response.json() if response.content else None
+
+    def get_repo(self, repo_name: str) -> dict:
+        """Get a repo, e.g. `user/repo`, cached."""
+        if repo_name not in self._repos:
+            self._repos[repo_name] = self.request("GET", f"/repos/{repo_name}")
+        return self._repos[repo_name]
+
+    def find_pull(self, repo_name: str, branch: str, base_branch: str = None):
+        """Find an open PR from a branch of the repo, or None."""
+        repo = self.get_repo(repo_name)
+        params = {"state": "open", "head": f"{repo['owner']['login']}:{branch}"}
+        if base_branch:
+            params["base"] = base_branch
+
+        pulls = self.request("GET", f"/repos/{repo_name}/pulls", params=params)
+        return pulls[0] if pulls else None
+
+    def create_or_update_pull(
+        self, repo_name: str, branch: str, base_branch: str, title: str, body: str
+    ) -> dict:
+        """Create a PR, or update the open one of the same branch."""
+        pull = self.find_pull(repo_name, branch, base_branch)
+        if pull is None:
+            try:
+                pull = self.request(
+                    "POST",
+                    f"/repos/{repo_name}/pulls",
+                    json={
+                        "title": title,
+                        "body": body,
+                        "head": branch,
+                        "base": base_branch,
+                    },
+                )
+                logging.info("Created PR #%s: `%s`.", pull["number"], pull["title"])
+                return pull
+            except GitHubError as error:
+                if error.status != 422:
+                    raise
+                # A PR was opened in between.
+                pull = self.find_pull(repo_name, branch, base_branch)
+                if pull is None:
+                    raise
+
+        pull = self.request(
+            "PATCH",
+            f"/repos/{repo_name}/pulls/{pull['number']}",
+            json={"title": title, "body": body},
+        )
+        logging.info("Updated PR #%s: `%s`.", pull["number"], pull["title"])
+        return pull
+
+
+@functools.lru_cache(maxsize=None)
+def get_client(token: str, base_url: str = API_URL) -> GitHubClient:
+    """Get a client per (token, url), shared within the process."""
+    return GitHubClient(token, base_url=base_url)
@@ -0,0 +1,178 @@
+"""Language identification of feed items, by a compact local n-gram model.
+
+Scripts tell apart e.g. Chinese, Japanese or Cyrillic texts. Latin texts are
+scored by their function words, letter trigrams at word boundaries and
+diacritics per language, where features shared by several languages weigh
+less. Texts without a clear winner are left undetected (None), e.g. short
+titles of names, so that they keep the language of their feed.
+"""
+
+from collections import defaultdict
+import re
+from typing import Dict, Iterable, List, Optional
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Code point ranges of non-Latin scripts, by their most common language.
+_SCRIPTS = (
+    ("ja", ((0x3040, 0x30FF),)),  # Hiragana, Katakana
+    ("ko", ((0xAC00, 0xD7AF), (0x1100, 0x11FF))),
+    ("zh", ((0x4E00, 0x9FFF), (0x3400, 0x4DBF))),
+    ("ru", ((0x0400, 0x04FF),)),
+    ("ar", ((0x0600, 0x06FF),)),
+    ("el", ((0x0370, 0x03FF),)),
+    ("he", ((0x0590, 0x05FF),)),
+)
+
+# Function words, word-boundary trigrams (`_` for a boundary) and diacritics.
+_FEATURES = {
+    "de": (
+        "der die das und den von zu mit ist des sich im dem nicht ein eine als "
+        "auch auf für wird sind noch wie einer um am bei nach aus hat dass sie "
+        "er wir ich nur oder aber vor zur zum über werden soll mehr neue einen",
+        "sch ich cht ung ein eit gen auf _zu tz_ ngs ach",
+        "äöüß",
+    ),
+    "en": (
+        "the of and to in is that for it with as was on are be by this from at "
+        "or have an has they which but not his their were been will would who "
+        "its after over new says said than more about into he she we you can",
+        "_th the he_ ing ng_ ed_ ly_ _wh ght ow_ ay_ _yo",
+        "",
+    ),
+    "es": (
+        "el la de que y en los del se las por un para con no una su al lo como "
+        "más pero sus le ya o este porque esta entre cuando muy sin sobre "
+        "también me hasta hay donde desde todo nos durante es son ha fue",
+        "ión ció os_ as_ ado ada dad ía_ _qu nte ero",
+        "ñ¿¡áíóú",
+    ),
+    "fr": (
+        "le la les de des et en du un une est que pour dans qui pas sur au par "
+        "plus ne se ce il elle avec sont aux son sa ses ont été mais comme "
+        "cette leur nous vous lors après où être",
+        "ent _le es_ eau oi_ ou_ ait ais eux _qu ité ée_",
+        "çàèêëîïôûùœé",
+    ),
+    "it": (
+        "il di che e la per un in del della non una sono le dei si con gli da "
+        "al nel alla anche più ma è come questo delle ha lo",
+        "che ell zio ato gli ett lla zza ere",
+        "òàùèì",
+    ),
+    "nl": (
+        "de het een en van in is op te dat die voor met zijn niet aan er om ook "
+        "als bij door maar naar dan nog wordt worden heeft werd uit over deze "
+        "kan tot geen hun wij zij was",
+        "ij_ aar oor een ijk _ee oo_ _ge",
+        "",
+    ),
+    "pt": (
+        "o de que e do da em um para com não uma os no se na por mais as dos "
+        "como mas ao ele das à seu sua ou quando muito nos já está também são "
+        "foi pelo pela até isso",
+        "ção ões ão_ nha lho dos ade",
+        "ãõç",
+    ),
+}
+
+# Weights of boundary trigrams and diacritics, relative to function words.
+_TRIGRAM_WEIGHT = 0.5
+_CHAR_WEIGHT = 1.0
+
+
+def _get_weights(features) -> Dict[str, Dict[str, float]]:
+    """{feature: {lang: weight}}, where shared features weigh less."""
+    langs = defaultdict(set)
+    for lang, (words, trigrams, chars) in features.items():
+        for word in words.split():
+            langs["w:" + word].add(lang)
+        for trigram in trigrams.split():
+            langs["t:" + trigram.replace("_", " ")].add(lang)
+        for char in chars:
+            langs["c:" + char].add(lang)
+
+    scale = {"w": 1.0, "t": _TRIGRAM_WEIGHT, "c": _CHAR_WEIGHT}
+    return {
+        feature: {lang: scale[feature[0]] / len(lang_set) for lang in lang_set}
+        for feature, lang_set in langs.items()
+    }
+
+
+_WEIGHTS = _get_weights(_FEATURES)
+
+
+def _get_script(text: str) -> Optional[str]:
+    """Language of the dominant non-Latin script, if any."""
+    counts = defaultdict(int)
+    letters = 0
+    for char in text:
+        if not char.isalpha():
+            continue
+        letters += 1
+        code = ord(char)
+        for lang, ranges in _SCRIPTS:
+            if any(start <= code <= end for start, end in ranges):
+                counts[lang] += 1
+                break
+
+    if not counts:
+        return None
+    # Kana besides Han characters are Japanese.
+    if counts.get("ja", 0) >= 0.1 * sum(counts.values()):
+        return "ja"
+    lang, count = max(counts.items(), key=lambda x: x[1])
+    return lang if count >= 0.3 * letters else None
+
+
+class LanguageIdentifier:
+    """Detect languages of texts, or None where unclear.
+
+    Given `langs`, e.g. of translation models, `route()` drops other languages.
+    """
+
+    def __init__(self, langs=None, min_score: float = 2.0, min_ratio: float = 1.5):
+        self.langs = langs
+        self.min_score = min_score
+        self.min_ratio = min_ratio
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Scores of Latin-script languages."""
+        scores = defaultdict(float)
+        for word in _WORD.findall(text.lower()):
+            features = ["w:" + word] + ["c:" + char for char in word]
+            padded = f" {word} "
+            features += ["t:" + padded[i : i + 3] for i in range(len(padded) - 2)]
+            for feature in features:
+                for lang, weight in _WEIGHTS.get(feature, {}).items():
+                    scores[lang] += weight
+        return scores
+
+    def detect(self, text: str) -> Optional[str]:
+        """Language of a text, or None where unclear."""
+        script = _get_script(text)
+        if script is not None:
+            return script
+
+        ranked = sorted(self.scores(text).items(), key=lambda x: -x[1])
+        if not ranked or ranked[0][1] < self.min_score:
+            return None
+        if len(ranked) > 1 and ranked[0][1] < self.min_ratio * ranked[1][1]:
+            return None
+        return ranked[0][0]
+
+    def detect_batch(self, texts: Iterable[str]) -> List[Optional[str]]:
+        """Languages of texts, e.g. of all items of a feed."""
+        return [self.detect(text) for text in texts]
+
+    def route(self, texts: Iterable[str], default: str, langs=None) -> List[str]:
+        """Source languages of texts, e.g. items of a feed in `default`.
+
+        Undetected texts keep `default`, and texts in languages other than
+        `langs` (all if None) get None, i.e. to be dropped.
+        """
+        langs = self.langs if langs is None else langs
+        return [
+            None if langs is not None and lang not in langs else lang
+            for lang in (lang or default for lang in self.detect_batch(texts))
+        ]
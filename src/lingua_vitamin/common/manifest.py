@@ -0,0 +1,106 @@
+"""Content fingerprints of job inputs and outputs, to skip unchanged runs.
+
+A manifest keeps, per job (e.g. `news-de`), the fingerprint of its normalized
+article set, and per output file its content hash. A job whose articles are
+unchanged since the last run needs no rendering, push, PR or email, and of a
+changed job only files with new content need to be published.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, List
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, float) and value != value:  # NaN
+        return None
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def fingerprint(items, **config) -> str:
+    """Fingerprint a set of articles, regardless of their order and whitespace."""
+    lines = sorted(
+        json.dumps(_normalize(item), sort_keys=True, ensure_ascii=False, default=str)
+        for item in items or ()
+    )
+    digest = hashlib.sha256()
+    digest.update(json.dumps(_normalize(config), sort_keys=True).encode("utf-8"))
+    for line in lines:
+        digest.update(b"\n" + line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """Content hash of a file, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Fingerprints of job inputs, and content hashes of output files.
+
+    File paths are kept relative to `root`, e.g. the output root.
+    """
+
+    def __init__(self, path: str, root: str = ""):
+        self.path = path
+        self.root = root or "."
+        self.inputs: Dict[str, str] = {}
+        self.files: Dict[str, str] = {}
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.inputs = data.get("inputs", {})
+            self.files = data.get("files", {})
+
+    def _key(self, file: str) -> str:
+        return os.path.relpath(file, self.root)
+
+    def is_unchanged(self, job: str, digest: str) -> bool:
+        """Whether the inputs of a job are the same as the last run."""
+        return self.inputs.get(job) == digest
+
+    def changed(self, files) -> List[str]:
+        """Files whose content differs from the last recorded one."""
+        return [
+            file
+            for file in files
+            if file != self.path and self.files.get(self._key(file)) != hash_file(file)
+        ]
+
+    def update(self, job: str, digest: str, files) -> None:
+        """Record the inputs of a job, and the content of its output files."""
+        self.inputs[job] = digest
+        for file in files:
+            if file != self.path and os.path.exists(file):
+                self.files[self._key(file)] = hash_file(file)
+
+    def save(self) -> str:
+        """Save the manifest: Return its path."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"inputs": self.inputs, "files": self.files},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        logging.info("Manifest saved to `%s`.", self.path)
+        return self.path
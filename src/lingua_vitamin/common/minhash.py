@@ -0,0 +1,103 @@
+"""MinHash signatures with an LSH index, for near-duplicate texts."""
+
+from collections import defaultdict
+import re
+import zlib
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+import numpy as np
+
+# Largest prime below 2^32: (a * h + b) stays within uint64.
+_PRIME = np.uint64(4294967291)
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lower case, without punctuation and repeated spaces."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def shingles(text: str, size: int = 4) -> Set[str]:
+    """Character shingles of the normalized text."""
+    text = normalize(text)
+    if len(text) <= size:
+        return {text} if text else set()
+
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def _get_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """Get (bands, rows) so that the LSH s-curve is centered at the threshold."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+
+    return best[1:]
+
+
+class MinHash:
+    """MinHash signatures with `num_perm` universal hash functions."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        """Get the signature of a set of tokens."""
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) % int(_PRIME) for t in tokens),
+            dtype=np.uint64,
+        )
+        if not hashes.size:
+            return (int(_PRIME),) * self.num_perm
+
+        values = (self._a * hashes[np.newaxis, :] + self._b) % _PRIME
+        return tuple(int(v) for v in values.min(axis=1))
+
+
+def similarity(sig1, sig2) -> float:
+    """Estimated Jaccard similarity between two signatures."""
+    return sum(x == y for x, y in zip(sig1, sig2)) / len(sig1)
+
+
+class LSHIndex:
+    """LSH index over MinHash signatures, banded for a given threshold."""
+
+    def __init__(self, num_perm: int = 64, threshold: float = 0.7):
+        self.threshold = threshold
+        self.bands, self.rows = _get_bands(num_perm, threshold)
+        self._buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [
+            defaultdict(list) for _ in range(self.bands)
+        ]
+        self._signatures: Dict[Hashable, Tuple[int, ...]] = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _bands(self, sig):
+        for band in range(self.bands):
+            yield band, tuple(sig[band * self.rows : (band + 1) * self.rows])
+
+    def add(self, key: Hashable, sig) -> None:
+        """Add a signature with a given key."""
+        self._signatures[key] = tuple(sig)
+        for band, value in self._bands(sig):
+            self._buckets[band][value].append(key)
+
+    def query(self, sig) -> List[Tuple[Hashable, float]]:
+        """Get (key, similarity) above the threshold, the most similar first."""
+        candidates = set()
+        for band, value in self._bands(sig):
+            candidates.update(self._buckets[band].get(value, ()))
+
+        matches = [(key, similarity(sig, self._signatures[key])) for key in candidates]
+        matches = [(key, score) for key, score in matches if score >= self.threshold]
+        return sorted(matches, key=lambda x: -x[1])
@@ -0,0 +1,202 @@
+"""Email notifications over one SMTP session per run, with digests.
+
+A notifier connects (STARTTLS and login) on its first email, and keeps the
+session for later ones, reconnecting once if the server dropped it. Notices
+of several jobs can be queued with `add()` and sent as one digest email with
+`flush()`. Small markdown bodies are inlined, while large ones are truncated to
+a preview with a link, and attached gzip compressed.
+"""
+
+import atexit
+import functools
+import gzip
+import logging
+import os
+import smtplib
+from typing import List
+
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+# Bodies up to this size are inlined, otherwise attached.
+MAX_INLINE = 32 * 1024
+# Preview size of attached bodies.
+PREVIEW = 2 * 1024
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _preview(text: str, size: int) -> str:
+    """Head of a text, cut at a line break."""
+    if len(text) <= size:
+        return text
+    head = text[:size]
+    return head[: head.rfind("\n")] if "\n" in head else head
+
+
+class Notifier:
+    """Send emails over a persistent SMTP session."""
+
+    def __init__(
+        self,
+        smtp_server: str,
+        smtp_port: int,
+        smtp_user: str = None,
+        smtp_password: str = None,
+        starttls: bool = True,
+        max_inline: int = MAX_INLINE,
+        preview: int = PREVIEW,
+        timeout: float = 60,
+    ):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.smtp_user = smtp_user
+        self.smtp_password = smtp_password
+        self.starttls = starttls
+        self.max_inline = max_inline
+        self.preview = preview
+        self.timeout = timeout
+
+        self._server = None
+        self._notices = []
+
+    def _connect(self):
+        if self._server is not None:
+            return self._server
+
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.smtp_user:
+                server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+
+        logging.info("Connected to `%s:%s`.", self.smtp_server, self.smtp_port)
+        self._server = server
+        return server
+
+    def close(self):
+        """Close the SMTP session, if any."""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except smtplib.SMTPException:
+            self._server.close()
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _attach(self, msg, path: str, text: str = None):
+        """Attach a file, gzip compressed if large."""
+        name = os.path.basename(path)
+        text = _read(path) if text is None else text
+        if len(text) <= self.max_inline:
+            part = MIMEText(text, "plain", "utf-8")
+        else:
+            part = MIMEApplication(gzip.compress(text.encode("utf-8")), "gzip")
+            name += ".gz"
+        part.add_header("Content-Disposition", "attachment", filename=name)
+        msg.attach(part)
+
+    def build(
+        self,
+        subject: str,
+        body: str,
+        from_email: str,
+        to_emails: List[str],
+        body_file: str = None,
+        attachments=(),
+        link: str = None,
+    ) -> MIMEMultipart:
+        """Build an email: A small body file is inlined, a large one attached."""
+        msg = MIMEMultipart()
+        msg["From"] = from_email
+        msg["To"] = ", ".join(to_emails)
+        msg["Subject"] = subject
+
+        files = []
+        if body_file and os.path.exists(body_file):
+            text = _read(body_file)
+            if len(text) <= self.max_inline:
+                body += f"\n\n{text}"
+            else:
+                body += "\n\n".join(
+                    [
+                        "",
+                        _preview(text, self.preview),
+                        f"... ({len(text)} characters in total, see "
+                        f"{link or 'the attachment'})",
+                    ]
+                )
+                files.append((body_file, text))
+        files += [(path, None) for path in attachments if os.path.exists(path)]
+
+        msg.attach(MIMEText(body, "plain", "utf-8"))
+        for path, text in files:
+            self._attach(msg, path, text)
+
+        return msg
+
+    def send(self, subject: str, body: str, from_email: str, to_emails, **kwargs):
+        """Send an email: Raise on failures."""
+        msg = self.build(subject, body, from_email, to_emails, **kwargs)
+        for retry in range(2):
+            try:
+                self._connect().sendmail(from_email, to_emails, msg.as_string())
+                break
+            except smtplib.SMTPServerDisconnected:
+                # The session timed out between emails.
+                self._server = None
+                if retry:
+                    raise
+        logging.info("Email `%s` sent to %d recipients.", subject, len(to_emails))
+        return True
+
+    def add(self, title: str, body: str, attachments=(), link: str = None):
+        """Queue a notice for the next digest."""
+        self._notices.append((title, body, list(attachments), link))
+
+    def flush(self, subject: str, from_email: str, to_emails):
+        """Send queued notices as one digest email: Return whether any is sent."""
+        notices, self._notices = self._notices, []
+        if not notices:
+            return False
+
+        sections = []
+        attachments = []
+        for title, body, files, link in notices:
+            lines = [f"## {title}", body]
+            if link:
+                lines.append(link)
+            sections.append("\n\n".join(lines))
+            attachments += files
+
+        return self.send(
+            subject,
+            "\n\n".join(sections),
+            from_email,
+            to_emails,
+            attachments=attachments,
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_notifier(
+    smtp_server: str, smtp_port: int, smtp_user: str = None, smtp_password: str = None
+) -> Notifier:
+    """Get a notifier shared within the process, closed at exit."""
+    notifier = Notifier(smtp_server, smtp_port, smtp_user, smtp_password)
+    atexit.register(notifier.close)
+    return notifier
@@ -0,0 +1,204 @@
+"""Profiling mode for slow runs: CPU, torch and memory views.
+
+`--profile` wraps a run with
+
+- a sampling CPU profiler: Stacks of all threads every few milliseconds, as
+  folded stacks for flamegraphs, e.g. `flamegraph.pl cpu.folded > cpu.svg` or
+  speedscope, so that feedparser, tokenization, generation, pandas or git show
+  up by their share of wall time;
+- the torch profiler around generation calls: Top operators by CPU time;
+- `tracemalloc` snapshots per pipeline stage: Time, peak and top-N allocations.
+
+Hooks are shared null contexts unless profiling, so that the non-profiled path
+does not pay for them.
+"""
+
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+from lingua_vitamin.common import utils
+
+PROFILE_DIR = "profile"
+CPU_FILE = "cpu.folded"
+TORCH_FILE = "torch.txt"
+MEMORY_FILE = "memory.txt"
+
+# Set while profiling, see `profile()`.
+PROFILER = None
+
+_NULL = contextlib.nullcontext()
+_FRAMES = 16
+
+
+def _label(code) -> str:
+    filename = os.path.basename(code.co_filename)
+    # Qualified names only since Python 3.11.
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """CPU samples, torch operators and allocations per stage of a run."""
+
+    def __init__(self, output_dir: str, interval: float = 0.005, top_n: int = 25):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.top_n = top_n
+        self.samples: Counter = Counter()
+        self.ops: Dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])
+        self.generations: Dict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.stages: List[dict] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        """Start sampling and tracing allocations."""
+        if "torch" in sys.modules:
+            # Lazy imports of the torch profiler are slow once traced.
+            with sys.modules["torch"].profiler.profile():
+                pass
+        tracemalloc.start(_FRAMES)
+        self._thread = threading.Thread(
+            target=self._sample, name="profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> List[str]:
+        """Stop profiling, and write reports: Return their paths."""
+        self._stop.set()
+        self._thread.join()
+        tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = [self._write_cpu(), self._write_torch(), self._write_memory()]
+        logging.info("Profiles written to `%s`.", self.output_dir)
+        return paths
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time, peak and top allocations of a stage."""
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        begin = time.time()
+        try:
+            yield
+        finally:
+            seconds = time.time() - begin
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            self.stages.append(
+                {
+                    "stage": name,
+                    "seconds": seconds,
+                    "peak_mb": peak / 2**20,
+                    "top": after.compare_to(before, "lineno")[: self.top_n],
+                }
+            )
+
+    @contextlib.contextmanager
+    def generation(self, name: str):
+        """Torch operators of a generation call."""
+        import torch
+
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+        begin = time.time()
+        with torch.profiler.profile(activities=activities) as prof:
+            yield
+        self.generations[name][0] += 1
+        self.generations[name][1] += time.time() - begin
+        for event in prof.key_averages():
+            op = self.ops[event.key]
+            op[0] += event.count
+            op[1] += event.self_cpu_time_total / 1e6
+            op[2] += event.cpu_time_total / 1e6
+
+    def _write_cpu(self) -> str:
+        path = os.path.join(self.output_dir, CPU_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def _write_torch(self) -> str:
+        path = os.path.join(self.output_dir, TORCH_FILE)
+        lines = ["# Generation calls: model | calls | seconds"]
+        lines += [
+            f"{name} | {count} | {seconds:.3f}"
+            for name, (count, seconds) in sorted(self.generations.items())
+        ]
+        lines += ["", f"# Top {self.top_n} ops: op | calls | self CPU s | CPU s"]
+        top = sorted(self.ops.items(), key=lambda x: -x[1][1])[: self.top_n]
+        lines += [f"{key} | {n} | {s:.3f} | {t:.3f}" for key, (n, s, t) in top]
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def _write_memory(self) -> str:
+        path = os.path.join(self.output_dir, MEMORY_FILE)
+        lines = []
+        for stage in self.stages:
+            lines.append(
+                f"# {stage['stage']}: {stage['seconds']:.3f} s, "
+                f"peak {stage['peak_mb']:.1f} MB"
+            )
+            lines += [str(stat) for stat in stage["top"]]
+            lines.append("")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        return path
+
+
+def get_dir(output_root: str, tag: str = "run") -> str:
+    """Directory of the profiles of a run."""
+    return utils.get_state_path(
+        output_root, PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}--{tag}"
+    )
+
+
+@contextlib.contextmanager
+def profile(output_dir: str, **kwargs):
+    """Profile a run: Reports are written into `output_dir` at exit."""
+    global PROFILER
+    PROFILER = Profiler(output_dir, **kwargs)
+    PROFILER.start()
+    try:
+        yield PROFILER
+    finally:
+        profiler, PROFILER = PROFILER, None
+        profiler.stop()
+
+
+def stage(name: str):
+    """Profile a pipeline stage while profiling."""
+    return _NULL if PROFILER is None else PROFILER.stage(name)
+
+
+def generation(name: str):
+    """Profile a generation call while profiling."""
+    return _NULL if PROFILER is None else PROFILER.generation(name)
@@ -0,0 +1,174 @@
+"""Make-style cache of pipeline stages, keyed by content hashes.
+
+A stage, e.g. fetch, translate per target, render or vocab, is keyed by the
+fingerprint of its inputs, the source code it runs and its parameters. Its
+output is kept in a local artifact cache, and stages whose key is unchanged
+are not run again on reruns: A fix in a renderer re-renders in seconds,
+without touching translations.
+
+Stages with files as outputs are stamped instead: They are skipped while their
+key is unchanged and their files have the content they were written with.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import time
+from typing import Callable, Iterable, List
+
+from lingua_vitamin.common import manifest
+
+_STAMPS_FILE = "stamps.json"
+
+
+def code_version(*objs) -> str:
+    """Hash of the source code of functions, classes or modules."""
+    digest = hashlib.sha256()
+    for obj in objs:
+        try:
+            source = inspect.getsource(obj)
+        except (OSError, TypeError):
+            source = repr(obj)
+        digest.update(source.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class StageCache:
+    """Outputs of pipeline stages under a cache directory.
+
+    A disabled cache runs every stage, and keeps nothing.
+    """
+
+    def __init__(self, cache_dir: str, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+
+    def key(self, stage: str, inputs, code: str = "", **params) -> str:
+        """Key of a stage run, by a list of inputs in order.
+
+        Outputs depend on the order of inputs, e.g. translations by position, or
+        vocab examples: Unlike job fingerprints, keys are not order-insensitive.
+        """
+        return manifest.fingerprint(
+            [list(inputs or ())], stage=stage, code=code, **params
+        )
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, key[:2], f"{key}.pkl")
+
+    def get(self, stage: str, key: str, default=None):
+        """Cached output of a stage run, or `default`."""
+        if not self.enabled:
+            return default
+        path = self._path(stage, key)
+        if not os.path.exists(path):
+            self.misses.append(stage)
+            return default
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except Exception as error:
+            logging.warning("Unable to read stage cache `%s`: <<<%s>>>", path, error)
+            self.misses.append(stage)
+            return default
+
+        # Last used, for `prune()`.
+        os.utime(path)
+        self.hits.append(stage)
+        return value
+
+    def has(self, stage: str, key: str) -> bool:
+        """Whether the output of a stage run is kept, without using it."""
+        return self.enabled and os.path.exists(self._path(stage, key))
+
+    def put(self, stage: str, key: str, value) -> None:
+        """Keep the output of a stage run."""
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def run(self, stage: str, func: Callable, inputs, code: str = "", **params):
+        """Run a stage unless cached: Return its output.
+
+        Outputs of None are not kept, e.g. failed or incomplete runs.
+        """
+        key = self.key(stage, inputs, code=code, **params)
+        value = self.get(stage, key)
+        if value is not None:
+            logging.info("[%s] Cached: Skipped.", stage)
+            return value
+
+        value = func()
+        if value is not None:
+            self.put(stage, key, value)
+        return value
+
+    def _stamps_path(self) -> str:
+        return os.path.join(self.cache_dir, _STAMPS_FILE)
+
+    def _load_stamps(self) -> dict:
+        if not os.path.exists(self._stamps_path()):
+            return {}
+        with open(self._stamps_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def run_files(
+        self,
+        stage: str,
+        func: Callable,
+        inputs,
+        outputs: Iterable[str],
+        code: str = "",
+        **params,
+    ):
+        """Run a stage writing `outputs` unless up to date: Return if it ran.
+
+        Outputs are stamped unless `func` returns False, e.g. for incomplete runs.
+        """
+        outputs = list(outputs)
+        key = self.key(stage, inputs, code=code, **params)
+        name = "|".join([stage] + outputs)
+        stamp = self._load_stamps().get(name, {}) if self.enabled else {}
+        if stamp.get("key") == key and all(
+            manifest.hash_file(f) == stamp["files"].get(f) for f in outputs
+        ):
+            logging.info("[%s] Up to date: Skipped.", stage)
+            self.hits.append(stage)
+            return False
+
+        self.misses.append(stage)
+        if func() is not False and self.enabled:
+            stamps = self._load_stamps()
+            stamps[name] = {
+                "key": key,
+                "files": {f: manifest.hash_file(f) for f in outputs},
+            }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._stamps_path(), "w", encoding="utf-8") as f:
+                json.dump(stamps, f, indent=2, sort_keys=True)
+        return True
+
+    def prune(self, days: int) -> int:
+        """Remove outputs unused for days: Return the number of removed files."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        cutoff = time.time() - days * 86400
+        count = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                path = os.path.join(root, file)
+                if file.endswith(".pkl") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    count += 1
+        return count
@@ -0,0 +1,63 @@
+"""Unit tests for articles.py."""
+
+import logging
+import pickle
+import unittest
+
+from lingua_vitamin.common import articles
+from lingua_vitamin.common import manifest
+from lingua_vitamin.common import utils
+
+_RECORDS = [
+    {"title": "Merz in Berlin", "content": "Ein Text."},
+    {"title": "Kanzler", "content": ""},
+]
+
+
+class TestArticles(unittest.TestCase):
+    """Unit tests for articles.py."""
+
+    def test_records(self):
+        """Unit test for ArticleBatch: Columns, and articles as dicts."""
+        batch = articles.ArticleBatch()
+        for record in _RECORDS:
+            batch.append(record)
+
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch["title"], ["Merz in Berlin", "Kanzler"])
+        self.assertEqual(batch[1], _RECORDS[1])
+        self.assertEqual(list(batch), _RECORDS)
+        self.assertIs(articles.ArticleBatch.of(batch), batch)
+        self.assertEqual(articles.ArticleBatch.of(_RECORDS).columns, batch.columns)
+        # Same fingerprints as dicts, also when pickled by the stage cache.
+        self.assertEqual(
+            manifest.fingerprint(pickle.loads(pickle.dumps(batch))),
+            manifest.fingerprint(_RECORDS),
+        )
+
+        batch.append({"title": "Trump", "url": "https://example.com"})
+        self.assertEqual(batch["content"], ["Ein Text.", "", None])
+        self.assertEqual(batch["url"], [None, None, "https://example.com"])
+        self.assertFalse(articles.ArticleBatch())
+
+    def test_columns(self):
+        """Unit test for ArticleBatch: Translations as columns of a copy."""
+        batch = articles.ArticleBatch.of(_RECORDS)
+        copy = batch.copy()
+        copy["title-en"] = ["Merz in Berlin", None]
+        self.assertIn("title-en", copy)
+        self.assertNotIn("title-en", batch)
+        with self.assertRaises(ValueError):
+            copy["content-en"] = ["Text."]
+        with self.assertRaises(ValueError):
+            articles.ArticleBatch({"title": ["a"], "content": []})
+
+        self.assertEqual(copy.take([1])[0], {**_RECORDS[1], "title-en": None})
+        df = copy.to_frame({"title": "title-de", "title-en": "title-en"})
+        self.assertEqual(list(df.columns), ["title-de", "title-en"])
+        self.assertEqual(list(df["title-de"]), batch["title"])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Unit tests for deadline.py."""
+
+import logging
+import math
+import unittest
+
+from lingua_vitamin.common import deadline
+from lingua_vitamin.common import utils
+
+
+class _Clock:
+    """A manual clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(unittest.TestCase):
+    """Unit tests for deadline.py."""
+
+    def test_no_budget(self):
+        """Unit test for Deadline: Everything fits without a budget."""
+        dl = deadline.Deadline(0)
+        self.assertEqual(dl.remaining(), math.inf)
+        self.assertTrue(dl.fits("title", 10**9))
+        self.assertEqual(dl.num_skipped, 0)
+
+    def test_fits(self):
+        """Unit test for Deadline: Batches are estimated by throughput so far."""
+        clock = _Clock()
+        dl = deadline.Deadline(10, clock=clock)
+
+        # Unknown throughput: Attempted.
+        self.assertTrue(dl.fits("content", 100))
+        with dl.timed("content", 4):
+            clock.now += 2
+        self.assertEqual(dl.throughput("content"), 2)
+        self.assertEqual(dl.remaining(), 8)
+
+        self.assertTrue(dl.fits("content", 16))
+        self.assertFalse(dl.fits("content", 17))
+        # Other stages have their own throughput.
+        self.assertTrue(dl.fits("title", 100))
+
+        dl.skip("content", 17)
+        clock.now = 10
+        self.assertFalse(dl.fits("title", 1))
+        dl.skip("title", 3)
+
+        self.assertEqual(dl.num_skipped, 20)
+        self.assertEqual(
+            dl.summary(),
+            {
+                "content": {"items": 4, "items_per_second": 2, "skipped": 17},
+                "title": {"items": 0, "items_per_second": None, "skipped": 3},
+            },
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Unit tests for git.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+
+from lingua_vitamin.common import git
+from lingua_vitamin.common import utils
+
+_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+}
+
+
+class TestGit(unittest.TestCase):
+    """Unit tests for git.py."""
+
+    def setUp(self):
+        self._env = {key: os.environ.get(key) for key in _ENV}
+        os.environ.update(_ENV)
+
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.remote = os.path.join(self._temp_dir.name, "remote.git")
+        self.repo = os.path.join(self._temp_dir.name, "repo")
+
+        git.run("init", "--bare", "-b", "main", self.remote)
+        git.run("clone", self.remote, self.repo)
+        git.run("checkout", "-b", "main", cwd=self.repo)
+        self._write("README.md", "Hello\n")
+        git.run("add", "README.md", cwd=self.repo)
+        git.run("commit", "-m", "Init.", cwd=self.repo)
+        git.run("push", "origin", "main", cwd=self.repo)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+        for key, value in self._env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+    def _write(self, name, content):
+        path = os.path.join(self.repo, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_publish_branches(self):
+        """Unit test for publish_branches."""
+        cwd = os.getcwd()
+        head = git.run("rev-parse", "HEAD", cwd=self.repo)
+
+        branches = {
+            "AUTO--news": [self._write("news/a.md", "News\n")],
+            "AUTO--arxiv": [
+                self._write("arxiv/b.md", "arXiv\n"),
+                self._write("README.md", "Updated\n"),
+            ],
+        }
+        self.assertEqual(
+            git.publish_branches(self.repo, branches, "main"),
+            ["AUTO--news", "AUTO--arxiv"],
+        )
+
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(git.run("rev-parse", "HEAD", cwd=self.repo), head)
+        self.assertEqual(git.run("branch", "--show-current", cwd=self.repo), "main")
+
+        self.assertEqual(
+            git.run("ls-tree", "-r", "--name-only", "AUTO--news", cwd=self.remote),
+            "README.md\nnews/a.md",
+        )
+        self.assertEqual(
+            git.run("show", "AUTO--arxiv:README.md", cwd=self.remote), "Updated"
+        )
+        self.assertEqual(
+            git.run("rev-parse", "AUTO--news^", cwd=self.remote),
+            git.run("rev-parse", "main", cwd=self.remote),
+        )
+
+    def test_publish_branches_twice(self):
+        """Unit test for publish_branches, with a branch already on the remote."""
+        path = self._write("news/a.md", "News\n")
+        git.publish_branches(self.repo, {"AUTO--news": [path]}, "main")
+
+        self._write("news/a.md", "News, rerun\n")
+        self.assertEqual(
+            git.publish_branches(self.repo, {"AUTO--news": [path]}, "main"),
+            ["AUTO--news"],
+        )
+        self.assertEqual(
+            git.run("show", "AUTO--news:news/a.md", cwd=self.remote), "News, rerun"
+        )
+        self.assertEqual(
+            git.run("rev-parse", "AUTO--news^", cwd=self.remote),
+            git.run("rev-parse", "main", cwd=self.remote),
+        )
+
+    def test_publish_branches_unchanged(self):
+        """Unit test for publish_branches, with unchanged files."""
+        path = os.path.join(self.repo, "README.md")
+        self.assertEqual(
+            git.publish_branches(self.repo, {"AUTO--none": [path]}, "main"), []
+        )
+        with self.assertRaises(RuntimeError):
+            git.run("rev-parse", "--verify", "AUTO--none", cwd=self.remote)
+
+    def test_commit_files_outside(self):
+        """Unit test for commit_files, with files outside of the repo."""
+        path = os.path.join(self._temp_dir.name, "outside.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Outside\n")
+
+        with self.assertRaises(ValueError):
+            git.commit_files(self.repo, "AUTO--outside", [path], "HEAD", "Add.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
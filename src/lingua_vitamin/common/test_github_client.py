@@ -0,0 +1,182 @@
+"""Unit tests for github_client.py, against a local mock GitHub server."""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from lingua_vitamin.common import github_client
+from lingua_vitamin.common import utils
+
+_REPO = "user/repo"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Mock GitHub REST API: A repo, its PRs and rate limits."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, data, headers=None):
+        server = self.server
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", str(server.remaining))
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 60))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        data = json.loads(self.rfile.read(length)) if length else None
+        server.requests.append((method, url.path, self.client_address[1]))
+
+        if server.rate_limited:
+            server.rate_limited -= 1
+            self._reply(403, {"message": "rate limited"}, {"Retry-After": "2"})
+            return
+
+        if (method, url.path) == ("GET", f"/repos/{_REPO}"):
+            self._reply(200, {"full_name": _REPO, "owner": {"login": "user"}})
+        elif (method, url.path) == ("GET", f"/repos/{_REPO}/pulls"):
+            head = parse_qs(url.query)["head"][0]
+            self._reply(200, [p for p in server.pulls if f"user:{p['head']}" == head])
+        elif (method, url.path) == ("POST", f"/repos/{_REPO}/pulls"):
+            if any(p["head"] == data["head"] for p in server.pulls):
+                self._reply(422, {"message": "A pull request already exists"})
+                return
+            number = len(server.pulls) + 1
+            pull = {
+                "number": number,
+                "html_url": f"https://github.com/{_REPO}/pull/{number}",
+                **data,
+            }
+            server.pulls.append(pull)
+            self._reply(201, pull)
+        elif method == "PATCH" and url.path.startswith(f"/repos/{_REPO}/pulls/"):
+            pull = server.pulls[int(url.path.rsplit("/", 1)[1]) - 1]
+            pull.update(data)
+            self._reply(200, pull)
+        else:
+            self._reply(404, {"message": "Not Found"})
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._handle("GET")
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._handle("POST")
+
+    def do_PATCH(self):  # pylint: disable=invalid-name
+        self._handle("PATCH")
+
+
+class TestGitHubClient(unittest.TestCase):
+    """Unit tests for github_client.py."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.pulls = []
+        self.server.requests = []
+        self.server.rate_limited = 0
+        self.server.remaining = 5000
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.sleeps = []
+        self.client = github_client.GitHubClient(
+            "token",
+            base_url=f"http://127.0.0.1:{self.server.server_port}",
+            sleep=self.sleeps.append,
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_create_or_update_pull(self):
+        """Unit test for create_or_update_pull: Open PRs are reused."""
+        pull = self.client.create_or_update_pull(_REPO, "AUTO", "main", "T1", "B1")
+        self.assertEqual(pull["number"], 1)
+
+        pull = self.client.create_or_update_pull(_REPO, "AUTO", "main", "T2", "B2")
+        self.assertEqual(pull["number"], 1)
+        self.assertEqual((pull["title"], pull["body"]), ("T2", "B2"))
+        self.assertEqual(len(self.server.pulls), 1)
+
+        pull = self.client.create_or_update_pull(_REPO, "AUTO2", "main", "T3", "B3")
+        self.assertEqual(pull["number"], 2)
+
+        # The repo is fetched once, and the connection is kept alive.
+        methods = [(m, p) for m, p, _ in self.server.requests]
+        self.assertEqual(methods.count(("GET", f"/repos/{_REPO}")), 1)
+        self.assertEqual(len({port for _, _, port in self.server.requests}), 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_threads(self):
+        """Unit test for session: One session per thread."""
+        sessions = []
+        threads = [
+            threading.Thread(target=lambda: sessions.append(self.client.session))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(self.client.session, self.client.session)
+        self.assertEqual(len({id(s) for s in sessions + [self.client.session]}), 3)
+
+    def test_rate_limit(self):
+        """Unit test for request: Rate limits are retried after a while."""
+        self.server.rate_limited = 2
+        self.assertEqual(self.client.get_repo(_REPO)["full_name"], _REPO)
+        self.assertEqual(self.sleeps, [2.0, 2.0])
+        self.assertEqual(self.client.remaining, 5000)
+
+        self.server.rate_limited = 10
+        with self.assertRaises(github_client.GitHubError) as context:
+            self.client.request("GET", "/rate_limit")
+        self.assertEqual(context.exception.status, 403)
+        self.assertEqual(len(self.sleeps), 2 + self.client.max_retries)
+
+        # Without retries: Failed at once, with the status of the response.
+        self.server.rate_limited = 1
+        self.client.max_retries, sleeps = 0, len(self.sleeps)
+        with self.assertRaises(github_client.GitHubError) as context:
+            self.client.get_repo("user/unknown")
+        self.assertEqual(context.exception.status, 403)
+        self.assertEqual(len(self.sleeps), sleeps)
+
+    def test_quota(self):
+        """Unit test for request: No requests are sent without quota."""
+        self.server.remaining = 0
+        self.client.get_repo(_REPO)
+        self.assertEqual(self.sleeps, [])
+
+        self.server.remaining = 4999
+        self.client.find_pull(_REPO, "AUTO")
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertGreater(self.sleeps[0], 50)
+
+    def test_not_found(self):
+        """Unit test for request: Errors are raised."""
+        with self.assertRaises(github_client.GitHubError) as context:
+            self.client.get_repo("user/unknown")
+        self.assertEqual(context.exception.status, 404)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
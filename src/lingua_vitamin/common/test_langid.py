@@ -0,0 +1,67 @@
+"""Unit tests for langid.py."""
+
+import logging
+import os
+import unittest
+
+import pandas as pd
+from parameterized import parameterized
+
+from lingua_vitamin.common import langid
+from lingua_vitamin.common import utils
+
+_PWD = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLangid(unittest.TestCase):
+    """Unit tests for langid.py."""
+
+    @parameterized.expand(
+        (
+            ("Biden says he will not seek a third term", "en"),
+            ("Why the Fed is in no hurry to cut rates", "en"),
+            ("Wie die Bahn pünktlicher werden soll", "de"),
+            ("Bundestag beschließt neues Heizungsgesetz", "de"),
+            ("El Gobierno aprueba la reforma de las pensiones", "es"),
+            ("Le gouvernement présente son budget pour l'année prochaine", "fr"),
+            ("Il governo approva la legge di bilancio per il prossimo anno", "it"),
+            ("Het kabinet wil meer geld voor de zorg en het onderwijs", "nl"),
+            ("梅兹星期四在白宫见特朗普", "zh"),
+            ("東京で新しい展示会が開かれました", "ja"),
+            ("Правительство приняло новый бюджет", "ru"),
+            # Unclear
+            ("Merz", None),
+            ("Apple M4", None),
+            ("", None),
+        )
+    )
+    def test_detect(self, text, expected):
+        """Unit test for detect."""
+        self.assertEqual(langid.LanguageIdentifier().detect(text), expected)
+
+    def test_detect_batch(self):
+        """Unit test for detect_batch: Parallel texts are never mistaken."""
+        df = pd.read_csv(os.path.join(_PWD, "testdata/news-en.csv"), index_col=0)
+        lang_id = langid.LanguageIdentifier()
+        for column in df.columns:
+            lang = column.split("-")[1]
+            self.assertEqual(lang_id.detect_batch(df[column]), [lang] * len(df))
+
+    def test_route(self):
+        """Unit test for route: Feed languages by default, unsupported ones dropped."""
+        lang_id = langid.LanguageIdentifier(langs=("de", "en", "zh"))
+        texts = (
+            "Merz",
+            "Biden says he will not seek a third term",
+            "Правительство приняло новый бюджет",
+        )
+        self.assertEqual(lang_id.route(texts, "de"), ["de", "en", None])
+        self.assertEqual(lang_id.route(texts, "en", langs=("en",)), ["en", "en", None])
+        self.assertEqual(
+            langid.LanguageIdentifier().route(texts, "de"), ["de", "en", "ru"]
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
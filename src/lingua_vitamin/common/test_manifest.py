@@ -0,0 +1,70 @@
+"""Unit tests for manifest.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+
+from lingua_vitamin.common import manifest
+from lingua_vitamin.common import utils
+
+_ARTICLES = [
+    {"title": "Merz in Berlin", "content": "Der Kanzler  reist."},
+    {"title": "Wetter", "content": "Es regnet.\n"},
+]
+
+
+class TestManifest(unittest.TestCase):
+    """Unit tests for manifest.py."""
+
+    @parameterized.expand(
+        (
+            (_ARTICLES[::-1], {}, True),
+            (
+                [{"title": " Merz in Berlin", "content": "Der Kanzler reist."}]
+                + _ARTICLES[1:],
+                {},
+                True,
+            ),
+            (_ARTICLES[:1], {}, False),
+            (_ARTICLES, {"target_langs": ["en"]}, False),
+        )
+    )
+    def test_fingerprint(self, articles, config, expected):
+        """Unit test for fingerprint."""
+        self.assertEqual(
+            manifest.fingerprint(_ARTICLES) == manifest.fingerprint(articles, **config),
+            expected,
+        )
+
+    def test_manifest(self):
+        """Unit test for Manifest."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, ".state", "manifest.json")
+            files = [os.path.join(temp_dir, name) for name in ("a.md", "b.csv")]
+            for file in files:
+                with open(file, "w", encoding="utf-8") as f:
+                    f.write(file)
+
+            job_manifest = manifest.Manifest(path, root=temp_dir)
+            digest = manifest.fingerprint(_ARTICLES)
+            self.assertFalse(job_manifest.is_unchanged("news-de", digest))
+            self.assertEqual(job_manifest.changed(files), files)
+
+            job_manifest.update("news-de", digest, files)
+            self.assertEqual(job_manifest.save(), path)
+
+            job_manifest = manifest.Manifest(path, root=temp_dir)
+            self.assertTrue(job_manifest.is_unchanged("news-de", digest))
+            self.assertEqual(job_manifest.changed(files), [])
+            self.assertEqual(sorted(job_manifest.files), ["a.md", "b.csv"])
+
+            with open(files[1], "a", encoding="utf-8") as f:
+                f.write("More")
+            self.assertEqual(job_manifest.changed(files + [path]), files[1:])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
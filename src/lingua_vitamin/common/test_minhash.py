@@ -0,0 +1,66 @@
+"""Unit tests for minhash.py."""
+
+import logging
+import unittest
+from parameterized import parameterized
+
+from lingua_vitamin.common import minhash
+from lingua_vitamin.common import utils
+
+
+class TestMinHash(unittest.TestCase):
+    """Unit tests for minhash.py."""
+
+    @parameterized.expand(
+        (
+            ("Hello, World!", "hello world"),
+            ("  A\tb\n_c ", "a b c"),
+        )
+    )
+    def test_normalize(self, text, expected):
+        """Unit test for normalize."""
+        self.assertEqual(minhash.normalize(text), expected)
+
+    def test_shingles(self):
+        """Unit test for shingles."""
+        self.assertEqual(minhash.shingles("ab", size=4), {"ab"})
+        self.assertEqual(minhash.shingles("", size=4), set())
+        self.assertEqual(minhash.shingles("Abcde", size=4), {"abcd", "bcde"})
+
+    @parameterized.expand(
+        (
+            (
+                "Stocks and dollar slump as Trump relaunches trade war",
+                "Stocks and dollar slump as Trump relaunches the trade war",
+                True,
+            ),
+            (
+                "Stocks and dollar slump as Trump relaunches trade war",
+                "Nike raises prices and returns to Amazon",
+                False,
+            ),
+        )
+    )
+    def test_lsh_index(self, text1, text2, is_duplicate):
+        """Unit test for LSHIndex."""
+        hasher = minhash.MinHash(num_perm=64)
+        index = minhash.LSHIndex(num_perm=64, threshold=0.7)
+        index.add("x", hasher.signature(minhash.shingles(text1)))
+
+        matches = index.query(hasher.signature(minhash.shingles(text2)))
+        self.assertEqual(bool(matches), is_duplicate)
+        if is_duplicate:
+            self.assertEqual(matches[0][0], "x")
+            self.assertGreaterEqual(matches[0][1], 0.7)
+
+    def test_signature(self):
+        """Unit test for signature: Deterministic, and similarity of itself."""
+        sig = minhash.MinHash(num_perm=16).signature({"abc", "def"})
+        self.assertEqual(sig, minhash.MinHash(num_perm=16).signature({"def", "abc"}))
+        self.assertEqual(len(sig), 16)
+        self.assertEqual(minhash.similarity(sig, sig), 1.0)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,185 @@
+"""Unit tests for notify.py, against a local SMTP stub."""
+
+import email
+import gzip
+import logging
+import os
+import socketserver
+import tempfile
+import threading
+import unittest
+
+from lingua_vitamin.common import notify
+from lingua_vitamin.common import utils
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server session, recording messages."""
+
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode("utf-8"))
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self._reply("220 localhost SMTP stub")
+
+        mail = None
+        while True:
+            line = self.rfile.readline().decode("utf-8")
+            if not line:
+                return
+            command = line.strip().split(" ", 1)[0].upper()
+
+            if command in ("EHLO", "HELO"):
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                server.logins += 1
+                self._reply("235 Authentication successful")
+            elif command == "MAIL":
+                mail = {"rcpt": [], "data": []}
+                self._reply("250 OK")
+            elif command == "RCPT":
+                mail["rcpt"].append(line.strip().split(":", 1)[1])
+                self._reply("250 OK")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                for data in iter(self.rfile.readline, b""):
+                    if data == b".\r\n":
+                        break
+                    mail["data"].append(data)
+                server.messages.append(
+                    (mail["rcpt"], email.message_from_bytes(b"".join(mail["data"])))
+                )
+                self._reply("250 OK")
+                if server.drop:
+                    return
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+
+class TestNotify(unittest.TestCase):
+    """Unit tests for notify.py."""
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.logins = 0
+        self.server.messages = []
+        self.server.drop = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.notifier = notify.Notifier(
+            "127.0.0.1",
+            self.server.server_address[1],
+            smtp_user="user",
+            smtp_password="password",
+            starttls=False,
+            max_inline=100,
+            preview=20,
+        )
+
+    def tearDown(self):
+        self.notifier.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _write(self, temp_dir, name, text):
+        path = os.path.join(temp_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_send(self):
+        """Unit test for send: One session, small bodies inlined."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = self._write(temp_dir, "small.md", "# Small")
+            for i in range(3):
+                self.notifier.send(
+                    f"Subject {i}", "Body", "a@x.com", ["b@x.com"], body_file=path
+                )
+
+        self.assertEqual((self.server.connections, self.server.logins), (1, 1))
+        self.assertEqual(len(self.server.messages), 3)
+
+        rcpt, msg = self.server.messages[0]
+        self.assertEqual(rcpt, ["<b@x.com>"])
+        self.assertEqual(msg["Subject"], "Subject 0")
+        (part,) = msg.get_payload()
+        self.assertEqual(part.get_payload(decode=True).decode(), "Body\n\n# Small")
+
+    def test_send_large(self):
+        """Unit test for send: Large bodies are truncated and attached."""
+        text = "\n".join(f"Line {i:03d}" for i in range(100))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = self._write(temp_dir, "large.md", text)
+            self.notifier.send(
+                "Large",
+                "Body",
+                "a@x.com",
+                ["b@x.com"],
+                body_file=path,
+                link="https://github.com/user/repo/pull/1",
+            )
+
+        _, msg = self.server.messages[0]
+        body, attachment = msg.get_payload()
+        body = body.get_payload(decode=True).decode()
+        self.assertIn("Line 000\nLine 001", body)
+        self.assertNotIn("Line 002", body)
+        self.assertIn("https://github.com/user/repo/pull/1", body)
+
+        self.assertEqual(attachment.get_filename(), "large.md.gz")
+        self.assertEqual(
+            gzip.decompress(attachment.get_payload(decode=True)).decode(), text
+        )
+
+    def test_reconnect(self):
+        """Unit test for send: Dropped sessions are reconnected."""
+        self.server.drop = True
+        self.notifier.send("First", "Body", "a@x.com", ["b@x.com"])
+        self.server.drop = False
+        self.notifier.send("Second", "Body", "a@x.com", ["b@x.com"])
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(len(self.server.messages), 2)
+
+    def test_flush(self):
+        """Unit test for add and flush: One digest email."""
+        self.assertFalse(self.notifier.flush("Digest", "a@x.com", ["b@x.com"]))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [
+                self._write(temp_dir, "a.md", "# A"),
+                self._write(temp_dir, "b.md", "# B" * 100),
+            ]
+            self.notifier.add("news-de", "Pushed", [paths[0]], link="https://pr/1")
+            self.notifier.add("news-en", "Pushed", [paths[1]])
+            self.assertTrue(self.notifier.flush("Digest", "a@x.com", ["b@x.com"]))
+
+        self.assertEqual(len(self.server.messages), 1)
+        _, msg = self.server.messages[0]
+        body, small, large = msg.get_payload()
+        self.assertEqual(
+            body.get_payload(decode=True).decode(),
+            "## news-de\n\nPushed\n\nhttps://pr/1\n\n## news-en\n\nPushed",
+        )
+        self.assertEqual(small.get_filename(), "a.md")
+        self.assertEqual(large.get_filename(), "b.md.gz")
+
+    def test_send_email(self):
+        """Unit test for utils.send_email: Failures are logged only."""
+        self.assertFalse(
+            utils.send_email(
+                "Subject", "Body", "a@x.com", ["b@x.com"], None, 0, None, None
+            )
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Unit tests for profiling.py."""
+
+import logging
+import os
+import tempfile
+import time
+import types
+import unittest
+
+import torch
+
+from lingua_vitamin.common import profiling
+from lingua_vitamin.common import utils
+
+
+def _busy_loop(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        sum(range(1000))
+
+
+class TestProfiling(unittest.TestCase):
+    """Unit tests for profiling.py."""
+
+    def test_off(self):
+        """Unit test for stage and generation: Shared null contexts when off."""
+        self.assertIsNone(profiling.PROFILER)
+        self.assertIs(profiling.stage("fetch"), profiling.stage("render"))
+        self.assertIs(profiling.generation("opus-mt"), profiling.stage("fetch"))
+
+    def test_label(self):
+        """Unit test for _label: Plain names of code without qualified names."""
+        code = types.SimpleNamespace(
+            co_name="run", co_filename="/src/pipe.py", co_firstlineno=12
+        )
+        self.assertEqual(profiling._label(code), "run (pipe.py:12)")
+
+    def test_profile(self):
+        """Unit test for profile: Folded stacks, torch ops and allocations."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_dir = profiling.get_dir(temp_dir, "news-de")
+            with profiling.profile(output_dir, interval=0.001) as profiler:
+                with profiling.stage("render"):
+                    blocks = [bytearray(2**20) for _ in range(4)]
+                    _busy_loop(0.2)
+                with profiling.stage("translate"), profiling.generation("opus-mt"):
+                    torch.mm(torch.ones(64, 64), torch.ones(64, 64))
+            self.assertIsNone(profiling.PROFILER)
+            self.assertEqual(len(blocks), 4)
+
+            self.assertEqual(
+                sorted(os.listdir(output_dir)),
+                [profiling.CPU_FILE, profiling.MEMORY_FILE, profiling.TORCH_FILE],
+            )
+            self.assertTrue(output_dir.startswith(temp_dir))
+
+            # Flamegraph format: `frame;frame;... count`, from the thread down.
+            lines = utils.load_file(os.path.join(output_dir, profiling.CPU_FILE))
+            busy = [line for line in lines.splitlines() if "_busy_loop" in line]
+            self.assertTrue(busy)
+            self.assertTrue(busy[0].startswith("MainThread;"))
+            self.assertTrue(busy[0].rsplit(" ", 1)[1].isdigit())
+
+            torch_ops = utils.load_file(os.path.join(output_dir, profiling.TORCH_FILE))
+            self.assertIn("opus-mt | 1 |", torch_ops)
+            self.assertIn("aten::mm", torch_ops)
+
+            memory = utils.load_file(os.path.join(output_dir, profiling.MEMORY_FILE))
+            self.assertIn("# render:", memory)
+            self.assertIn("# translate:", memory)
+            self.assertGreaterEqual(profiler.stages[0]["peak_mb"], 4)
+            self.assertIn("test_profiling.py", memory)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,122 @@
+"""Unit tests for stages.py."""
+
+import logging
+import os
+import tempfile
+import time
+import unittest
+
+from lingua_vitamin.common import stages
+from lingua_vitamin.common import utils
+
+
+def _upper(texts):
+    return [text.upper() for text in texts]
+
+
+def _lower(texts):
+    return [text.lower() for text in texts]
+
+
+class TestStages(unittest.TestCase):
+    """Unit tests for stages.py."""
+
+    def test_code_version(self):
+        """Unit test for code_version: Changes with the source code."""
+        self.assertEqual(stages.code_version(_upper), stages.code_version(_upper))
+        self.assertNotEqual(stages.code_version(_upper), stages.code_version(_lower))
+        # Values without source code, e.g. templates.
+        self.assertNotEqual(stages.code_version("a"), stages.code_version("b"))
+
+    def test_key(self):
+        """Unit test for key: Inputs in order."""
+        cache = stages.StageCache("", enabled=False)
+        self.assertEqual(cache.key("vocab", ["a", "b"]), cache.key("vocab", ["a", "b"]))
+        self.assertNotEqual(
+            cache.key("vocab", ["a", "b"]), cache.key("vocab", ["b", "a"])
+        )
+        self.assertNotEqual(cache.key("md", ["ab"]), cache.key("md", ["ba"]))
+
+    def test_run(self):
+        """Unit test for run: Keyed by inputs, code and params."""
+        calls = []
+
+        def _run(func, texts, **params):
+            return cache.run(
+                "upper",
+                lambda: calls.append(texts) or func(texts),
+                texts,
+                code=stages.code_version(func),
+                **params,
+            )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = stages.StageCache(temp_dir)
+            self.assertEqual(_run(_upper, ["a", "b"]), ["A", "B"])
+            self.assertEqual(_run(_upper, ["a", "b"]), ["A", "B"])
+            self.assertEqual(calls, [["a", "b"]])
+            self.assertEqual(cache.hits, ["upper"])
+
+            self.assertEqual(_run(_upper, ["a", "c"]), ["A", "C"])
+            self.assertEqual(_run(_lower, ["a", "b"]), ["a", "b"])
+            self.assertEqual(_run(_upper, ["a", "b"], target="zh"), ["A", "B"])
+            self.assertEqual(len(calls), 4)
+
+            # Nothing is kept without outputs.
+            self.assertIsNone(cache.run("none", lambda: None, []))
+            self.assertEqual(cache.misses.count("none"), 1)
+            self.assertIsNone(cache.run("none", lambda: None, []))
+            self.assertEqual(cache.misses.count("none"), 2)
+
+            # Unused outputs are pruned.
+            self.assertEqual(cache.prune(1), 0)
+            past = time.time() - 2 * 86400
+            for root, _, files in os.walk(temp_dir):
+                for file in files:
+                    os.utime(os.path.join(root, file), (past, past))
+            self.assertEqual(cache.prune(1), 4)
+
+            cache = stages.StageCache(temp_dir, enabled=False)
+            self.assertEqual(_run(_upper, ["a", "b"]), ["A", "B"])
+            self.assertEqual(len(calls), 5)
+            self.assertEqual([files for _, _, files in os.walk(temp_dir) if files], [])
+
+    def test_run_files(self):
+        """Unit test for run_files: Skipped while outputs are up to date."""
+        calls = []
+
+        def _write(texts, complete=True):
+            calls.append(texts)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(texts))
+            return complete
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = stages.StageCache(os.path.join(temp_dir, "stages"))
+            path = os.path.join(temp_dir, "out.md")
+
+            self.assertTrue(cache.run_files("md", lambda: _write(["a"]), ["a"], [path]))
+            self.assertFalse(
+                cache.run_files("md", lambda: _write(["a"]), ["a"], [path])
+            )
+            self.assertEqual(len(calls), 1)
+
+            # Changed inputs, or outputs modified elsewhere.
+            self.assertTrue(cache.run_files("md", lambda: _write(["b"]), ["b"], [path]))
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("!")
+            self.assertTrue(cache.run_files("md", lambda: _write(["b"]), ["b"], [path]))
+            self.assertEqual(len(calls), 3)
+
+            # Incomplete runs are not stamped.
+            def _incomplete():
+                return _write(["c"], complete=False)
+
+            self.assertTrue(cache.run_files("md", _incomplete, ["c"], [path]))
+            self.assertTrue(cache.run_files("md", _incomplete, ["c"], [path]))
+            self.assertEqual(len(calls), 5)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
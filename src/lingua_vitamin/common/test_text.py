@@ -0,0 +1,62 @@
+"""Unit tests for text.py."""
+
+import logging
+import unittest
+from parameterized import parameterized
+
+from lingua_vitamin.common import text
+from lingua_vitamin.common import utils
+
+
+class TestText(unittest.TestCase):
+    """Unit tests for text.py."""
+
+    @parameterized.expand(
+        (
+            ("News kompakt: Merz spricht", ["News", "kompakt", "Merz", "spricht"]),
+            ("Zum 80. Mal (2025)!", ["Zum", "Mal"]),
+            ("a/b|c\\d", ["a", "b", "c", "d"]),
+            ("", []),
+        )
+    )
+    def test_split_words(self, value, expected):
+        """Unit test for split_words."""
+        self.assertEqual(text.split_words(value), expected)
+
+    @parameterized.expand(
+        (
+            ("  Merz\n spricht\t", "Merz spricht"),
+            ("", ""),
+            (None, ""),
+        )
+    )
+    def test_collapse_whitespace(self, value, expected):
+        """Unit test for collapse_whitespace."""
+        self.assertEqual(text.collapse_whitespace(value), expected)
+
+    @parameterized.expand(
+        (
+            ("Plain  text\n", "Plain text"),
+            ("a < b and c > d", "a < b and c > d"),
+            ("Tom &amp; Jerry", "Tom & Jerry"),
+            (
+                '<p>Der <a href="https://dw.com/a">Kanzler</a> reist.</p>'
+                '<p><img src="https://dw.com/a.jpg"/>Mehr</p>',
+                "Der Kanzler reist. Mehr",
+            ),
+            ("Zeile<br/>Zeile", "Zeile Zeile"),
+            (
+                '<p>Article URL: <a href="https://x.org/a">https://x.org/a</a></p> '
+                "<p>Points: 513</p>",
+                "Article URL: https://x.org/a Points: 513",
+            ),
+        )
+    )
+    def test_html_to_text(self, value, expected):
+        """Unit test for html_to_text."""
+        self.assertEqual(text.html_to_text(value), expected)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
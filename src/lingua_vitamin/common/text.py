@@ -0,0 +1,46 @@
+"""Text helpers shared by the pipeline and its indexes."""
+
+import importlib.util
+import re
+from typing import List
+
+from bs4 import BeautifulSoup
+
+# Characters not being part of a vocab word.
+_SEPARATORS = r'".,:?!_#@<>/|()[]=+*^%$~`0123456789\\'
+_TABLE = str.maketrans({s: " " for s in _SEPARATORS})
+
+# `lxml` is faster when installed.
+_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+_HTML = re.compile(r"<[a-zA-Z/!][^>]*>|&(#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);")
+_BLOCKS = ("p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def split_words(text: str) -> List[str]:
+    """Split a title into vocab words, without punctuations and digits."""
+    return text.translate(_TABLE).split()
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of whitespace into single spaces."""
+    return " ".join(text.split()) if text else ""
+
+
+def html_to_text(text: str) -> str:
+    """Strip HTML markup, e.g. of RSS summaries, into whitespace collapsed text.
+
+    Images and scripts are dropped, links keep their texts, and texts without
+    markup skip parsing.
+    """
+    if not text:
+        return ""
+    if not _HTML.search(text):
+        return collapse_whitespace(text)
+
+    soup = BeautifulSoup(text, _PARSER)
+    for tag in soup(("img", "script", "style", "figure", "iframe")):
+        tag.decompose()
+    for tag in soup(_BLOCKS):
+        tag.insert_before(" ")
+        tag.insert_after(" ")
+    return collapse_whitespace(soup.get_text())
@@ -2,15 +2,40 @@
 
 import logging
 import os
-import smtplib
 
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from github import Github
+from lingua_vitamin.common import github_client
+from lingua_vitamin.common import notify
 
 
 LOGGING_FORMAT = "%(asctime)s [%(filename)s:%(lineno)d] %(levelname)s - %(message)s"
 
+# Pipeline state kept within the output repo, e.g. indexes across runs.
+STATE_DIR = ".lingua_vitamin"
+
+
+def get_state_path(output_root: str, *names: str) -> str:
+    """Get the path of a state file under the output root."""
+    return os.path.join(output_root, STATE_DIR, *names)
+
+
+def get_memory_usage() -> dict:
+    """Get resident and shared (e.g. memory-mapped files) memory of the process in MB.
+
+    Return an empty dict where `/proc` is not available.
+    """
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as f:
+            size, resident, shared = (int(x) for x in f.read().split()[:3])
+    except OSError:
+        return {}
+
+    scale = os.sysconf("SC_PAGE_SIZE") / 2**20
+    return {
+        "vms_mb": size * scale,
+        "rss_mb": resident * scale,
+        "shared_mb": shared * scale,
+    }
+
 
 def load_file(
     filename: str, mode: str = "r", log: bool = True, fix: str = "ignore"
@@ -56,21 +81,22 @@ def create_github_pr(
     pr_body: str,
     github_token: str,
 ):
-    """Create a pull request on GitHub."""
+    """Create a pull request on GitHub, or update the open one of the branch."""
     logging.info(
         "Create a PR for (repo, branch, base) = (%s, %s, %s).",
         repo_name,
         branch,
         base_branch,
     )
-    repo = Github(github_token).get_repo(repo_name)
+    client = github_client.get_client(
+        github_token, os.getenv("GITHUB_API_URL", github_client.API_URL)
+    )
 
     try:
-        pr = repo.create_pull(
-            title=pr_title, body=pr_body, head=branch, base=base_branch
+        pr = client.create_or_update_pull(
+            repo_name, branch, base_branch, pr_title, pr_body
         )
-        logging.info("Created PR #%s: `%s`.", pr.number, pr.title)
-        return pr.html_url
+        return pr["html_url"]
     except Exception as error:
         logging.warning("Failed to create PR: <<<%s>>>", error)
         return None
@@ -86,25 +112,16 @@ def send_email(
     smtp_user: str,
     smtp_password: str,
     body_file: str = None,
+    link: str = None,
 ):
-    """Send an email with given subject and body."""
-    msg = MIMEMultipart()
-    msg["From"] = from_email
-    msg["To"] = ", ".join(to_emails)
-    msg["Subject"] = subject
-
-    if body_file and os.path.exists(body_file):
-        with open(body_file, "r", encoding="utf-8") as f:
-            body_content = f.read()
-        body += f"\n\n{body_content}"
-
-    msg.attach(MIMEText(body, "plain"))
+    """Send an email with given subject and body, over a shared SMTP session.
 
+    A large body file is truncated with a link, and attached compressed.
+    """
     try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_password)
-            server.sendmail(from_email, to_emails, msg.as_string())
+        notify.get_notifier(smtp_server, smtp_port, smtp_user, smtp_password).send(
+            subject, body, from_email, to_emails, body_file=body_file, link=link
+        )
         logging.info("Email sent successfully")
         return True
     except Exception as error:
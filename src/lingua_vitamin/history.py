@@ -0,0 +1,256 @@
+"""Inverted index over the output tree, for fast history queries.
+
+Words (lower cased) map to (date, csv file, row), and arXiv ids map to
+(date, subject, csv file, row), so that lookups take milliseconds instead of
+globbing and scanning every csv file. The index is a sqlite file, updated
+incrementally: only new or modified csv files are (re-)indexed. Files are told
+apart by their content hashes where their mtimes differ, so that the index is
+published along with the outputs and stays incremental in fresh clones.
+
+    python -m lingua_vitamin.history --output_root /tmp/LinguaVitaminArxiv build
+    python -m lingua_vitamin.history --output_root /tmp/LinguaVitaminArxiv paper 2505.23710
+    python -m lingua_vitamin.history --output_root /tmp/LinguaVitaminNews word Merz
+"""
+
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+
+import pandas as pd
+
+from lingua_vitamin.common import manifest
+from lingua_vitamin.common import text as text_utils
+from lingua_vitamin.common import utils
+
+INDEX_FILE = "history.sqlite"
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_ARXIV_ID = re.compile(r"arxiv\.org/abs/([^/]+?)(v\d+)?$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    date TEXT,
+    tag TEXT,
+    hash TEXT
+);
+CREATE TABLE IF NOT EXISTS words (
+    lemma TEXT NOT NULL,
+    word TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    row INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT NOT NULL,
+    version TEXT,
+    file_id INTEGER NOT NULL,
+    row INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS words_lemma ON words (lemma);
+CREATE INDEX IF NOT EXISTS words_file ON words (file_id);
+CREATE INDEX IF NOT EXISTS papers_id ON papers (paper_id);
+CREATE INDEX IF NOT EXISTS papers_file ON papers (file_id);
+"""
+
+
+def get_index_path(output_root: str) -> str:
+    """Get the default index path under the output root."""
+    return utils.get_state_path(output_root, INDEX_FILE)
+
+
+def _parse_filename(path: str):
+    """Get (date, tag) from e.g. `2025-06-01--news-de.csv`, `news--de--2025-05-30.csv`."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    match = _DATE.search(name)
+    if not match:
+        return None, name
+
+    tag = (name[: match.start()] + name[match.end() :]).strip("-")
+    return match.group(0), tag
+
+
+def _get_paper_id(url: str):
+    match = _ARXIV_ID.search(url or "")
+    if match:
+        return match.group(1), match.group(2)
+    return url, None
+
+
+class HistoryIndex:
+    """Inverted index of words and papers across the output tree."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        # Indexes built before content hashes.
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(files)")]
+        if "hash" not in columns:
+            self._conn.execute("ALTER TABLE files ADD COLUMN hash TEXT")
+
+    def close(self):
+        """Close the index."""
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _csv_files(self, output_root):
+        for root, dirs, files in os.walk(output_root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for file in files:
+                if file.endswith(".csv") and "-VOCAB" not in file:
+                    yield os.path.join(root, file)
+
+    def update(self, output_root: str) -> int:
+        """Index new or modified csv files, and drop removed ones."""
+        indexed = {
+            path: (file_id, mtime, size, file_hash)
+            for file_id, path, mtime, size, file_hash in self._conn.execute(
+                "SELECT id, path, mtime, size, hash FROM files"
+            )
+        }
+
+        output_root = output_root or "."
+        count = 0
+        seen = set()
+        for file in self._csv_files(output_root):
+            path = os.path.relpath(file, output_root)
+            seen.add(path)
+
+            stat = os.stat(file)
+            if path in indexed and indexed[path][1:3] == (stat.st_mtime, stat.st_size):
+                continue
+
+            # Touched, e.g. checked out again, but unchanged.
+            file_hash = manifest.hash_file(file)
+            if path in indexed and indexed[path][3] == file_hash:
+                self._conn.execute(
+                    "UPDATE files SET mtime = ?, size = ? WHERE id = ?",
+                    (stat.st_mtime, stat.st_size, indexed[path][0]),
+                )
+                continue
+
+            if path in indexed:
+                self._remove(indexed[path][0])
+            try:
+                self._add(file, path, stat, file_hash)
+                count += 1
+            except Exception as error:
+                logging.warning("Unable to index `%s`: <<<%s>>>", file, error)
+
+        for path in set(indexed) - seen:
+            self._remove(indexed[path][0])
+
+        self._conn.commit()
+        logging.info("Indexed %d csv files into `%s`.", count, self.path)
+        return count
+
+    def _remove(self, file_id: int):
+        for table in ("words", "papers"):
+            self._conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add(self, file: str, path: str, stat, file_hash: str):
+        date, tag = _parse_filename(path)
+        cursor = self._conn.execute(
+            "INSERT INTO files (path, mtime, size, date, tag, hash)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (path, stat.st_mtime, stat.st_size, date, tag, file_hash),
+        )
+        file_id = cursor.lastrowid
+
+        df = pd.read_csv(file, index_col=0)
+        if "url" in df.columns:
+            columns = ["title"]
+            self._conn.executemany(
+                "INSERT INTO papers (paper_id, version, file_id, row) VALUES (?, ?, ?, ?)",
+                (
+                    (*_get_paper_id(url), file_id, row)
+                    for row, url in enumerate(df["url"])
+                ),
+            )
+        else:
+            lang = tag.rsplit("-", 1)[-1]
+            columns = [
+                c for c in (f"title-{lang}", f"content-{lang}") if c in df.columns
+            ]
+
+        words = set()
+        for column in columns:
+            for row, value in enumerate(df[column]):
+                if isinstance(value, str):
+                    words.update((word, row) for word in text_utils.split_words(value))
+        self._conn.executemany(
+            "INSERT INTO words (lemma, word, file_id, row) VALUES (?, ?, ?, ?)",
+            ((word.lower(), word, file_id, row) for word, row in sorted(words)),
+        )
+
+    def lookup_word(self, word: str):
+        """Get (date, path, row, word) for a word, case insensitive."""
+        return self._conn.execute(
+            "SELECT f.date, f.path, w.row, w.word FROM words w"
+            " JOIN files f ON f.id = w.file_id"
+            " WHERE w.lemma = ? ORDER BY f.date, f.path, w.row",
+            (word.lower(),),
+        ).fetchall()
+
+    def lookup_paper(self, paper_id: str):
+        """Get (date, subject, path, row) for an arXiv id, with or without version."""
+        paper_id, version = _get_paper_id(f"arxiv.org/abs/{paper_id}")
+        query = (
+            "SELECT f.date, f.tag, f.path, p.row FROM papers p"
+            " JOIN files f ON f.id = p.file_id WHERE p.paper_id = ?"
+        )
+        params = [paper_id]
+        if version:
+            query += " AND p.version = ?"
+            params.append(version)
+
+        return self._conn.execute(query + " ORDER BY f.date, f.path", params).fetchall()
+
+
+def update_index(output_root: str, path: str = None) -> int:
+    """Update the history index of an output tree."""
+    with HistoryIndex(path or get_index_path(output_root)) as index:
+        return index.update(output_root)
+
+
+def main(argv=None):
+    """Main."""
+    parser = argparse.ArgumentParser(description="LinguaVitamin history index")
+    parser.add_argument("--output_root", type=str, default="", help="Output tree")
+    parser.add_argument(
+        "--index",
+        type=str,
+        default="",
+        help="Index file, under the output root if empty",
+    )
+    parser.add_argument("command", choices=("build", "word", "paper"))
+    parser.add_argument("keys", nargs="*", help="Words or arXiv ids to look up")
+    args = parser.parse_args(argv)
+
+    with HistoryIndex(args.index or get_index_path(args.output_root)) as index:
+        if args.command == "build":
+            index.update(args.output_root)
+            return
+
+        lookup = index.lookup_word if args.command == "word" else index.lookup_paper
+        for key in args.keys:
+            for result in lookup(key):
+                print("\t".join([key] + [str(value) for value in result]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    main(sys.argv[1:])
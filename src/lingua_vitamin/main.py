@@ -2,19 +2,41 @@
 
 import logging
 import os
+import sys
 
 import argparse
 from dotenv import load_dotenv
 
+from lingua_vitamin import batch
+from lingua_vitamin import history
 from lingua_vitamin import pipe
+from lingua_vitamin.common import deadline as time_budget
+from lingua_vitamin.common import profiling
 from lingua_vitamin.common import utils
+from lingua_vitamin.news import dedup as news_dedup
+from lingua_vitamin.translate import autotune
+from lingua_vitamin.translate import lexicon
+from lingua_vitamin.translate import memory as translation_memory
+from lingua_vitamin.translate import shard
+from lingua_vitamin.translate import translator
+from lingua_vitamin.translate import warmup
+from lingua_vitamin.vocab import rollup as vocab_rollup
 
 
 _SUFFIX_CSV = ".csv"
 _SUFFIX_MD = ".md"
 
+# Sub-commands, e.g. `linguavitamin index word Merz`.
+_COMMANDS = {
+    "index": history.main,
+    "lexicon": lexicon.main,
+    "rollup": vocab_rollup.main,
+    "worker": shard.main,
+    "warmup": warmup.main,
+}
 
-def parse_args():
+
+def parse_args(argv=None):
     """Parse args."""
     parser = argparse.ArgumentParser(
         description="LinguaVitamin Daily News fetch & translate"
@@ -70,6 +92,13 @@ def parse_args():
     parser.add_argument(
         "--base_branch", type=str, default="main", help="Base branch for PR"
     )
+    parser.add_argument(
+        "--git_backend",
+        type=str,
+        default="index",
+        choices=("index", "checkout"),
+        help="Push via a temporary git index, or by switching the checkout",
+    )
     parser.add_argument(
         "--github_token",
         type=str,
@@ -91,13 +120,164 @@ def parse_args():
         "--to_emails", required=False, default=os.getenv("TO_EMAILS", "").split(",")
     )
 
-    return parser.parse_args()
+    parser.add_argument(
+        "--dedup_threshold",
+        type=float,
+        default=news_dedup.DEFAULT_THRESHOLD,
+        help="Similarity to skip near-duplicate news, 0 to disable",
+    )
+    parser.add_argument(
+        "--dedup_days",
+        type=int,
+        default=news_dedup.DEFAULT_DAYS,
+        help="Skip news near duplicates of the ones published in the last days",
+    )
+    parser.add_argument(
+        "--vocab_max_words",
+        type=int,
+        default=0,
+        help="Spill vocab counts to disk beyond this number of words, 0 to disable",
+    )
+    parser.add_argument(
+        "--skip_unchanged",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Skip jobs with unchanged articles, and publish changed files only",
+    )
+    parser.add_argument(
+        "--mmap_weights",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Load model weights memory-mapped from safetensors files on CPU",
+    )
+    parser.add_argument(
+        "--weights_dtype",
+        type=str,
+        default="",
+        choices=("", "bfloat16"),
+        help="Memory-mapped weights converted into this dtype, see `warmup`",
+    )
+    parser.add_argument(
+        "--autotune",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help="Calibrate batch sizes and torch threads per model and workload, per host",
+    )
+    parser.add_argument(
+        "--memory_limit_mb",
+        type=float,
+        default=0,
+        help="Shrink batches above this RSS, 0 for 80%% of RAM with --autotune",
+    )
+    parser.add_argument(
+        "--stage_cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Skip pipeline stages with unchanged inputs, code and params",
+    )
+    parser.add_argument(
+        "--stage_cache_days",
+        type=int,
+        default=30,
+        help="Remove stage outputs unused for days, 0 to keep them",
+    )
+    parser.add_argument(
+        "--archive",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Update archive pages per month and subject with each post",
+    )
+    parser.add_argument(
+        "--langid",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Route fetched items by their detected languages, and skip unsupported ones",
+    )
+    parser.add_argument(
+        "--memory_min_score",
+        type=float,
+        default=0,
+        help="Reuse translations of near-repeat sentences above this score, 0 to disable",
+    )
+    parser.add_argument(
+        "--time_budget",
+        type=float,
+        default=0,
+        help="Seconds for a run: Translations beyond it get placeholders, 0 to disable",
+    )
+    parser.add_argument(
+        "--shard_dir",
+        type=str,
+        default="",
+        help="Shared directory to translate long text lists by shards, see `worker`",
+    )
+    parser.add_argument(
+        "--shard_size",
+        type=int,
+        default=shard.DEFAULT_SHARD_SIZE,
+        help="Texts per shard with --shard_dir",
+    )
+    parser.add_argument(
+        "--shard_lease",
+        type=float,
+        default=shard.DEFAULT_LEASE,
+        help="Seconds before shards of dead workers are retried",
+    )
+    parser.add_argument(
+        "--shard_timeout",
+        type=float,
+        default=shard.DEFAULT_TIMEOUT,
+        help="Seconds to wait for shards, before translating the rest locally",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write CPU flamegraph stacks, torch ops and allocations per stage",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=str,
+        default="",
+        help="Json job file to run many jobs in one process, see `batch.py`",
+    )
+    parser.add_argument(
+        "--batch_tag",
+        type=str,
+        default="batch",
+        help="Branch tag for batch runs: AUTO--YYYY-MM-DD--$TAG",
+    )
+
+    return parser.parse_args(argv)
 
 
 def main():
     """Main."""
+    if len(sys.argv) > 1 and sys.argv[1] in _COMMANDS:
+        _COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
     load_dotenv()
     args = parse_args()
+    translator.MMAP_WEIGHTS = args.mmap_weights
+    translator.WEIGHTS_DTYPE = args.weights_dtype or None
+    deadline = time_budget.Deadline(args.time_budget)
+    if args.autotune or args.memory_limit_mb:
+        autotune.TUNER = autotune.Tuner(
+            autotune.get_path(args.output_root),
+            memory_limit_mb=args.memory_limit_mb,
+            calibrate=args.autotune,
+        )
+
+    if args.shard_dir:
+        shard.COORDINATOR = shard.Coordinator(
+            shard.ShardQueue(args.shard_dir, lease=args.shard_lease),
+            shard_size=args.shard_size,
+            timeout=args.shard_timeout,
+        )
+
+    if args.memory_min_score > 0:
+        translation_memory.ROOT = args.output_root
+        translation_memory.MIN_SCORE = args.memory_min_score
 
     github_token = args.github_token or os.getenv("GITHUB_TOKEN")
     if not github_token:
@@ -105,49 +285,68 @@ def main():
             "GitHub token not provided via --github_token or GITHUB_TOKEN env"
         )
 
-    category = args.output_md.split("/")[1]
-    is_arxiv = bool(args.arxiv)
-    if is_arxiv:
-        tag = args.arxiv.replace(".", "__")
-        pipe_func = pipe.run_arxiv
-    else:
-        tag = args.source_lang
-        pipe_func = pipe.run_news
+    if not args.profile:
+        _run(args, github_token, deadline)
+        return
+    with profiling.profile(profiling.get_dir(args.output_root)):
+        _run(args, github_token, deadline)
+
+
+def _run(args, github_token, deadline):
+    """Run a job, or all jobs of a job file."""
+    if args.jobs:
+        batch.run_jobs(args, github_token)
+        return
+
+    category, tag = pipe.get_tag(args)
+    pipe_func = pipe.run_arxiv if args.arxiv else pipe.run_news
     date_str, branch_name, md_path, csv_path = pipe.get_filenames(
         args, tag=f"{category}-{tag}"
     )
 
-    files = pipe_func(args, md_path, csv_path, date_str)
+    cache = pipe.get_stage_cache(args)
+    if args.stage_cache_days > 0:
+        cache.prune(args.stage_cache_days)
+    with profiling.stage("fetch"):
+        items = pipe.fetch(args, cache=cache)
+    job_manifest = pipe.get_manifest(args.output_root)
+    digest = pipe.get_fingerprint(args, items)
+    job = f"{category}-{tag}"
+    if items and args.skip_unchanged and job_manifest.is_unchanged(job, digest):
+        logging.info("[%s] Articles are unchanged since the last run: Skipped.", job)
+        return
+
+    files = pipe_func(
+        args, md_path, csv_path, date_str, items or [], deadline, cache=cache
+    )
+    memory_paths = translation_memory.save_all()
     if files is None:
         logging.warning("Nothing to process: Early stop.")
         return
+    if args.time_budget:
+        logging.info("Time budget: %s.", deadline.summary())
+
+    if args.skip_unchanged:
+        changed = job_manifest.changed(files)
+        # Incomplete runs are redone, rather than skipped as unchanged.
+        job_manifest.update(job, None if deadline.num_skipped else digest, files)
+        if not changed:
+            job_manifest.save()
+            logging.info("[%s] Output files are unchanged: Skipped.", job)
+            return
+        files = changed + [job_manifest.save()]
+    files = list(files) + pipe.update_history(args.output_root) + memory_paths
 
     pr_title = email_subject = f"LinguaVitamin daily {category}: {branch_name}"
-    pr_url = None
-    if github_token and args.github_repo:
-        try:
-            pipe.create_branch_and_push(
-                args.output_root, branch_name, files, args.base_branch
-            )
-
-            pr_body = f"Auto-generated daily {category} for {date_str}."
-
-            pr_url = utils.create_github_pr(
-                args.github_repo,
-                branch_name,
-                args.base_branch,
-                pr_title,
-                pr_body,
-                github_token,
-            )
-        except Exception as error:
-            logging.warning("Unable to create a PR: <<<%s>>>", error)
-            pr_url = None
-
-        if pr_url:
-            print(f"Created PR: {pr_url}")
-        else:
-            print("Failed to create PR.")
+    with profiling.stage("publish"):
+        pr_url = pipe.publish(
+            args,
+            github_token,
+            branch_name,
+            files,
+            pr_title,
+            f"Auto-generated daily {category} for {date_str}.",
+        )
 
     email_body = f"Daily {category} has been pushed and PR created: {pr_url if pr_url else 'N/A'}"
     utils.send_email(
@@ -160,6 +359,7 @@ def main():
         args.smtp_user,
         args.smtp_password,
         body_file=md_path,
+        link=pr_url,
     )
 
 
@@ -0,0 +1,109 @@
+"""Near-duplicate detection for news, across feeds and recent days."""
+
+import datetime
+import json
+import logging
+import os
+
+from lingua_vitamin.common import minhash
+
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_DAYS = 7
+
+_NUM_PERM = 64
+
+
+class NearDuplicateIndex:
+    """Near-duplicate index over news title and summary.
+
+    Stories seen in the current run are matched against each other, and the
+    ones published in the last `days` days are loaded from (and saved into)
+    a json file when `path` is given.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        path: str = None,
+        days: int = DEFAULT_DAYS,
+        today: str = None,
+    ):
+        self.threshold = threshold
+        self.path = path
+        self.days = days
+        self.today = today or datetime.date.today().isoformat()
+
+        self._minhash = minhash.MinHash(num_perm=_NUM_PERM)
+        self._index = minhash.LSHIndex(num_perm=_NUM_PERM, threshold=threshold)
+        self._entries = []
+
+        if path:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+
+        start = (
+            datetime.date.fromisoformat(self.today) - datetime.timedelta(days=self.days)
+        ).isoformat()
+        for entry in entries:
+            # Reruns on the same day replace today's stories, so skip them.
+            if start <= entry["date"] < self.today:
+                self._add(entry)
+
+        logging.info(
+            "Loaded %d news from the last %d days: `%s`.",
+            len(self._index),
+            self.days,
+            self.path,
+        )
+
+    def _add(self, entry):
+        self._index.add(len(self._entries), entry["signature"])
+        self._entries.append(entry)
+
+    def signature(self, title: str, content: str = ""):
+        """Get the MinHash signature of a story."""
+        return self._minhash.signature(minhash.shingles(f"{title} {content}"))
+
+    def find(self, title: str, content: str = ""):
+        """Get the title of a near-duplicate story if any."""
+        matches = self._index.query(self.signature(title, content))
+        if not matches:
+            return None
+
+        key, score = matches[0]
+        entry = self._entries[key]
+        logging.info(
+            "Near duplicate (%.2f) from %s: `%s` ~ `%s`.",
+            score,
+            entry["date"],
+            title,
+            entry["title"],
+        )
+        return entry["title"]
+
+    def add(self, title: str, content: str = ""):
+        """Add a story published today."""
+        self._add(
+            {
+                "date": self.today,
+                "title": title,
+                "signature": list(self.signature(title, content)),
+            }
+        )
+
+    def save(self):
+        """Save stories from the last days into its json file."""
+        if not self.path:
+            return None
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+
+        return self.path
@@ -1,12 +1,16 @@
 """To get news from RSS."""
 
 import logging
-from typing import List, Dict
 
 import feedparser
 
+from lingua_vitamin.common import articles
+from lingua_vitamin.common import text as text_utils
+
 KEY_TITLE = "title"
 KEY_CONTENT = "content"
+# Detected source language of an item, given a language identifier.
+KEY_LANG = "lang"
 
 
 MAX_SEQ_LENS = {
@@ -57,14 +61,33 @@ def _get_len(content):
     return len(content.strip().split())
 
 
-def fetch_top_news_rss(lang: str = "en", top_n: int = 5) -> List[Dict[str, str]]:
+def _get_title(entry) -> str:
+    return text_utils.html_to_text(entry.title if "title" in entry else "")
+
+
+def _get_content(entry) -> str:
+    # Use summary/detail if available, fallback to empty string
+    return text_utils.html_to_text(
+        entry.get("summary")
+        or entry.get("description")
+        or (entry.get("content")[0].value if entry.get("content") else "")
+    )
+
+
+def fetch_top_news_rss(
+    lang: str = "en", top_n: int = 5, dedup=None, lang_id=None
+) -> articles.ArticleBatch:
     """
     Fetch top n news items from RSS feed of the given language.
     Each item includes title and content/summary.
 
     :param lang: Language code
     :param n: Number of news items to fetch
-    :return: List of dicts with keys 'title' and 'content'
+    :param dedup: Optional `dedup.NearDuplicateIndex` to skip near duplicates,
+        where feeds come in priority order and the first copy is kept
+    :param lang_id: Optional `langid.LanguageIdentifier` to detect the language
+        of each item, where items in languages beyond its `langs` are skipped
+    :return: Batch of columns 'title' and 'content', and 'lang' given `lang_id`
     """
     urls = RSS_FEEDS.get(lang)
     if isinstance(urls, str):
@@ -76,7 +99,7 @@ def fetch_top_news_rss(lang: str = "en", top_n: int = 5) -> List[Dict[str, str]]
     max_len_limit = MAX_SEQ_LENS.get(lang, 0)
     max_len = 0
 
-    news_items = []
+    news_items = articles.ArticleBatch()
     titles = set()
     for index, url in enumerate(urls):
         max_count = top_n * 2
@@ -97,19 +120,19 @@ def fetch_top_news_rss(lang: str = "en", top_n: int = 5) -> List[Dict[str, str]]
         feed = feedparser.parse(url)
         entries = feed.entries[:max_count]
 
-        for entry in entries:
-            title = entry.title if "title" in entry else ""
+        items = [(_get_title(entry), _get_content(entry)) for entry in entries]
+        langs = [lang] * len(items)
+        if lang_id is not None:
+            langs = lang_id.route((f"{t}\n{c}" for t, c in items), lang)
 
+        for (title, content), item_lang in zip(items, langs):
             if title in titles:
                 logging.warning("Duplicate title: `%s`.", title)
                 continue
 
-            # Use summary/detail if available, fallback to empty string
-            content = (
-                entry.get("summary")
-                or entry.get("description")
-                or (entry.get("content")[0].value if entry.get("content") else "")
-            )
+            if item_lang is None:
+                logging.warning("News in an unsupported language: `%s`.", title)
+                continue
 
             if max_len_limit and (
                 _get_len(content) > max_len_limit or _get_len(title) > max_len_limit
@@ -123,10 +146,18 @@ def fetch_top_news_rss(lang: str = "en", top_n: int = 5) -> List[Dict[str, str]]
                 )
                 continue
 
+            if dedup is not None:
+                if dedup.find(title, content):
+                    continue
+                dedup.add(title, content)
+
             max_len = max(max_len, _get_len(title), _get_len(content))
 
             titles.add(title)
-            news_items.append({KEY_TITLE: title, KEY_CONTENT: content})
+            item = {KEY_TITLE: title, KEY_CONTENT: content}
+            if lang_id is not None:
+                item[KEY_LANG] = item_lang
+            news_items.append(item)
 
             if len(news_items) >= top_n:
                 break
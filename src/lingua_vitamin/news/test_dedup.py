@@ -0,0 +1,49 @@
+"""Unit tests for dedup.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+
+from lingua_vitamin.common import utils
+from lingua_vitamin.news import dedup
+
+_TITLE = "Merz trifft am Donnerstag Trump im Weißen Haus"
+_CONTENT = "Es hat etwas gedauert, aber jetzt hat der Kanzler endlich einen Termin."
+
+
+class TestDedup(unittest.TestCase):
+    """Unit tests for dedup.py."""
+
+    def test_find(self):
+        """Unit test for find: Within a run."""
+        index = dedup.NearDuplicateIndex(threshold=0.7)
+        self.assertIsNone(index.find(_TITLE, _CONTENT))
+        index.add(_TITLE, _CONTENT)
+
+        self.assertEqual(index.find(f"{_TITLE}!", _CONTENT), _TITLE)
+        self.assertIsNone(index.find("Die Baustellen des Friedrich Merz", ""))
+
+    def test_save(self):
+        """Unit test for save: Stories from previous days only."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "state", "dedup.json")
+
+            index = dedup.NearDuplicateIndex(path=path, today="2025-06-01")
+            index.add(_TITLE, _CONTENT)
+            self.assertEqual(index.save(), path)
+
+            # Same day reruns
+            index = dedup.NearDuplicateIndex(path=path, today="2025-06-01")
+            self.assertIsNone(index.find(_TITLE, _CONTENT))
+
+            index = dedup.NearDuplicateIndex(path=path, days=7, today="2025-06-05")
+            self.assertEqual(index.find(_TITLE, _CONTENT), _TITLE)
+
+            index = dedup.NearDuplicateIndex(path=path, days=3, today="2025-06-05")
+            self.assertIsNone(index.find(_TITLE, _CONTENT))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -2,11 +2,15 @@
 
 import logging
 import unittest
+from unittest import mock
+
+import feedparser
 from parameterized import parameterized
 
+from lingua_vitamin.common import articles
+from lingua_vitamin.common import langid
 from lingua_vitamin.news import fetcher
 
-
 _FACTOR = 1
 
 LOGGING_FORMAT = "%(asctime)s [%(filename)s:%(lineno)d] %(levelname)s - %(message)s"
@@ -26,7 +30,7 @@ class TestFetcher(unittest.TestCase):
     def test_fetch_top_news_rss(self, lang, top_n):
         """Unit test for fetch_top_news_rss."""
         news_items = fetcher.fetch_top_news_rss(lang=lang, top_n=top_n)
-        self.assertIsInstance(news_items, list)
+        self.assertIsInstance(news_items, articles.ArticleBatch)
         self.assertLessEqual(len(news_items), top_n)
         logging.info("News in `%s` (# = %d --> %d):", lang, top_n, len(news_items))
         logging.info("%s\n\n", news_items)
@@ -39,6 +43,31 @@ class TestFetcher(unittest.TestCase):
             self.assertIn("content", item)
             self.assertIsInstance(item["content"], str)
 
+    def test_fetch_top_news_rss_lang_id(self):
+        """Unit test for fetch_top_news_rss: Items by their detected languages."""
+        entries = [
+            ("Wie die Bahn pünktlicher werden soll", "Die Züge sind oft zu spät."),
+            ("Biden says he will not seek a third term", "He said it on Sunday."),
+            ("Правительство приняло новый бюджет", ""),
+            ("Merz", ""),
+        ]
+        feed = feedparser.FeedParserDict(
+            entries=[
+                feedparser.FeedParserDict(title=title, summary=summary)
+                for title, summary in entries
+            ]
+        )
+        with mock.patch.object(fetcher.feedparser, "parse", return_value=feed):
+            news_items = fetcher.fetch_top_news_rss(
+                lang="de",
+                top_n=3,
+                lang_id=langid.LanguageIdentifier(langs=("de", "en")),
+            )
+            self.assertNotIn(fetcher.KEY_LANG, fetcher.fetch_top_news_rss("de", 3))
+
+        self.assertEqual(news_items[fetcher.KEY_LANG], ["de", "en", "de"])
+        self.assertEqual(news_items["title"][2], "Merz")
+
     def test__invalid_fetch_top_news_rss(self):
         """Unit test for fetch_top_news_rss."""
         with self.assertRaises(ValueError):
@@ -1,19 +1,42 @@
 """Util functions for the pipeline."""
 
-from collections import defaultdict
+import argparse
+import contextlib
+import functools
 import glob
+import itertools
 import logging
 import os
 import sys
 import subprocess
+import time
 
 import datetime
 import pandas as pd
 
+from lingua_vitamin import archive
+from lingua_vitamin import history
 from lingua_vitamin.arxiv import fetcher as arxiv_fetcher
+from lingua_vitamin.common import articles as article_batch
+from lingua_vitamin.common import deadline as time_budget
+from lingua_vitamin.common import git
+from lingua_vitamin.common import langid
+from lingua_vitamin.common import manifest
+from lingua_vitamin.common import profiling
+from lingua_vitamin.common import stages
+from lingua_vitamin.common import text as text_utils
 from lingua_vitamin.common import utils
+from lingua_vitamin.news import dedup as news_dedup
 from lingua_vitamin.news import fetcher as news_fetcher
-from lingua_vitamin.translate.translator import Translator
+from lingua_vitamin.translate import autotune
+from lingua_vitamin.translate import lexicon
+from lingua_vitamin.translate import memory as translation_memory
+from lingua_vitamin.translate import protect
+from lingua_vitamin.translate import shard
+from lingua_vitamin.translate import translator as translate_model
+from lingua_vitamin.translate.translator import get_translator
+from lingua_vitamin.vocab import partial as vocab_partial
+from lingua_vitamin.vocab.counter import VocabCounter
 
 
 _BATCH_MODE = -1
@@ -30,7 +53,19 @@ LANGUAGE_MAP = {
 
 MAX_ARXIV_ABSTRACTS = 300
 
+# News batch sizes per target: All titles of a run, and contents by length.
+NEWS_TITLE_BATCH = 64
+NEWS_CONTENT_BATCH = 8
+
+MANIFEST_FILE = "manifest.json"
+STAGES_DIR = "stages"
+
+# Fetched feeds are reused by reruns within this window, in seconds.
+FETCH_TTL = 3600
+
 KEY_ABSTRACT = arxiv_fetcher.KEY_ABSTRACT
+KEY_CONTENT = news_fetcher.KEY_CONTENT
+KEY_LANG = news_fetcher.KEY_LANG
 KEY_TITLE = arxiv_fetcher.KEY_TITLE
 
 _TEMPLATE = (
@@ -55,8 +90,29 @@ def _git_run(*args):
     return result.stdout.strip()
 
 
-def create_branch_and_push(root_dir, branch_name, file_path, base_branch):
-    """Create branch and push."""
+def create_branch_and_push(
+    root_dir, branch_name, file_path, base_branch, backend: str = "index"
+):
+    """Create branch and push: Return whether there is anything pushed.
+
+    The `index` backend stages files into a temporary git index, without
+    switching the checkout or the cwd, while `checkout` runs porcelain commands
+    in the output root.
+    """
+    if isinstance(file_path, str):
+        file_path = [file_path]
+
+    if backend == "index":
+        logging.info(
+            "Create a new branch (branch, base) = (%s, %s): %s.",
+            branch_name,
+            base_branch,
+            file_path,
+        )
+        return bool(
+            git.publish_branches(root_dir, {branch_name: file_path}, base_branch)
+        )
+
     logging.info("pwd: `%s`", os.getcwd())
     if root_dir not in ("", ".", "./"):
         os.chdir(root_dir)
@@ -72,12 +128,55 @@ def create_branch_and_push(root_dir, branch_name, file_path, base_branch):
     _git_run("pull", "origin", base_branch)
 
     _git_run("checkout", "-b", branch_name)
-    if isinstance(file_path, str):
-        file_path = [file_path]
     for file in file_path:
         _git_run("add", file)
     _git_run("commit", "-m", f"Add {branch_name}.")
     _git_run("push", "-u", "origin", branch_name)
+    return True
+
+
+def publish(args, github_token, branch_name, files, pr_title, pr_body):
+    """Push files to a new branch and create a PR: Return its url if any."""
+    if not (github_token and args.github_repo):
+        return None
+
+    try:
+        if not create_branch_and_push(
+            args.output_root,
+            branch_name,
+            files,
+            args.base_branch,
+            backend=args.git_backend,
+        ):
+            return None
+
+        pr_url = utils.create_github_pr(
+            args.github_repo,
+            branch_name,
+            args.base_branch,
+            pr_title,
+            pr_body,
+            github_token,
+        )
+    except Exception as error:
+        logging.warning("Unable to create a PR: <<<%s>>>", error)
+        pr_url = None
+
+    if pr_url:
+        print(f"Created PR: {pr_url}")
+    else:
+        print("Failed to create PR.")
+
+    return pr_url
+
+
+def get_tag(args):
+    """Get (category, tag) for a job, e.g. (news, de) or (arxiv, cs__DC)."""
+    category = args.output_md.split("/")[1]
+    if args.arxiv:
+        return category, args.arxiv.replace(".", "__")
+
+    return category, args.source_lang
 
 
 def get_filenames(args, tag):
@@ -108,8 +207,15 @@ def get_filenames(args, tag):
     return date_str, branch_name, md_path, csv_path
 
 
-def _translate_text(trans, text):
-    gen_text = trans.translate([text])
+def _get_translator(source_lang: str, target: str):
+    """Translator of titles and contents, by the translation memory if enabled."""
+    return translation_memory.wrap(
+        get_translator(source_lang, target), source_lang, target
+    )
+
+
+def _translate_text(trans, text, profile: str = "default"):
+    gen_text = trans.translate([text], profile=profile)
     if gen_text is None:
         logging.warning("No valid translation for text: `%s`.", text)
         return None
@@ -122,8 +228,14 @@ def split_batches(lst, batch_size: int = 5):
     return [lst[i : i + batch_size] for i in range(0, len(lst), batch_size)]
 
 
-def _translate_texts(trans, texts, batch: int = 1):
-    """Batch mode."""
+def _translate_texts(trans, texts, batch: int = 1, profile: str = "default"):
+    """Batch mode, with a generation profile of `Translator`.
+
+    Long lists are translated by shards across workers if `--shard_dir` is set.
+    """
+    if shard.COORDINATOR is not None and shard.COORDINATOR.accepts(trans, texts):
+        return shard.COORDINATOR.map(trans, texts, batch, profile)
+
     results = []
 
     logging.info(
@@ -134,120 +246,485 @@ def _translate_texts(trans, texts, batch: int = 1):
         for index, text in enumerate(texts):
             if index and not index % 50:
                 logging.info("   [%d/ %d] ...", index, len(texts))
-            results.append(_translate_text(trans, text))
+            results.append(_translate_text(trans, text, profile=profile))
         return results
 
     if batch == _BATCH_MODE or len(texts) <= batch:
-        results = trans.translate(texts)
+        results = trans.translate(texts, profile=profile)
         if results is None:
             return [None] * len(texts)
         return results
 
-    # Any other batch values
-    groups = split_batches(texts, batch)
-    for group in groups:
-        results += _translate_texts(trans, group, batch=_BATCH_MODE)
+    # Any other batch values, smaller under memory pressure
+    while len(results) < len(texts):
+        group = texts[len(results) : len(results) + batch]
+        results += _translate_texts(trans, group, batch=_BATCH_MODE, profile=profile)
+        batch = autotune.shrink(trans, profile, batch)
     return results
 
 
-def _translate_news(articles, source_lang: str, target_langs):
-    translators = {target: Translator(source_lang, target) for target in target_langs}
+def _has_placeholders(texts) -> bool:
+    return any(text == time_budget.PLACEHOLDER for text in texts)
+
+
+def _get_translate_key(cache, stage: str, items, source_lang: str, target: str):
+    """Stage key of translations into a target: Items, models and code."""
+    return cache.key(
+        stage,
+        items,
+        code=stages.code_version(
+            translate_model,
+            protect,
+            translation_memory,
+            _get_translator,
+            _translate_text,
+            _translate_texts,
+            _translate_isolated,
+            _translate_routed,
+            _translate_news_titles,
+            _translate_news_contents,
+            _get_news_langs,
+            translate_news_titles_batch,
+            _translate_news,
+            _translate_titles,
+            _translate_title_batch,
+            translate_papers_batch,
+            _translate_papers_cached,
+        ),
+        source_lang=source_lang,
+        target=target,
+        model=translate_model.SUPPORTED_PAIRS.get((source_lang, target)),
+        weights_dtype=translate_model.WEIGHTS_DTYPE,
+        memory=(
+            translation_memory.MIN_SCORE
+            if translation_memory.ROOT is not None
+            else None
+        ),
+    )
 
-    translated_articles = []
-    for article in articles:
-        # Seems probablematic for empty content.
-        content = article["content"]
 
-        translations = {}
-        for target, trans in translators.items():
-            # If either is too long, we'll skip its translation.
-            gen_title = _translate_text(trans, article[KEY_TITLE])
-            if gen_title is None:
-                continue
+def _translate_isolated(
+    trans, texts, batch: int, profile: str = "default", deadline=None, stage=None
+):
+    """Batch mode, where a failed batch is retried text by text.
 
-            gen_content = _translate_text(trans, content) if content.strip() else ""
-            if gen_content is None:
-                continue
+    Return None for texts which fail on their own, e.g. too long ones, so that
+    a single failure does not drop its whole batch. Given a `deadline`, batches
+    which do not fit in its budget are skipped: Their texts get placeholders.
+    Without a time budget, long lists are translated by shards across workers
+    if `--shard_dir` is set.
+    """
+    deadline = deadline or time_budget.Deadline()
+    stage = stage or profile
+    if (
+        shard.COORDINATOR is not None
+        and deadline.budget <= 0
+        and shard.COORDINATOR.accepts(trans, texts)
+    ):
+        return shard.COORDINATOR.map(trans, texts, batch, profile, stage=stage)
+
+    results = []
+    for index in itertools.count():
+        group = texts[len(results) : len(results) + batch]
+        if not group:
+            break
+        if index and not index % 50:
+            logging.info("   [%d/ %d] ...", len(results), len(texts))
+
+        if not deadline.fits(stage, len(group)):
+            # Skipped, and so are the rest, so that texts are done in order.
+            deadline.skip(stage, len(texts) - len(results))
+            return results + [time_budget.PLACEHOLDER] * (len(texts) - len(results))
+
+        with deadline.timed(stage, len(group)):
+            outputs = trans.translate(group, profile=profile)
+        if outputs is None and len(group) == 1:
+            logging.warning("No valid translation for text: `%s`.", group[0])
+            outputs = [None]
+        elif outputs is None:
+            outputs = [_translate_text(trans, text, profile=profile) for text in group]
+        results += outputs
+        batch = autotune.shrink(trans, stage, batch)
+    return results
+
+
+def _translate_routed(texts, indices, langs, source_langs, target: str, func):
+    """Translate texts at `indices` by the models of their languages, in order.
+
+    Texts already in the target language are kept as they are, and texts in
+    other languages without a model, or whose model fails to load, e.g. when
+    offline, fail (None). Texts in `source_langs`, i.e. of the feeds of jobs,
+    go to their models even without a supported pair.
+    """
+    results = {}
+    for lang in dict.fromkeys(langs[i] for i in indices):
+        group = [i for i in indices if langs[i] == lang]
+        outputs = [None] * len(group)
+        if lang == target:
+            outputs = [texts[i] for i in group]
+        elif lang in source_langs or (lang, target) in translate_model.SUPPORTED_PAIRS:
+            try:
+                trans = _get_translator(lang, target)
+            except Exception as error:
+                logging.exception(
+                    "Unable to load translator %s → %s: <<<%s>>>", lang, target, error
+                )
+            else:
+                outputs = func(trans, [texts[i] for i in group])
+        results.update(zip(group, outputs))
+    return [results[i] for i in indices]
+
+
+def _translate_news_titles(trans, texts, deadline=None):
+    return _translate_isolated(
+        trans,
+        texts,
+        autotune.get_batch_size(trans, "title", texts, NEWS_TITLE_BATCH),
+        profile="title",
+        deadline=deadline,
+    )
+
+
+def _translate_news_contents(trans, texts, deadline=None):
+    return _translate_isolated(
+        trans,
+        texts,
+        autotune.get_batch_size(trans, "content", texts, NEWS_CONTENT_BATCH),
+        profile="content",
+        deadline=deadline,
+    )
+
+
+def _get_news_langs(articles, source_lang: str):
+    """Languages of articles: Detected ones, or the source language."""
+    if KEY_LANG in articles:
+        return articles[KEY_LANG]
+    return [source_lang] * len(articles)
 
-            translations[target] = {
-                KEY_TITLE: gen_title,
-                "content": gen_content,
-            }
 
-        if translations:
-            translated_articles.append(
-                {"original": article, "translations": translations}
+def translate_news_titles_batch(jobs, deadline=None):
+    """Translate news titles for many `(articles, source_lang, target_langs, cache)`.
+
+    Titles are batched per model across all jobs, as `translate_papers_batch`
+    does for arXiv titles, and go before any content. Return per job the titles
+    of each target not in its stage `cache`, for `titles` of `run_news`.
+    """
+    jobs = [
+        (
+            article_batch.ArticleBatch.of(articles),
+            source_lang,
+            target_langs,
+            cache or stages.StageCache("", enabled=False),
+        )
+        for articles, source_lang, target_langs, cache in jobs
+    ]
+    results = [{} for _ in jobs]
+    targets = dict.fromkeys(target for _, _, langs, _ in jobs for target in langs)
+    for target in targets:
+        todo = []
+        for i, (articles, source_lang, target_langs, cache) in enumerate(jobs):
+            key = _get_translate_key(
+                cache, "translate-news", articles, source_lang, target
             )
+            if target in target_langs and not cache.has("translate-news", key):
+                todo.append(i)
+
+        texts, langs = [], []
+        for i in todo:
+            texts += jobs[i][0][KEY_TITLE]
+            langs += _get_news_langs(jobs[i][0], jobs[i][1])
+        gen_titles = _translate_routed(
+            texts,
+            range(len(texts)),
+            langs,
+            {jobs[i][1] for i in todo},
+            target,
+            functools.partial(_translate_news_titles, deadline=deadline),
+        )
+
+        start = 0
+        for i in todo:
+            end = start + len(jobs[i][0])
+            results[i][target] = gen_titles[start:end]
+            start = end
+    return results
+
+
+def _translate_news(
+    articles,
+    source_lang: str,
+    target_langs,
+    deadline=None,
+    cache=None,
+    titles=None,
+):
+    """Translate news in batches across articles: Titles of all targets first.
+
+    Translations are set as `title-<target>` and `content-<target>` columns of a
+    copy of the `ArticleBatch`, where an article gets None for a target whose
+    title or (non-empty) content fails, and is dropped if it fails all targets.
+    Articles with a detected `lang` go to its models, and are kept as they are
+    for a target in that language.
+    Given a `deadline`, titles and contents beyond its budget get placeholders.
+    Given a stage `cache`, complete translations are kept per target.
+    Given `titles` per target, e.g. by `translate_news_titles_batch`, they are
+    not translated again.
+    """
+    articles = article_batch.ArticleBatch.of(articles).copy()
+    cache = cache or stages.StageCache("", enabled=False)
+    keys = {
+        target: _get_translate_key(
+            cache, "translate-news", articles, source_lang, target
+        )
+        for target in target_langs
+    }
+    cached = {
+        target: cache.get("translate-news", keys[target]) for target in target_langs
+    }
+    todo = [target for target in target_langs if cached[target] is None]
+    # Contents by length, which keeps padding within batches low.
+    contents = sorted(
+        (i for i, content in enumerate(articles[KEY_CONTENT]) if content.strip()),
+        key=lambda i: len(articles[KEY_CONTENT][i]),
+    )
+
+    langs = _get_news_langs(articles, source_lang)
+    _contents = functools.partial(_translate_news_contents, deadline=deadline)
+
+    gen_titles = {}
+    for target in todo:
+        if titles and target in titles:
+            gen_titles[target] = titles[target]
+            continue
+        gen_titles[target] = _translate_routed(
+            articles[KEY_TITLE],
+            range(len(articles)),
+            langs,
+            (source_lang,),
+            target,
+            functools.partial(_translate_news_titles, deadline=deadline),
+        )
+
+    for target in todo:
+        # If either is too long, we'll skip its translation.
+        indices = [
+            i
+            for i in contents
+            if gen_titles[target][i] not in (None, time_budget.PLACEHOLDER)
+        ]
+        gen_contents = [
+            time_budget.PLACEHOLDER if i in contents else ""
+            for i in range(len(articles))
+        ]
+        for i, gen_content in zip(
+            indices,
+            _translate_routed(
+                articles[KEY_CONTENT], indices, langs, (source_lang,), target, _contents
+            ),
+        ):
+            gen_contents[i] = gen_content
+
+        failed = [
+            gen_title is None or gen_content is None
+            for gen_title, gen_content in zip(gen_titles[target], gen_contents)
+        ]
+        value = {
+            f"{KEY_TITLE}-{target}": [
+                None if fail else text for fail, text in zip(failed, gen_titles[target])
+            ],
+            f"{KEY_CONTENT}-{target}": [
+                None if fail else text for fail, text in zip(failed, gen_contents)
+            ],
+        }
+        if not _has_placeholders(t for texts in value.values() for t in texts):
+            cache.put("translate-news", keys[target], value)
+        cached[target] = value
+
+    # Targets in order.
+    for target in target_langs:
+        for col, texts in cached[target].items():
+            articles[col] = texts
+
+    kept = []
+    for i, article in enumerate(articles):
+        if any(article[f"{KEY_TITLE}-{target}"] is not None for target in target_langs):
+            kept.append(i)
         else:
             logging.warning("No valid translation for article: `%s`.", article)
 
-    return translated_articles
+    return articles if len(kept) == len(articles) else articles.take(kept)
 
 
-def _translate_papers(df, column, target_langs, source_lang="en", subject=None):
-    translators = {target: Translator(source_lang, target) for target in target_langs}
+def _translate_many(trans, groups, func):
+    """Translate several text lists in one go, and split the results back."""
+    texts = [text for group in groups for text in group]
+    results = func(trans, texts)
 
-    aug_titles = defaultdict(lambda: [])
-    aug_abstracts = defaultdict(lambda: [])
+    outputs, start = [], 0
+    for group in groups:
+        outputs.append(results[start : start + len(group)])
+        start += len(group)
+    return outputs
 
-    titles = df[column]
-    abstracts = df[KEY_ABSTRACT]
 
-    def _normalize(raw: str) -> str:
-        raw = raw.strip()
+def _translate_titles(trans, titles, deadline=None):
+    """Global batch mode for titles, with a fallback to small batches.
 
-        desc = raw.split("</p>")[0]
-        if desc == raw:
-            return desc
-        prefix = "<p>Article URL: "
-        if desc.startswith(prefix):
-            return desc[len(prefix) :]
-        return f"{prefix}</p>"
+    Given a `deadline`, titles go batch by batch, and batches which do not fit
+    in its budget get placeholders.
+    """
+    deadline = deadline or time_budget.Deadline()
+    batch_size = autotune.get_batch_size(trans, "title", titles, 1500)
+
+    results = []
+    for group in split_batches(list(titles), batch_size):
+        if not deadline.fits("title", len(group)):
+            # Skipped, and so are the rest, so that titles are done in order.
+            deadline.skip("title", len(titles) - len(results))
+            return results + [time_budget.PLACEHOLDER] * (len(titles) - len(results))
+
+        with deadline.timed("title", len(group)):
+            results += _translate_title_batch(trans, group, batch_size)
+    return results
+
+
+def _translate_title_batch(trans, titles, batch_size: int):
+    for index, size in enumerate((batch_size, 5)):
+        new_titles = _translate_texts(trans, titles, batch=size, profile="title")
+
+        if all(t is None for t in new_titles):
+            logging.warning("Batch size %d: All none values for the translation.", size)
+            if index == 0:
+                continue
 
-    if subject == "hacker-news":
-        abstracts = [_normalize(a) for a in abstracts]
+        return [(t or "") for t in new_titles]
 
-    for target, trans in translators.items():
+    return []
+
+
+def _translate_papers_cached(jobs, column, source_lang, deadline, cache):
+    """Translate papers per (job, target) unless cached."""
+    keys, pending = {}, []
+    for i, (df, target_langs, _) in enumerate(jobs):
+        items = df[[c for c in (column, KEY_ABSTRACT) if c in df]].to_dict("records")
+        todo = []
+        for target in target_langs:
+            keys[i, target] = _get_translate_key(
+                cache, "translate-papers", items, source_lang, target
+            )
+            value = cache.get("translate-papers", keys[i, target])
+            if value is None:
+                todo.append(target)
+                continue
+            for col, texts in value.items():
+                df[col] = texts
+        if todo:
+            pending.append((i, todo))
+
+    if pending:
+        translate_papers_batch(
+            [(jobs[i][0], todo, jobs[i][2]) for i, todo in pending],
+            column,
+            source_lang=source_lang,
+            deadline=deadline,
+        )
+    for i, todo in pending:
+        df = jobs[i][0]
+        for target in todo:
+            value = {
+                col: list(df[col])
+                for col in (f"{column}-{target}", f"{KEY_ABSTRACT}-{target}")
+                if col in df
+            }
+            if not _has_placeholders(t for texts in value.values() for t in texts):
+                cache.put("translate-papers", keys[i, target], value)
+
+    return [df for df, _, _ in jobs]
+
+
+def translate_papers_batch(jobs, column, source_lang="en", deadline=None, cache=None):
+    """Translate papers for many `(df, target_langs, subject)` jobs.
+
+    Titles are batched per model across all jobs, so that one forward pass
+    covers e.g. both `cs.DC` and `cs.PL`. Titles of all targets go before any
+    abstract, and given a `deadline`, texts beyond its budget get placeholders.
+    Given a stage `cache`, complete translations are kept per (job, target).
+    """
+    if cache is not None and cache.enabled:
+        return _translate_papers_cached(jobs, column, source_lang, deadline, cache)
+
+    targets = list(
+        dict.fromkeys(target for _, target_langs, _ in jobs for target in target_langs)
+    )
+    indices = {
+        target: [i for i, (_, langs, _) in enumerate(jobs) if target in langs]
+        for target in targets
+    }
+
+    for target in targets:
         logging.info("Processing target lang: `%s` ...", target)
-        # Global batch mode for `title`
-        for index, batch_size in enumerate((1500, 5)):
-            new_titles = _translate_texts(trans, titles, batch=batch_size)
+        trans = _get_translator(source_lang, target)
 
-            if all(t is None for t in new_titles):
-                logging.warning(
-                    "Batch size %d: All none values for the translation.", batch_size
-                )
-                if index == 0:
-                    continue
+        new_titles = _translate_many(
+            trans,
+            [list(jobs[i][0][column]) for i in indices[target]],
+            functools.partial(_translate_titles, deadline=deadline),
+        )
+        for i, titles in zip(indices[target], new_titles):
+            jobs[i][0][f"{column}-{target}"] = titles
 
-            aug_titles[target] = [(t or "") for t in new_titles]
-            break
+    # Batch mode for `abstract`: bs = 1, unless tuned
+    for target in targets:
+        if target not in ("zh",):
+            continue
+
+        trans = _get_translator(source_lang, target)
+        for i in indices[target]:
+            df = jobs[i][0]
+            abstracts = list(df[KEY_ABSTRACT])
 
-        # Batch mode for `abstract`: bs = 5
-        if target in ("zh",):
             new_abs = [
                 (t or "")
-                for t in _translate_texts(
-                    trans, abstracts[:MAX_ARXIV_ABSTRACTS], batch=1
+                for t in _translate_isolated(
+                    trans,
+                    abstracts[:MAX_ARXIV_ABSTRACTS],
+                    autotune.get_batch_size(
+                        trans, "abstract", abstracts, 1, profile="content"
+                    ),
+                    profile="content",
+                    deadline=deadline,
+                    stage="abstract",
                 )
             ]
             if len(new_abs) < len(abstracts):
                 new_abs += [""] * (len(abstracts) - len(new_abs))
-            aug_abstracts[target] = new_abs
+            df[f"{KEY_ABSTRACT}-{target}"] = new_abs
 
-    for target in target_langs:
-        df[f"{column}-{target}"] = aug_titles[target]
+    return [df for df, _, _ in jobs]
 
-        col = f"{KEY_ABSTRACT}-{target}"
-        if target in aug_abstracts:
-            df[col] = aug_abstracts[target]
 
-    return df
+def _translate_papers(
+    df,
+    column,
+    target_langs,
+    source_lang="en",
+    subject=None,
+    deadline=None,
+    cache=None,
+):
+    return translate_papers_batch(
+        [(df, target_langs, subject)],
+        column,
+        source_lang=source_lang,
+        deadline=deadline,
+        cache=cache,
+    )[0]
 
 
 def convert_news_csv_to_md(csv_path, md_path, date_str, source_lang, target_langs):
     """Convert news csv to md."""
-    df = pd.read_csv(csv_path)
+    # Empty cells, e.g. of failed translations, rather than NaN.
+    df = pd.read_csv(csv_path).fillna("")
 
     lines = [
         _TEMPLATE.replace(
@@ -287,107 +764,389 @@ def convert_news_csv_to_md(csv_path, md_path, date_str, source_lang, target_lang
     logging.info("Daily news written to `%s`.", md_path)
 
 
-def run_vocab(rows, source_lang: str, target_langs, csv_path, md_path, date_str):
-    """Run vocab."""
-    rows = list(rows)
-
-    counts = defaultdict(lambda: defaultdict(int))
-    examples = {}
-    for input_row in rows:
-        row = input_row
-        for s in r'".,:?!_#@<>/|()[]=+*^%$~`0123456789\\':
-            row = row.replace(s, " ")
-        words = row.split()
-        for word in words:
-            counts[word.lower()][word] += 1
-            # Example sentence/ title for the given word
-            if word not in examples:
-                examples[word] = input_row
-
-    df = []
-    for key, d_count in counts.items():
-        max_key = max(d_count, key=d_count.get)
-        df.append((key, max_key, sum(d_count.values()), examples[max_key]))
-    c_lower, c_word, c_count, c_ex = "lower", f"word-{source_lang}", "count", "example"
-    df = pd.DataFrame(df, columns=[c_lower, c_word, c_count, c_ex])
-    df = df.sort_values([c_count, c_lower], ascending=[False, True]).reset_index(
-        drop=True
-    )
+def _get_row(rows, index):
+    return rows.iloc[index] if hasattr(rows, "iloc") else rows[index]
 
-    df = df[[c_word, c_count, c_ex]]
-    for target in target_langs:
-        trans = Translator(source_lang, target)
-        df[f"word-{target}"] = [
-            (t or "") for t in _translate_texts(trans, df[c_word], batch=5000)
-        ]
 
-    df = df[sorted(df.columns)]
-    df.to_csv(csv_path)
+def write_vocab(
+    df, source_lang: str, target_langs, csv_path, md_path, date_str, title=None
+):
+    """Write vocab into csv and md files, streaming md lines.
 
-    # md
-    lines = [
-        _TEMPLATE.replace(
-            "TITLE",
-            f"{LANGUAGE_MAP.get(source_lang, '')} vocab up to {date_str}: {len(df):03d}",
-        ).replace("DATE", date_str),
-        f"- id | {c_count} | {' | '.join([source_lang] + list(target_langs))} | {c_ex}\n",
-    ]
+    `df` has columns `word-*`, `count` and `example`, sorted by count.
+    """
+    c_word, c_count, c_ex = f"word-{source_lang}", "count", "example"
+    title = title or f"up to {date_str}"
 
-    toc = []
+    df = df[sorted(df.columns)]
+    df.to_csv(csv_path)
     logging.info(df.head())
-    for i, row in df.iterrows():
-        summary = f"[{i:04d}] | {row[c_count]} | {row[c_word]}"
-        for target in ("de", "en", "zh"):
-            if target in target_langs:
-                summary += " | " + row[f"word-{target}"]
-        summary += f" | {row[c_ex]}"
-        toc.append(summary)
 
-    lines += ["\n".join(f"- {t}" for t in toc)]
     os.makedirs(os.path.dirname(md_path), exist_ok=True)
     with open(md_path, "w", encoding="utf-8") as f:
-        f.write("".join(lines))
+        f.write(
+            _TEMPLATE.replace(
+                "TITLE",
+                f"{LANGUAGE_MAP.get(source_lang, '')} vocab {title}: {len(df):03d}",
+            ).replace("DATE", date_str)
+        )
+        f.write(
+            f"- id | {c_count} | {' | '.join([source_lang] + list(target_langs))} | {c_ex}\n"
+        )
+
+        targets = [t for t in ("de", "en", "zh") if t in target_langs]
+        columns = [df[c_count], df[c_word]] + [df[f"word-{t}"] for t in targets]
+        for i, values in enumerate(zip(*columns, df[c_ex])):
+            if i:
+                f.write("\n")
+            f.write(f"- [{i:04d}] | {' | '.join(str(v) for v in values)}")
 
     return (csv_path, md_path)
 
 
-def run_news(args, md_path: str, csv_path: str, date_str: str):
-    """Run news."""
-    articles = news_fetcher.fetch_top_news_rss(
-        lang=args.source_lang, top_n=args.num_articles
+def _write_vocab_partial(
+    variants, rows, df, source_lang, target_langs, partial_path, date_str
+):
+    month = date_str[:7]
+    partial = pd.DataFrame(
+        [
+            (
+                lower,
+                word,
+                count,
+                _get_row(rows, row),
+                vocab_partial.get_first(month, first),
+            )
+            for lower, word, count, row, first in variants
+        ],
+        columns=vocab_partial.COLUMNS,
+    )
+    for target in target_langs:
+        translations = dict(zip(df[f"word-{source_lang}"], df[f"word-{target}"]))
+        # Placeholders are left to be translated by rollups.
+        partial[f"word-{target}"] = (
+            partial["word"]
+            .map(translations)
+            .fillna("")
+            .replace(time_budget.PLACEHOLDER, "")
+        )
+
+    vocab_partial.write(partial, partial_path)
+    logging.info("Vocab partial for %s written to `%s`.", month, partial_path)
+
+
+def _translate_words(words, source_lang: str, target: str, deadline=None):
+    """Model translations of words, or placeholders beyond the time budget."""
+    deadline = deadline or time_budget.Deadline()
+    if not deadline.fits("word", len(words)):
+        deadline.skip("word", len(words))
+        return [time_budget.PLACEHOLDER] * len(words)
+
+    trans = get_translator(source_lang, target)
+    with deadline.timed("word", len(words)):
+        batch = autotune.get_batch_size(trans, "word", words, 5000)
+        return _translate_texts(trans, words, batch=batch, profile="word")
+
+
+def translate_words(
+    words, source_lang: str, target: str, lexicon_path: str = None, deadline=None
+):
+    """Translate vocab words, dictionary first if a lexicon is given.
+
+    Only unknown words go to the model, and its outputs are learned back. Given
+    a `deadline`, words beyond its budget get placeholders, but for known ones.
+    """
+    words = list(words)
+    if not lexicon_path:
+        return [
+            (t or "")
+            for t in _translate_words(words, source_lang, target, deadline=deadline)
+        ]
+
+    with lexicon.Lexicon(lexicon_path) as lex:
+        results = [lex.get(word) for word in words]
+        missing = list(dict.fromkeys(w for w, t in zip(words, results) if t is None))
+        logging.info(
+            "[%s-%s] Lexicon: %d/ %d words are unknown.",
+            source_lang,
+            target,
+            len(missing),
+            len(words),
+        )
+        if missing:
+            learned = dict(
+                zip(
+                    missing,
+                    _translate_words(missing, source_lang, target, deadline=deadline),
+                )
+            )
+            lex.learn(
+                {w: t for w, t in learned.items() if t != time_budget.PLACEHOLDER}
+            )
+            lex.save()
+            results = [
+                (learned[w] or "") if t is None else t for w, t in zip(words, results)
+            ]
+
+    return results
+
+
+def run_vocab(
+    rows,
+    source_lang: str,
+    target_langs,
+    csv_path,
+    md_path,
+    date_str,
+    max_words: int = 0,
+    partial_path: str = None,
+    lexicon_dir: str = None,
+    deadline=None,
+):
+    """Run vocab.
+
+    Words are counted with compact counters, which spill to disk beyond
+    `max_words` word variants if positive, and examples are kept as row ids
+    into `rows` until they are written. The month's mergeable partial is
+    written into `partial_path` if given, and words are looked up in the
+    lexicons under `lexicon_dir` before the models if given, and words beyond
+    the budget of `deadline` if given get placeholders.
+    """
+    if not hasattr(rows, "__getitem__"):
+        rows = list(rows)
+
+    with VocabCounter(max_words=max_words) as counter:
+        for index, row in enumerate(rows):
+            counter.add(row, index)
+        vocab = sorted(counter.vocab(), key=lambda x: (-x[2], x[0]))
+        variants = list(counter.variants()) if partial_path else None
+
+    c_word, c_count, c_ex = f"word-{source_lang}", "count", "example"
+    df = pd.DataFrame(
+        [(word, count, row) for _, word, count, row in vocab],
+        columns=[c_word, c_count, c_ex],
     )
+    del vocab
+
+    for target in target_langs:
+        lexicon_path = (
+            lexicon.get_path(lexicon_dir, source_lang, target) if lexicon_dir else None
+        )
+        df[f"word-{target}"] = translate_words(
+            df[c_word],
+            source_lang,
+            target,
+            lexicon_path=lexicon_path,
+            deadline=deadline,
+        )
+
+    if partial_path:
+        _write_vocab_partial(
+            variants, rows, df, source_lang, target_langs, partial_path, date_str
+        )
+
+    df[c_ex] = [_get_row(rows, index) for index in df[c_ex]]
+    return write_vocab(df, source_lang, target_langs, csv_path, md_path, date_str)
+
+
+def get_vocab_partial_dir(args):
+    """Get the directory of monthly vocab partials for a news job."""
+    category, tag = get_tag(args)
+    return utils.get_state_path(args.output_root, "vocab", f"{category}-{tag}")
+
+
+def get_manifest(output_root):
+    """Get the manifest of job inputs and output files under an output root."""
+    return manifest.Manifest(
+        utils.get_state_path(output_root, MANIFEST_FILE), root=output_root
+    )
+
+
+def update_history(output_root: str) -> list:
+    """Update the history index of an output tree: Return files to publish."""
+    try:
+        history.update_index(output_root)
+    except Exception as error:
+        logging.warning("Unable to update the history index: <<<%s>>>", error)
+        return []
+    return [history.get_index_path(output_root)]
+
+
+def get_fingerprint(args, items):
+    """Fingerprint fetched articles or papers of a job, with its languages.
+
+    The code of the pipeline is part of it: Jobs are rerun on code changes, with
+    unchanged stages taken from the stage cache.
+    """
+    return manifest.fingerprint(
+        items,
+        source_lang=args.source_lang,
+        target_langs=list(args.target_langs or ()),
+        arxiv=args.arxiv,
+        code=stages.code_version(sys.modules[__name__]),
+    )
+
+
+def get_stage_cache(args):
+    """Get the stage cache of a job, disabled by `--no-stage_cache`."""
+    return stages.StageCache(
+        utils.get_state_path(args.output_root, STAGES_DIR),
+        enabled=getattr(args, "stage_cache", True),
+    )
+
+
+def get_lexicon_dir(args):
+    """Get the directory of vocab lexicons."""
+    return utils.get_state_path(args.output_root, lexicon.LEXICON_DIR)
+
+
+def _get_dedup_path(args):
+    return utils.get_state_path(
+        args.output_root, f"dedup--news-{args.source_lang}.json"
+    )
+
+
+def _get_dedup_index(args):
+    """Near-duplicate index of recent news, unless `--dedup_threshold 0`."""
+    threshold = getattr(args, "dedup_threshold", 0)
+    if threshold <= 0:
+        return None
+    return news_dedup.NearDuplicateIndex(
+        threshold=threshold,
+        path=_get_dedup_path(args),
+        days=getattr(args, "dedup_days", news_dedup.DEFAULT_DAYS),
+    )
+
+
+def _save_dedup(args, articles) -> list:
+    """Record published news for near-duplicate checks by next runs: Return files.
+
+    Only called once a run has produced its outputs, so that news of failed,
+    skipped or incomplete runs are not suppressed later on.
+    """
+    dedup_index = _get_dedup_index(args)
+    if dedup_index is None:
+        return []
+    for title, content in zip(articles[KEY_TITLE], articles[KEY_CONTENT]):
+        dedup_index.add(title, content or "")
+    return [dedup_index.save()]
+
+
+def get_lang_id(args):
+    """Language identifier of fetched items, unless `--no-langid`."""
+    if not getattr(args, "langid", True):
+        return None
+    return langid.LanguageIdentifier(langs=translate_model.SUPPORTED_LANGS)
+
+
+def fetch_news(args):
+    """Fetch news for a job, skipping near duplicates of recent stories.
+
+    Items are routed to the models of their detected languages, unless
+    `--no-langid`, and items in languages without models are skipped. Stories
+    are recorded by `run_news`, once published.
+    """
+    return news_fetcher.fetch_top_news_rss(
+        lang=args.source_lang,
+        top_n=args.num_articles,
+        dedup=_get_dedup_index(args),
+        lang_id=get_lang_id(args),
+    )
+
+
+def _render(cache, stage: str, func, csv_path: str, md_path: str, **params):
+    """Render a md file from a csv file, unless up to date."""
+    cache = cache or stages.StageCache("", enabled=False)
+    with profiling.stage(stage):
+        cache.run_files(
+            stage,
+            lambda: func(csv_path, md_path, **params),
+            [manifest.hash_file(csv_path)],
+            [md_path],
+            code=stages.code_version(func, _TEMPLATE),
+            **params,
+        )
+
+
+def _add_to_archive(args, md_path: str, date_str: str, count: int, **kwargs):
+    """Add a post to the archive pages, unless `--no-archive`: Return files."""
+    if not getattr(args, "archive", True):
+        return []
+
+    category, tag = get_tag(args)
+    try:
+        return archive.add_post(
+            args.output_root, f"{category}-{tag}", md_path, date_str, count, **kwargs
+        )
+    except Exception as error:
+        logging.exception("Unable to update the archive: <<<%s>>>", error)
+        return []
+
+
+def run_news(
+    args,
+    md_path: str,
+    csv_path: str,
+    date_str: str,
+    articles=None,
+    deadline=None,
+    cache=None,
+    titles=None,
+):
+    """Run news: Articles are fetched unless given, and translated by `deadline`.
+
+    Given a stage `cache`, unchanged stages are skipped. Given `titles` per
+    target, e.g. translated across jobs, they are not translated again.
+    """
+    if articles is None:
+        articles = fetch(args, cache=cache)
     if not articles:
         logging.warning("No articles fetched, exiting.")
         return None
 
-    trans_articles = _translate_news(articles, args.source_lang, args.target_langs)
-
-    df = defaultdict(lambda: [])
-    for article in trans_articles:
-        df[f"title-{args.source_lang}"].append(article["original"][KEY_TITLE])
-        df[f"content-{args.source_lang}"].append(article["original"]["content"])
+    skipped = deadline.num_skipped if deadline else 0
+    with profiling.stage("translate"):
+        trans_articles = _translate_news(
+            articles,
+            args.source_lang,
+            args.target_langs,
+            deadline=deadline,
+            cache=cache,
+            titles=titles,
+        )
 
-        for target, trans in article["translations"].items():
-            df[f"title-{target}"].append(trans[KEY_TITLE])
-            df[f"content-{target}"].append(trans["content"])
+    columns = {}
+    for lang in (args.source_lang, *args.target_langs):
+        for key in (KEY_TITLE, KEY_CONTENT):
+            column = f"{key}-{lang}"
+            columns[key if lang == args.source_lang else column] = column
 
     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-    df = pd.DataFrame.from_dict(data=df)
+    df = trans_articles.to_frame(columns)
     df.to_csv(csv_path)
+    count = len(df)
     logging.info("Daily news written to `%s`.", csv_path)
 
-    convert_news_csv_to_md(
-        csv_path, md_path, date_str, args.source_lang, args.target_langs
+    _render(
+        cache,
+        "render-news",
+        convert_news_csv_to_md,
+        csv_path,
+        md_path,
+        date_str=date_str,
+        source_lang=args.source_lang,
+        target_langs=list(args.target_langs),
     )
 
     # Vocab files
     files = [md_path, csv_path]
+    vocab_path = None
     try:
         csv_paths = csv_path.replace(date_str, "*")
         dfs = glob.glob(csv_paths)
         dfs = [f for f in dfs if "-VOCAB" not in f]
         logging.info("Reading from %d files: `%s` ...", len(dfs), dfs)
-        dfs = [pd.read_csv(f) for f in dfs]
+        dfs = [pd.read_csv(f, usecols=[f"{KEY_TITLE}-{args.source_lang}"]) for f in dfs]
         df = pd.concat(dfs)
 
         date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
@@ -406,23 +1165,81 @@ def run_news(args, md_path: str, csv_path: str, date_str: str):
             )
 
         csv2, md2 = _get_file(csv_path), _get_file(md_path)
+        partial_path = vocab_partial.get_path(
+            get_vocab_partial_dir(args), last_date_in_month[:7]
+        )
 
-        files += list(
-            run_vocab(
-                df[f"{KEY_TITLE}-{args.source_lang}"],
-                args.source_lang,
-                args.target_langs,
-                csv2,
-                md2,
-                last_date_in_month,
-            )
+        titles = list(df[f"{KEY_TITLE}-{args.source_lang}"])
+
+        def _run_vocab():
+            skipped = deadline.num_skipped if deadline else 0
+            with profiling.stage("vocab"):
+                run_vocab(
+                    titles,
+                    args.source_lang,
+                    args.target_langs,
+                    csv2,
+                    md2,
+                    last_date_in_month,
+                    max_words=args.vocab_max_words,
+                    partial_path=partial_path,
+                    lexicon_dir=get_lexicon_dir(args),
+                    deadline=deadline,
+                )
+            # Not stamped with placeholders.
+            return not deadline or deadline.num_skipped == skipped
+
+        (cache or stages.StageCache("", enabled=False)).run_files(
+            "vocab",
+            _run_vocab,
+            titles,
+            [csv2, md2, partial_path],
+            code=stages.code_version(
+                run_vocab,
+                write_vocab,
+                _write_vocab_partial,
+                translate_words,
+                _translate_words,
+                VocabCounter,
+                vocab_partial,
+                lexicon,
+                translate_model,
+            ),
+            source_lang=args.source_lang,
+            target_langs=list(args.target_langs),
+            max_words=args.vocab_max_words,
+            weights_dtype=translate_model.WEIGHTS_DTYPE,
         )
+        files += [csv2, md2]
+        files.append(partial_path)
+        vocab_path = csv2
+        files += [
+            path
+            for path in (
+                lexicon.get_path(get_lexicon_dir(args), args.source_lang, target)
+                for target in args.target_langs
+            )
+            if os.path.exists(path)
+        ]
     except Exception as error:
         files = [md_path, csv_path]
         logging.exception(
             "Unable to export vocab file from (%s): <<<%s>>>", csv_path, error
         )
 
+    files += _add_to_archive(
+        args,
+        md_path,
+        date_str,
+        count,
+        vocab_path=vocab_path,
+        source_lang=args.source_lang,
+        target_langs=args.target_langs,
+    )
+    # Incomplete runs are redone, so their news are not recorded yet.
+    if not deadline or deadline.num_skipped == skipped:
+        files += _save_dedup(args, trans_articles)
+
     return tuple(files)
 
 
@@ -495,45 +1312,124 @@ def convert_arxiv_csv_to_md(csv_path, md_path, date_str, subject):
     logging.info("arXiv papers (%s) written to `%s`.", subject, md_path)
 
 
-def run_arxiv(args, md_path: str, csv_path: str, date_str: str):
-    """Run arXiv."""
+def fetch_arxiv(args):
+    """Fetch arXiv papers for a job, in English unless `--no-langid`."""
     date = (
         (datetime.date.today() - datetime.timedelta(days=args.arxiv_num_days))
         .isoformat()
         .replace("-", "")
     )
 
-    papers = arxiv_fetcher.fetch_arxiv_papers(
-        subject=args.arxiv, date=date, top_n=args.num_articles
-    )
-    if not papers:
-        logging.warning("No papers fetched, exiting.")
-        return None
-
-    df = pd.DataFrame(papers)
-    df = _translate_papers(
-        df,
-        KEY_TITLE,
-        args.target_langs or ("de", "zh"),
-        source_lang="en",
+    return arxiv_fetcher.fetch_arxiv_papers(
         subject=args.arxiv,
+        date=date,
+        top_n=args.num_articles,
+        lang_id=get_lang_id(args),
     )
+
+
+def write_arxiv(args, df, md_path: str, csv_path: str, date_str: str, cache=None):
+    """Write translated arXiv papers into csv and md files."""
     df = df[sorted(df.columns)]
 
     os.makedirs(os.path.dirname(csv_path), exist_ok=True)
     df.to_csv(csv_path)
     logging.info("[%s] Papers from arXiv are written to `%s`.", args.arxiv, csv_path)
 
-    convert_arxiv_csv_to_md(csv_path, md_path, date_str, args.arxiv)
+    _render(
+        cache,
+        "render-arxiv",
+        convert_arxiv_csv_to_md,
+        csv_path,
+        md_path,
+        date_str=date_str,
+        subject=args.arxiv,
+    )
+
+    return (md_path, csv_path, *_add_to_archive(args, md_path, date_str, len(df)))
+
 
-    return (md_path, csv_path)
+def fetch(args, cache=None):
+    """Fetch news articles or arXiv papers for a job.
+
+    Given a stage `cache`, feeds are fetched once per `FETCH_TTL` window, so
+    that reruns work on the same articles.
+    """
+    func = fetch_arxiv if args.arxiv else fetch_news
+    if cache is None:
+        return func(args)
+
+    return cache.run(
+        "fetch-arxiv" if args.arxiv else "fetch-news",
+        lambda: func(args) or None,
+        [],
+        code=stages.code_version(
+            func, arxiv_fetcher if args.arxiv else news_fetcher, text_utils, langid
+        ),
+        source_lang=args.source_lang,
+        arxiv=args.arxiv,
+        arxiv_num_days=args.arxiv_num_days,
+        num_articles=args.num_articles,
+        dedup_threshold=args.dedup_threshold,
+        langid=getattr(args, "langid", True),
+        window=int(time.time() // FETCH_TTL),
+    )
 
 
-def main():
+def run_arxiv(
+    args,
+    md_path: str,
+    csv_path: str,
+    date_str: str,
+    papers=None,
+    deadline=None,
+    cache=None,
+):
+    """Run arXiv: Papers are fetched unless given, and translated by `deadline`.
+
+    Given a stage `cache`, unchanged stages are skipped.
+    """
+    if papers is None:
+        papers = fetch(args, cache=cache)
+    if not papers:
+        logging.warning("No papers fetched, exiting.")
+        return None
+
+    df = article_batch.ArticleBatch.of(papers).to_frame()
+    with profiling.stage("translate"):
+        df = _translate_papers(
+            df,
+            KEY_TITLE,
+            args.target_langs or ("de", "zh"),
+            source_lang="en",
+            subject=args.arxiv,
+            deadline=deadline,
+            cache=cache,
+        )
+
+    return write_arxiv(args, df, md_path, csv_path, date_str, cache=cache)
+
+
+def main(argv=None):
     """Main."""
-    df = pd.read_csv("testdata/arxiv-cs__DC.csv")
-    logging.info("Translating ...")
-    df = _translate_papers(df, KEY_TITLE, ("de", "zh"))
+    parser = argparse.ArgumentParser(description="LinguaVitamin papers translation")
+    parser.add_argument("--csv_path", type=str, default="testdata/arxiv-cs__DC.csv")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write CPU flamegraph stacks, torch ops and allocations per stage",
+    )
+    args = parser.parse_args(argv)
+
+    with (
+        profiling.profile(profiling.get_dir("", "pipe"))
+        if args.profile
+        else contextlib.nullcontext()
+    ):
+        df = pd.read_csv(args.csv_path)
+        logging.info("Translating ...")
+        with profiling.stage("translate"):
+            df = _translate_papers(df, KEY_TITLE, ("de", "zh"))
     logging.info("Columns: `%s`", list(df.columns))
     logging.info(df.transpose())
 
@@ -0,0 +1,95 @@
+"""Unit tests for archive.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from lingua_vitamin import archive
+from lingua_vitamin.common import utils
+
+
+def _post(temp_dir, date_str):
+    return os.path.join(
+        temp_dir,
+        "_posts/news/markdown",
+        date_str[:4],
+        date_str[5:7],
+        f"{date_str}--news-de.md",
+    )
+
+
+class TestArchive(unittest.TestCase):
+    """Unit tests for archive.py."""
+
+    def test_add_post(self):
+        """Unit test for add_post: Only the pages of the post's month change."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            vocab_path = os.path.join(temp_dir, "vocab.csv")
+            pd.DataFrame(
+                {
+                    "count": [3, 2, 1],
+                    "example": ["", "", ""],
+                    "word-de": ["Merz", "Haus", "Kanzler"],
+                    "word-en": ["Merz", "house", "chancellor"],
+                }
+            ).to_csv(vocab_path)
+            page_dir = archive.get_page_dir(temp_dir, "news-de")
+            may_page = os.path.join(page_dir, "2025-05.md")
+
+            archive.add_post(
+                temp_dir, "news-de", _post(temp_dir, "2025-05-31"), "2025-05-31", 4
+            )
+            may = utils.load_file(may_page)
+            for date_str, count in (("2025-06-01", 5), ("2025-06-02", 3)):
+                files = archive.add_post(
+                    temp_dir,
+                    "news-de",
+                    _post(temp_dir, date_str),
+                    date_str,
+                    count,
+                    vocab_path=vocab_path,
+                    source_lang="de",
+                    target_langs=["en", "zh"],
+                    top_n=2,
+                )
+            # Rerun of a day: Updated, rather than added.
+            archive.add_post(
+                temp_dir, "news-de", _post(temp_dir, "2025-06-02"), "2025-06-02", 3
+            )
+
+            self.assertNotIn(may_page, files)
+            self.assertEqual(utils.load_file(may_page), may)
+            self.assertEqual(
+                [os.path.relpath(f, temp_dir) for f in files],
+                [
+                    ".lingua_vitamin/archive/news-de/2025-06.json",
+                    ".lingua_vitamin/archive/news-de/index.json",
+                    "archive/news-de/2025-06.md",
+                    "archive/news-de/index.md",
+                ],
+            )
+
+            june = utils.load_file(os.path.join(page_dir, "2025-06.md"))
+            self.assertIn("[news-de](index.md): 2 posts, 8 articles", june)
+            self.assertIn(
+                "- 2025-06-02 | [2025-06-02--news-de]"
+                "(../../_posts/news/markdown/2025/06/2025-06-02--news-de.md) | 003",
+                june,
+            )
+            self.assertLess(june.index("2025-06-02 |"), june.index("2025-06-01 |"))
+            self.assertIn("## Top 2 Vocab", june)
+            self.assertIn("- count | word-de | word-en\n- 3 | Merz | Merz\n", june)
+            self.assertNotIn("Kanzler", june)
+
+            index = utils.load_file(os.path.join(page_dir, "index.md"))
+            self.assertIn("3 posts, 12 articles", index)
+            self.assertIn("- [2025-06](2025-06.md) | 2 posts | 8 articles", index)
+            self.assertLess(index.index("[2025-06]"), index.index("[2025-05]"))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
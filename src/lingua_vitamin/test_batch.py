@@ -0,0 +1,260 @@
+"""Unit tests for batch.py."""
+
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from lingua_vitamin import batch
+from lingua_vitamin import history
+from lingua_vitamin import main
+from lingua_vitamin import pipe
+from lingua_vitamin.common import notify
+from lingua_vitamin.common import utils
+
+_PWD = os.path.dirname(os.path.abspath(__file__))
+
+
+class _FakeTranslator:
+    """Upper-case `translation`, recording each call."""
+
+    def __init__(self, src_lang, target_lang):
+        self.key = (src_lang, target_lang)
+        self.calls = []
+
+    def translate(self, texts, profile="default"):
+        self.calls.append(list(texts))
+        return [f"{self.key[1]}:{text.upper()}" for text in texts]
+
+
+class TestBatch(unittest.TestCase):
+    """Unit tests for batch.py."""
+
+    def _write_jobs(self, temp_dir, config):
+        jobs_file = os.path.join(temp_dir, "jobs.json")
+        with open(jobs_file, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        return jobs_file
+
+    def test_load_jobs(self):
+        """Unit test for load_jobs."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs_file = self._write_jobs(
+                temp_dir,
+                {
+                    "defaults": {"target_langs": ["de", "zh"]},
+                    "jobs": [{"arxiv": "cs.DC"}, {"source_lang": "en"}],
+                },
+            )
+            args = main.parse_args(["--jobs", jobs_file, "--num_articles", "7"])
+            jobs = batch.load_jobs(jobs_file, vars(args))
+
+        self.assertEqual(len(jobs), 2)
+        self.assertEqual(jobs[0].arxiv, "cs.DC")
+        self.assertEqual(jobs[1].source_lang, "en")
+        for job in jobs:
+            self.assertEqual(job.target_langs, ["de", "zh"])
+            self.assertEqual(job.num_articles, 7)
+            self.assertFalse(job.jobs)
+
+    def test_load_jobs_invalid(self):
+        """Unit test for load_jobs: Unknown keys."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs_file = self._write_jobs(temp_dir, [{"arxiv_subject": "cs.DC"}])
+            with self.assertRaises(ValueError):
+                batch.load_jobs(jobs_file, vars(main.parse_args([])))
+
+    def test_load_jobs_process_keys(self):
+        """Unit test for load_jobs: Flags of the whole process are rejected."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for config in (
+                [{"arxiv": "cs.DC", "time_budget": 60}],
+                {"defaults": {"shard_dir": "/tmp/shards"}, "jobs": [{}]},
+            ):
+                jobs_file = self._write_jobs(temp_dir, config)
+                with self.assertRaises(ValueError):
+                    batch.load_jobs(jobs_file, vars(main.parse_args([])))
+
+    def test_run_jobs_news(self):
+        """Unit test for run_jobs: News titles of all jobs go first, in one batch."""
+        articles = [
+            {"title": f"Titel {i}", "content": f"Inhalt {i}."} for i in range(3)
+        ]
+        calls = []
+
+        class _Translator:
+            def __init__(self, src_lang, target_lang):
+                self.target_lang = target_lang
+
+            def translate(self, texts, profile="default"):
+                calls.append((profile, list(texts)))
+                return [f"{self.target_lang}:{text}" for text in texts]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs_file = self._write_jobs(
+                temp_dir,
+                {
+                    "defaults": {"output_root": temp_dir, "target_langs": ["en"]},
+                    "jobs": [{"num_articles": 2}, {"num_articles": 3}],
+                },
+            )
+            args = main.parse_args(["--jobs", jobs_file])
+
+            with (
+                mock.patch.object(
+                    pipe,
+                    "fetch_news",
+                    side_effect=lambda job: articles[: job.num_articles],
+                ),
+                mock.patch.object(pipe, "get_translator", side_effect=_Translator),
+                mock.patch.object(notify.Notifier, "send"),
+            ):
+                batch.run_jobs(args, github_token=None)
+
+        self.assertEqual(
+            [(profile, texts) for profile, texts in calls if profile != "word"][:3],
+            [
+                ("title", [a["title"] for a in articles[:2] + articles]),
+                ("content", ["Inhalt 0.", "Inhalt 1."]),
+                ("content", ["Inhalt 0.", "Inhalt 1.", "Inhalt 2."]),
+            ],
+        )
+
+    def test_run_jobs(self):
+        """Unit test for run_jobs: Titles are batched per model across jobs."""
+        df = pd.read_csv(os.path.join(_PWD, "testdata/arxiv-cs__PL.csv"), index_col=0)
+        papers = df.to_dict("records")
+        translators = {}
+
+        def _get_translator(src, target):
+            return translators.setdefault((src, target), _FakeTranslator(src, target))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs_file = self._write_jobs(
+                temp_dir,
+                {
+                    "defaults": {
+                        "output_root": temp_dir,
+                        "output_md": "_posts/arxiv/{year}/{month}",
+                        "output_csv": "csv/arxiv/{year}/{month}",
+                        "target_langs": ["de"],
+                    },
+                    "jobs": [{"arxiv": "cs.PL"}, {"arxiv": "cs.DC"}],
+                },
+            )
+            args = main.parse_args(["--jobs", jobs_file])
+
+            with (
+                mock.patch.object(pipe, "fetch_arxiv", return_value=papers),
+                mock.patch.object(pipe, "get_translator", side_effect=_get_translator),
+                mock.patch.object(notify.Notifier, "send") as send_email,
+            ):
+                batch.run_jobs(args, github_token=None)
+
+            self.assertEqual(list(translators), [("en", "de")])
+            self.assertEqual(len(translators["en", "de"].calls), 1)
+            self.assertEqual(len(translators["en", "de"].calls[0]), 2 * len(papers))
+            send_email.assert_called_once()
+            self.assertTrue(os.path.exists(history.get_index_path(temp_dir)))
+
+            for subject in ("cs__PL", "cs__DC"):
+                (csv_path,) = [
+                    os.path.join(root, f)
+                    for root, _, files in os.walk(os.path.join(temp_dir, "csv"))
+                    for f in files
+                    if subject in f
+                ]
+                output = pd.read_csv(csv_path)
+                self.assertEqual(
+                    list(output["title-de"]),
+                    [f"de:{title.upper()}" for title in df["title"]],
+                )
+
+    def test_run_jobs_unchanged(self):
+        """Unit test for run_jobs: Unchanged jobs are skipped on reruns."""
+        df = pd.read_csv(os.path.join(_PWD, "testdata/arxiv-cs__PL.csv"), index_col=0)
+        papers = df.to_dict("records")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs_file = self._write_jobs(
+                temp_dir,
+                {
+                    "defaults": {
+                        "output_root": temp_dir,
+                        "output_md": "_posts/arxiv/{year}/{month}",
+                        "output_csv": "csv/arxiv/{year}/{month}",
+                        "target_langs": ["de"],
+                    },
+                    "jobs": [{"arxiv": "cs.PL"}],
+                },
+            )
+            args = main.parse_args(["--jobs", jobs_file])
+
+            with (
+                mock.patch.object(pipe, "fetch_arxiv", return_value=papers),
+                mock.patch.object(
+                    pipe, "get_translator", side_effect=_FakeTranslator
+                ) as get_translator,
+                mock.patch.object(notify.Notifier, "send") as send_email,
+            ):
+                for _ in range(2):
+                    batch.run_jobs(args, github_token=None)
+
+            get_translator.assert_called_once()
+            send_email.assert_called_once()
+            self.assertTrue(
+                os.path.exists(utils.get_state_path(temp_dir, pipe.MANIFEST_FILE))
+            )
+
+    def test_add_state(self):
+        """Unit test for _add_state: Index and memories of each output root."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            roots = [os.path.join(temp_dir, name) for name in ("news", "arxiv")]
+            memory_path = os.path.join(roots[0], ".lingua_vitamin/memory/de-en.json")
+            outputs = {
+                (root, "user/repo", "main"): [("tag", "a.md", ["a.md"])]
+                for root in roots
+            }
+            with mock.patch.object(
+                pipe, "update_history", side_effect=lambda root: [f"{root}/index"]
+            ):
+                batch._add_state(outputs, [memory_path])
+
+            self.assertEqual(
+                outputs[roots[0], "user/repo", "main"][-1][2],
+                ["a.md", f"{roots[0]}/index", memory_path],
+            )
+            self.assertEqual(
+                outputs[roots[1], "user/repo", "main"][-1][2],
+                ["a.md", f"{roots[1]}/index"],
+            )
+
+    def test_publish_groups(self):
+        """Unit test for _publish_groups: PR urls per output root and repo."""
+        args = main.parse_args([])
+        outputs = {
+            ("/tmp/out", "user/repo-a", "main"): [],
+            ("/tmp/out", "user/repo-b", "main"): [],
+        }
+
+        def _publish_group(args, github_token, date_str, group, results):
+            return f"https://github.com/{group[1]}/pull/1"
+
+        with mock.patch.object(batch, "_publish_group", side_effect=_publish_group):
+            pr_urls = batch._publish_groups(args, None, outputs, "2025-06-01")
+        self.assertEqual(
+            pr_urls,
+            {
+                ("/tmp/out", "user/repo-a"): "https://github.com/user/repo-a/pull/1",
+                ("/tmp/out", "user/repo-b"): "https://github.com/user/repo-b/pull/1",
+            },
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
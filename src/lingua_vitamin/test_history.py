@@ -0,0 +1,113 @@
+"""Unit tests for history.py."""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from parameterized import parameterized
+
+from lingua_vitamin import history
+from lingua_vitamin.common import utils
+
+_PWD = os.path.dirname(os.path.abspath(__file__))
+
+
+def _copy(temp_dir, src, dst):
+    dst = os.path.join(temp_dir, dst)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copy(os.path.join(_PWD, "testdata", src), dst)
+    return dst
+
+
+class TestHistory(unittest.TestCase):
+    """Unit tests for history.py."""
+
+    @parameterized.expand(
+        (
+            ("csv/news/2025/06/2025-06-01--news-de.csv", ("2025-06-01", "news-de")),
+            ("news--de--2025-05-30.csv", ("2025-05-30", "news--de")),
+            ("misc.csv", (None, "misc")),
+        )
+    )
+    def test_parse_filename(self, path, expected):
+        """Unit test for _parse_filename."""
+        self.assertEqual(history._parse_filename(path), expected)
+
+    def test_update(self):
+        """Unit test for update and lookups."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            _copy(temp_dir, "news-de.csv", "csv/news/2025/06/2025-06-01--news-de.csv")
+            _copy(temp_dir, "news-en.csv", "csv/news/2025/06/2025-06-02--news-en.csv")
+            _copy(
+                temp_dir,
+                "arxiv-cs__PL.csv",
+                "csv/arxiv/2025/06/2025-06-01--arxiv-cs__PL.csv",
+            )
+
+            path = history.get_index_path(temp_dir)
+            self.assertEqual(history.update_index(temp_dir), 3)
+            # Incremental
+            self.assertEqual(history.update_index(temp_dir), 0)
+
+            with history.HistoryIndex(path) as index:
+                self.assertEqual(
+                    index.lookup_word("merz"),
+                    [
+                        (
+                            "2025-06-01",
+                            "csv/news/2025/06/2025-06-01--news-de.csv",
+                            0,
+                            "Merz",
+                        ),
+                        (
+                            "2025-06-01",
+                            "csv/news/2025/06/2025-06-01--news-de.csv",
+                            1,
+                            "Merz",
+                        ),
+                        (
+                            "2025-06-01",
+                            "csv/news/2025/06/2025-06-01--news-de.csv",
+                            2,
+                            "Merz",
+                        ),
+                    ],
+                )
+                self.assertEqual(
+                    [r[:3] for r in index.lookup_word("Mookie")],
+                    [("2025-06-02", "csv/news/2025/06/2025-06-02--news-en.csv", 1)],
+                )
+                # Translations are not indexed.
+                self.assertEqual(index.lookup_word("Thursday"), [])
+
+                expected = [
+                    (
+                        "2025-06-01",
+                        "arxiv-cs__PL",
+                        "csv/arxiv/2025/06/2025-06-01--arxiv-cs__PL.csv",
+                        1,
+                    )
+                ]
+                self.assertEqual(index.lookup_paper("2301.06136"), expected)
+                self.assertEqual(index.lookup_paper("2301.06136v5"), expected)
+                self.assertEqual(index.lookup_paper("2301.06136v4"), [])
+                self.assertEqual(len(index.lookup_word("neural")), 1)
+
+            # Checked out again, e.g. in a fresh clone: Unchanged by content.
+            for root, _, files in os.walk(os.path.join(temp_dir, "csv")):
+                for file in files:
+                    os.utime(os.path.join(root, file), (0, 0))
+            self.assertEqual(history.update_index(temp_dir), 0)
+
+            os.remove(
+                os.path.join(temp_dir, "csv/news/2025/06/2025-06-01--news-de.csv")
+            )
+            self.assertEqual(history.update_index(temp_dir), 0)
+            with history.HistoryIndex(path) as index:
+                self.assertEqual(index.lookup_word("merz"), [])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -1,15 +1,22 @@
 """Unit tests for pipe.py."""
 
+import argparse
+import itertools
+import json
 import logging
 import os
 import tempfile
 import unittest
+from unittest import mock
 
 import pandas as pd
 from parameterized import parameterized
 
+from lingua_vitamin import archive
 from lingua_vitamin import pipe
+from lingua_vitamin.common import deadline
 from lingua_vitamin.common import utils
+from lingua_vitamin.translate import lexicon
 
 
 _PWD = os.path.dirname(os.path.abspath(__file__))
@@ -255,6 +262,382 @@ class TestPipe(unittest.TestCase):
             logging.debug("File `%s`: <<<%s>>>", csv_path, utils.load_file(csv_path))
             self.assertEqual(utils.load_file(md_path).strip(), expected_content)
 
+    def test_translate_words(self):
+        """Unit test for translate_words: Dictionary first, learning back."""
+        translator = mock.Mock()
+        translator.translate.side_effect = lambda texts, profile: [
+            "" if text == "Haus" else text.upper() for text in texts
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lexicon_path = os.path.join(temp_dir, "de-en.tsv")
+            with mock.patch.object(pipe, "get_translator", return_value=translator):
+                for _ in range(2):
+                    self.assertEqual(
+                        pipe.translate_words(
+                            ["Merz", "Haus", "Merz"],
+                            "de",
+                            "en",
+                            lexicon_path=lexicon_path,
+                        ),
+                        ["MERZ", "", "MERZ"],
+                    )
+
+        # Unknown words go to the model once, while empty outputs are kept
+        # out of the lexicon.
+        self.assertEqual(
+            [c.args[0] for c in translator.translate.call_args_list],
+            [["Merz", "Haus"], ["Haus"]],
+        )
+
+    def test_translate_words_deadline(self):
+        """Unit test for translate_words: Known words only, beyond the budget."""
+        translator = mock.Mock()
+        translator.translate.side_effect = lambda texts, profile: [
+            text.upper() for text in texts
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lexicon_path = os.path.join(temp_dir, "de-en.tsv")
+            with mock.patch.object(pipe, "get_translator", return_value=translator):
+                pipe.translate_words(["Merz"], "de", "en", lexicon_path=lexicon_path)
+                self.assertEqual(
+                    pipe.translate_words(
+                        ["Merz", "Haus"],
+                        "de",
+                        "en",
+                        lexicon_path=lexicon_path,
+                        deadline=deadline.Deadline(
+                            1, clock=itertools.chain([0], itertools.repeat(2)).__next__
+                        ),
+                    ),
+                    ["MERZ", deadline.PLACEHOLDER],
+                )
+
+            # Placeholders are not learned.
+            with lexicon.Lexicon(lexicon_path) as lex:
+                self.assertEqual(list(lex.items()), [("Merz", "MERZ")])
+        self.assertEqual(translator.translate.call_count, 1)
+
+    def test_translate_news(self):
+        """Unit test for _translate_news: Batched, with per-article skips."""
+        articles = [
+            {"title": "Merz in Berlin", "content": "Ein langer Text."},
+            {"title": "LONG Titel", "content": "Kurz."},
+            {"title": "Trump", "content": "LONG Inhalt"},
+            {"title": "Kanzler", "content": " "},
+        ]
+
+        class _Translator:
+            """Fail on batches with `LONG` texts, for `zh` only."""
+
+            def __init__(self, target):
+                self.target = target
+                self.calls = []
+
+            def translate(self, texts, profile="default"):
+                self.calls.append((profile, list(texts)))
+                if self.target == "zh" and any("LONG" in t for t in texts):
+                    return None
+                return [f"{self.target}:{text}" for text in texts]
+
+        translators = {t: _Translator(t) for t in ("en", "zh")}
+        with mock.patch.object(
+            pipe, "get_translator", side_effect=lambda _, t: translators[t]
+        ):
+            results = pipe._translate_news(articles, "de", ("en", "zh"))
+
+        # One batch of titles, and one of non-empty contents by length.
+        self.assertEqual(
+            translators["en"].calls,
+            [
+                ("title", [a["title"] for a in articles]),
+                ("content", ["Kurz.", "LONG Inhalt", "Ein langer Text."]),
+            ],
+        )
+        self.assertEqual(len(results), 4)
+        self.assertEqual(
+            results["title-zh"], ["zh:Merz in Berlin", None, None, "zh:Kanzler"]
+        )
+        self.assertEqual(
+            results[0],
+            {
+                "title": "Merz in Berlin",
+                "content": "Ein langer Text.",
+                "title-en": "en:Merz in Berlin",
+                "content-en": "en:Ein langer Text.",
+                "title-zh": "zh:Merz in Berlin",
+                "content-zh": "zh:Ein langer Text.",
+            },
+        )
+        self.assertEqual(results[3]["content-zh"], "")
+        # Translations go into a copy.
+        self.assertNotIn("title-en", pipe.article_batch.ArticleBatch.of(articles))
+
+    def test_translate_news_lang(self):
+        """Unit test for _translate_news: By the models of detected languages."""
+        articles = [
+            {"title": "Merz in Berlin", "content": "Ein Text.", "lang": "de"},
+            {"title": "Biden in Rome", "content": "A text.", "lang": "en"},
+            {"title": "Macron à Paris", "content": "", "lang": "fr"},
+            {"title": "Trump", "content": "Kurz.", "lang": "de"},
+        ]
+        calls = []
+
+        class _Translator:
+            def __init__(self, source, target):
+                if (source, target) == ("fr", "zh"):
+                    raise OSError("Offline.")
+                self.source, self.target = source, target
+
+            def translate(self, texts, profile="default"):
+                calls.append((self.source, self.target, profile, list(texts)))
+                return [f"{self.target}:{text}" for text in texts]
+
+        with mock.patch.object(pipe, "get_translator", side_effect=_Translator):
+            results = pipe._translate_news(articles, "de", ("en", "zh"))
+
+        self.assertEqual(
+            [c for c in calls if c[1] == "en"],
+            [
+                ("de", "en", "title", ["Merz in Berlin", "Trump"]),
+                ("fr", "en", "title", ["Macron à Paris"]),
+                ("de", "en", "content", ["Kurz.", "Ein Text."]),
+            ],
+        )
+        self.assertEqual(len(calls), 7)
+        # Kept as is in its own language.
+        self.assertEqual(
+            (results["title-en"][1], results["content-en"][1]),
+            ("Biden in Rome", "A text."),
+        )
+        self.assertEqual(results["title-zh"][1], "zh:Biden in Rome")
+        self.assertEqual(results["content-en"][2], "")
+        # Failed to load: Failed for its items only.
+        self.assertEqual(
+            (results["title-zh"][2], results["content-zh"][2]), (None, None)
+        )
+        self.assertEqual(results["title-en"][2], "en:Macron à Paris")
+
+    def test_translate_news_deadline(self):
+        """Unit test for _translate_news: Titles first, then placeholders."""
+        articles = [
+            {"title": "Merz in Berlin", "content": "Ein langer Text."},
+            {"title": "Trump", "content": "Kurz."},
+            {"title": "Kanzler", "content": ""},
+        ]
+        clock, calls = [0.0], []
+
+        class _Translator:
+            """One second per text."""
+
+            def __init__(self, target):
+                self.target = target
+
+            def translate(self, texts, profile="default"):
+                calls.append((self.target, profile))
+                clock[0] += len(texts)
+                return [f"{self.target}:{text}" for text in texts]
+
+        dl = deadline.Deadline(7, clock=lambda: clock[0])
+        with mock.patch.object(
+            pipe, "get_translator", side_effect=lambda _, t: _Translator(t)
+        ):
+            results = pipe._translate_news(articles, "de", ("en", "zh"), deadline=dl)
+
+        self.assertEqual(calls, [("en", "title"), ("zh", "title"), ("en", "content")])
+        self.assertEqual(
+            results["title-zh"], ["zh:Merz in Berlin", "zh:Trump", "zh:Kanzler"]
+        )
+        self.assertEqual(
+            results["content-zh"], [deadline.PLACEHOLDER, deadline.PLACEHOLDER, ""]
+        )
+        self.assertEqual(results[0]["content-en"], "en:Ein langer Text.")
+        self.assertEqual(dict(dl.skipped), {"content": 2})
+
+    def test_translate_titles_deadline(self):
+        """Unit test for _translate_titles: Batches beyond the budget are skipped."""
+        clock, calls = [0.0], []
+
+        class _Translator:
+            """One second per text."""
+
+            def translate(self, texts, profile="default"):
+                calls.append(list(texts))
+                clock[0] += len(texts)
+                return [f"en:{text}" for text in texts]
+
+        dl = deadline.Deadline(3, clock=lambda: clock[0])
+        titles = [f"Titel {i}" for i in range(6)]
+        with mock.patch.object(pipe.autotune, "get_batch_size", return_value=2):
+            results = pipe._translate_titles(_Translator(), titles, deadline=dl)
+
+        self.assertEqual(calls, [["Titel 0", "Titel 1"]])
+        self.assertEqual(
+            results, ["en:Titel 0", "en:Titel 1"] + [deadline.PLACEHOLDER] * 4
+        )
+        self.assertEqual(dict(dl.skipped), {"title": 4})
+
+    def test_run_news_stage_cache(self):
+        """Unit test for run_news: Reruns skip unchanged stages."""
+        articles = [
+            {"title": "Merz in Berlin", "content": "Ein langer Text."},
+            {"title": "Kanzler", "content": "Kurz."},
+        ]
+        calls = []
+
+        class _Translator:
+            model_name = "opus-mt"
+
+            def __init__(self, target):
+                self.target = target
+
+            def translate(self, texts, profile="default"):
+                calls.append((self.target, profile))
+                return [f"{self.target}:{text}" for text in texts]
+
+        def _run_news(args, md_path, csv_path):
+            cache = pipe.get_stage_cache(args)
+            files = pipe.run_news(
+                args, md_path, csv_path, "2025-06-01", articles=articles, cache=cache
+            )
+            self.assertEqual(files[:2], (md_path, csv_path))
+            self.assertIn(
+                os.path.join(archive.get_page_dir(temp_dir, "news-de"), "2025-06.md"),
+                files,
+            )
+            return cache
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            args = argparse.Namespace(
+                source_lang="de",
+                target_langs=["en", "zh"],
+                arxiv="",
+                output_root=temp_dir,
+                output_md="_posts/news/markdown",
+                vocab_max_words=0,
+            )
+            md_path = os.path.join(temp_dir, "2025-06-01--news-de.md")
+            csv_path = os.path.join(temp_dir, "2025-06-01--news-de.csv")
+            with mock.patch.object(
+                pipe, "get_translator", side_effect=lambda _, t: _Translator(t)
+            ):
+                cache = _run_news(args, md_path, csv_path)
+                self.assertEqual(cache.hits, [])
+                self.assertEqual(len(calls), 6)
+                md_content = utils.load_file(md_path)
+
+                # Nothing changed: Nothing is run.
+                cache = _run_news(args, md_path, csv_path)
+                self.assertEqual(
+                    sorted(cache.hits),
+                    ["render-news", "translate-news", "translate-news", "vocab"],
+                )
+                self.assertEqual(cache.misses, [])
+                self.assertEqual(len(calls), 6)
+                self.assertEqual(utils.load_file(md_path), md_content)
+
+                # Rendering changed: Re-rendered without translations.
+                with mock.patch.object(pipe, "_TEMPLATE", "# NEW TITLE\n"):
+                    cache = _run_news(args, md_path, csv_path)
+                self.assertEqual(cache.misses, ["render-news"])
+                self.assertEqual(len(calls), 6)
+                self.assertTrue(utils.load_file(md_path).startswith("# NEW"))
+
+                # Disabled: Everything is run.
+                args.stage_cache = False
+                cache = _run_news(args, md_path, csv_path)
+                self.assertEqual(cache.hits, [])
+                # Words are known from the lexicon by now.
+                self.assertEqual(len([c for c in calls if c[1] != "word"]), 8)
+
+    def test_run_news_dedup(self):
+        """Unit test for run_news: News are recorded once a run is complete."""
+        articles = [
+            {"title": "Merz in Berlin", "content": "Ein langer Text."},
+            {"title": "Kanzler", "content": "Kurz."},
+        ]
+        clock = [0.0]
+
+        class _Translator:
+            def __init__(self, target):
+                self.target = target
+
+            def translate(self, texts, profile="default"):
+                return [f"{self.target}:{text}" for text in texts]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            args = argparse.Namespace(
+                source_lang="de",
+                target_langs=["en"],
+                arxiv="",
+                output_root=temp_dir,
+                output_md="_posts/news/markdown",
+                vocab_max_words=0,
+                dedup_threshold=0.7,
+                dedup_days=7,
+            )
+            md_path = os.path.join(temp_dir, "2025-06-01--news-de.md")
+            csv_path = os.path.join(temp_dir, "2025-06-01--news-de.csv")
+            dedup_path = pipe._get_dedup_path(args)
+            with mock.patch.object(
+                pipe, "get_translator", side_effect=lambda _, t: _Translator(t)
+            ):
+                # Over the time budget: Redone by the next run.
+                dl = deadline.Deadline(1, clock=lambda: clock[0])
+                clock[0] = 2.0
+                files = pipe.run_news(
+                    args, md_path, csv_path, _DATE, articles=articles, deadline=dl
+                )
+                self.assertNotIn(dedup_path, files)
+                self.assertFalse(os.path.exists(dedup_path))
+
+                files = pipe.run_news(args, md_path, csv_path, _DATE, articles=articles)
+            self.assertIn(dedup_path, files)
+            with open(dedup_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+            self.assertEqual(
+                [entry["title"] for entry in entries], ["Merz in Berlin", "Kanzler"]
+            )
+
+    @parameterized.expand(((0,), (2,), (5,)))
+    def test_run_vocab_max_words(self, max_words):
+        """Unit test for run_vocab: Same outputs with counts spilled to disk."""
+        translations = {}
+        for line in _MD_CONTENT_DE_VOCAB.split("\n")[7:]:
+            _, _, word, en, zh, _ = line.split(" | ")
+            translations[word] = {"en": en, "zh": zh}
+
+        class _Translator:
+            def __init__(self, target):
+                self.target = target
+
+            def translate(self, texts, profile="default"):
+                return [translations[text][self.target] for text in texts]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "test.csv")
+            md_path = os.path.join(temp_dir, "test.md")
+            df = pd.read_csv(os.path.join(_PWD, "testdata/news-de.csv"))
+            with mock.patch.object(
+                pipe, "get_translator", side_effect=lambda _, t: _Translator(t)
+            ):
+                pipe.run_vocab(
+                    df["title-de"],
+                    "de",
+                    ("en", "zh"),
+                    csv_path,
+                    md_path,
+                    "2025-06-01",
+                    max_words=max_words,
+                )
+
+            self.assertEqual(utils.load_file(md_path).strip(), _MD_CONTENT_DE_VOCAB)
+            self.assertEqual(
+                list(pd.read_csv(csv_path, index_col=0).columns),
+                ["count", "example", "word-de", "word-en", "word-zh"],
+            )
+
     @parameterized.expand(
         (
             ("de", ("en", "zh"), "testdata/news-de.csv", _MD_CONTENT_DE),
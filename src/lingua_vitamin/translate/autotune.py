@@ -0,0 +1,246 @@
+"""Auto-tune batch sizes and torch threads per (model, workload) and hardware.
+
+On the first batch of a workload, e.g. `title` or `word`, a model without a
+tuned config is calibrated on a short sample of the texts at hand: Throughput
+is measured for candidate batch sizes and thread counts, up to a memory
+ceiling on the resident memory while each candidate runs, and the fastest
+config is persisted per kind of hardware, rather than per host name, so that
+ephemeral CI runners reuse it. Samples too short to try large batches are not
+calibrated on, so that their small batch sizes are never persisted. Mid-run,
+batches shrink by half whenever the resident memory goes above the ceiling,
+and the smaller batch size is persisted too.
+"""
+
+import functools
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from typing import Dict, List, Sequence
+
+import torch
+
+from lingua_vitamin.common import utils
+
+TUNING_FILE = "autotune.json"
+
+BATCH_SIZES = (1, 4, 16, 64, 256)
+# Calibration needs a sample of at least this many texts.
+MIN_CALIBRATION_TEXTS = 64
+# Calibration stops at a candidate slower than this.
+MAX_CALIBRATION_SECONDS = 30.0
+# Default memory ceiling, as a fraction of physical memory.
+MEMORY_FRACTION = 0.8
+
+# Set by `--autotune` for batches of `pipe.py`.
+TUNER = None
+
+
+def get_host() -> str:
+    """Hardware key of tuned configs: CPUs, memory, torch threads and device.
+
+    Host names are left out, as runners of the same hardware, e.g. ephemeral CI
+    runners, share tuned configs.
+    """
+    memory_gb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**30
+    device = torch.cuda.get_device_name(0) if torch.cuda.is_available() else "cpu"
+    return (
+        f"{platform.machine()}-{os.cpu_count()}cpu-{memory_gb:.0f}gb-"
+        f"{torch.get_num_threads()}threads-{device}"
+    )
+
+
+def get_memory_limit_mb() -> float:
+    """Default memory ceiling in MB."""
+    total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+    return MEMORY_FRACTION * total
+
+
+def get_thread_counts() -> List[int]:
+    """Candidate torch thread counts: All CPUs, and halves of them."""
+    counts, count = [], os.cpu_count() or 1
+    while count >= 1 and len(counts) < 3:
+        counts.append(count)
+        count //= 2
+    return counts
+
+
+def _get_rss_mb() -> float:
+    return utils.get_memory_usage().get("rss_mb", 0)
+
+
+def measure_peak_rss(func, interval: float = 0.01):
+    """Run a function: Return its result, and the peak resident memory in MB.
+
+    The memory is sampled while the function runs, rather than the peak of the
+    process so far, which never goes down again after a large batch.
+    """
+    peak = [_get_rss_mb()]
+    done = threading.Event()
+
+    def _sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], _get_rss_mb())
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    try:
+        result = func()
+    finally:
+        done.set()
+        sampler.join()
+    return result, max(peak[0], _get_rss_mb())
+
+
+class Tuner:
+    """Tuned configs of a host, persisted in a json file."""
+
+    def __init__(
+        self,
+        path: str,
+        memory_limit_mb: float = 0,
+        calibrate: bool = True,
+        host: str = None,
+    ):
+        self.path = path
+        self.memory_limit_mb = memory_limit_mb or get_memory_limit_mb()
+        self.calibrate = calibrate
+        self.host = host or get_host()
+        self.configs: Dict[str, Dict[str, dict]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.configs = json.load(f)
+
+    def save(self) -> str:
+        """Save tuned configs: Return the path."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.configs, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+        return self.path
+
+    def get(self, model_name: str, workload: str) -> dict:
+        """Tuned config of a (model, workload) on this host, or None."""
+        return self.configs.get(self.host, {}).get(f"{model_name}|{workload}")
+
+    def set(self, model_name: str, workload: str, config: dict) -> None:
+        """Persist a config of a (model, workload) on this host."""
+        self.configs.setdefault(self.host, {})[f"{model_name}|{workload}"] = config
+        self.save()
+
+    def over_limit(self) -> bool:
+        """Whether the resident memory is above the ceiling."""
+        return _get_rss_mb() > self.memory_limit_mb
+
+    def tune(self, trans, workload: str, texts: Sequence[str], profile: str) -> dict:
+        """Calibrate on a short sample of texts: Return the fastest config.
+
+        Batch sizes are tried in increasing order per thread count, until a
+        batch goes above the memory ceiling, takes too long, or is no faster.
+        """
+        sample = list(texts[: max(BATCH_SIZES)])
+        threads = torch.get_num_threads()
+        best = None
+        try:
+            for num_threads in get_thread_counts():
+                torch.set_num_threads(num_threads)
+                prev = 0.0
+                for batch_size in BATCH_SIZES:
+                    if batch_size > len(sample) and batch_size > BATCH_SIZES[0]:
+                        break
+
+                    begin = time.time()
+                    results, rss_mb = measure_peak_rss(
+                        functools.partial(
+                            trans.translate, sample[:batch_size], profile=profile
+                        )
+                    )
+                    if results is None:
+                        break
+                    seconds = time.time() - begin
+                    throughput = min(batch_size, len(sample)) / max(seconds, 1e-6)
+                    logging.info(
+                        "[%s] bs = %d, threads = %d: %.2f texts/s, %.0f MB.",
+                        workload,
+                        batch_size,
+                        num_threads,
+                        throughput,
+                        rss_mb,
+                    )
+                    if rss_mb > self.memory_limit_mb:
+                        break
+                    if best is None or throughput > best["throughput"]:
+                        best = {
+                            "batch_size": batch_size,
+                            "num_threads": num_threads,
+                            "throughput": throughput,
+                            "rss_mb": rss_mb,
+                        }
+                    if throughput <= prev or seconds > MAX_CALIBRATION_SECONDS:
+                        break
+                    prev = throughput
+        finally:
+            torch.set_num_threads(threads)
+        return best
+
+    def get_batch_size(
+        self, trans, workload: str, texts: Sequence[str], default: int, profile: str
+    ) -> int:
+        """Batch size of a workload, tuned unless known: Threads are set too."""
+        model_name = getattr(trans, "model_name", None)
+        if not model_name:
+            return default
+
+        config = self.get(model_name, workload)
+        if config is None and self.calibrate and len(texts) >= MIN_CALIBRATION_TEXTS:
+            config = self.tune(trans, workload, texts, profile)
+            if config:
+                self.set(model_name, workload, config)
+        if not config:
+            return default
+
+        torch.set_num_threads(config["num_threads"])
+        return config["batch_size"]
+
+    def shrink(self, trans, workload: str, batch_size: int) -> int:
+        """Half the batch size above the memory ceiling, persisted if tuned."""
+        if batch_size <= 1 or not self.over_limit():
+            return batch_size
+
+        new_size = max(1, batch_size // 2)
+        logging.warning(
+            "[%s] Memory above %.0f MB: bs = %d -> %d.",
+            workload,
+            self.memory_limit_mb,
+            batch_size,
+            new_size,
+        )
+        model_name = getattr(trans, "model_name", None)
+        config = self.get(model_name, workload) if model_name else None
+        if config and config["batch_size"] > new_size:
+            self.set(model_name, workload, {**config, "batch_size": new_size})
+        return new_size
+
+
+def get_path(output_root: str) -> str:
+    """Path of tuned configs."""
+    return utils.get_state_path(output_root, TUNING_FILE)
+
+
+def get_batch_size(
+    trans, workload: str, texts: Sequence[str], default: int, profile: str = None
+) -> int:
+    """Batch size of a workload by `TUNER`, or the default without one."""
+    if TUNER is None:
+        return default
+    return TUNER.get_batch_size(trans, workload, texts, default, profile or workload)
+
+
+def shrink(trans, workload: str, batch_size: int) -> int:
+    """Batch size under memory pressure by `TUNER`, the same without one."""
+    if TUNER is None:
+        return batch_size
+    return TUNER.shrink(trans, workload, batch_size)
@@ -0,0 +1,182 @@
+"""Bilingual lexicon for vocab words: A memory-mapped sorted string table.
+
+A lexicon file has one `word<TAB>translation` line per word, sorted by word in
+UTF-8 byte order, so that lookups are binary searches over a memory map: No
+loading, and microseconds per word. Words are translated dictionary first,
+only unknown ones go to the model, and model outputs are learned back.
+
+    python -m lingua_vitamin.translate.lexicon --output_root /tmp/LinguaVitaminNews \
+        --source_lang de --target_lang en import dict-de-en.tsv
+    python -m lingua_vitamin.translate.lexicon --output_root /tmp/LinguaVitaminNews \
+        --source_lang de --target_lang en lookup Kanzler Merz
+"""
+
+import argparse
+import heapq
+import logging
+import mmap
+import os
+import sys
+import tempfile
+from typing import Dict, Iterable, Iterator, Tuple
+
+from lingua_vitamin.common import utils
+
+LEXICON_DIR = "lexicon"
+
+
+def get_path(lexicon_dir: str, source_lang: str, target_lang: str) -> str:
+    """Get the lexicon path of a language pair."""
+    return os.path.join(lexicon_dir, f"{source_lang}-{target_lang}.tsv")
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+class Lexicon:
+    """Word translations from a sorted string table, plus learned ones."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._learned: Dict[str, str] = {}
+        self._file = None
+        self._mmap = None
+        self._open()
+
+    def _open(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            self._file = open(self.path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """Close the memory map."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+        self._mmap = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _find(self, key: bytes) -> bytes:
+        """Binary search over line starts of the memory map."""
+        table = self._mmap
+        lo, hi = 0, len(table)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = table.rfind(b"\n", 0, mid) + 1
+            end = table.find(b"\n", mid)
+            if end < 0:
+                end = len(table)
+
+            word, _, translation = table[start:end].partition(b"\t")
+            if word == key:
+                return translation
+            if word < key:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def get(self, word: str) -> str:
+        """Get the translation of a word, or None if unknown."""
+        if word in self._learned:
+            return self._learned[word]
+        if self._mmap is None or not word:
+            return None
+
+        translation = self._find(word.encode("utf-8"))
+        return None if translation is None else translation.decode("utf-8")
+
+    def learn(self, translations: Dict[str, str]) -> int:
+        """Learn non-empty translations, kept in memory until `save()`."""
+        count = 0
+        for word, translation in translations.items():
+            word, translation = _clean(word or ""), _clean(translation or "")
+            if word and translation:
+                self._learned[word] = translation
+                count += 1
+        return count
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """All (word, translation) on disk, in order."""
+        if self._mmap is None:
+            return
+        for line in iter(self._mmap.readline, b""):
+            word, _, translation = line.rstrip(b"\n").partition(b"\t")
+            yield word.decode("utf-8"), translation.decode("utf-8")
+        self._mmap.seek(0)
+
+    def save(self) -> str:
+        """Merge learned translations into the table on disk: Return its path."""
+        if not self._learned:
+            return self.path
+
+        learned = sorted(self._learned.items())
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self.path))
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            # Learned entries come first on ties, and win.
+            merged = heapq.merge(
+                ((w, 0, t) for w, t in learned),
+                ((w, 1, t) for w, t in self.items()),
+            )
+            prev = None
+            for word, _, translation in merged:
+                if word != prev:
+                    f.write(f"{word}\t{translation}\n")
+                    prev = word
+
+        self.close()
+        os.replace(temp_path, self.path)
+        logging.info("Learned %d words into `%s`.", len(learned), self.path)
+        self._learned = {}
+        self._open()
+        return self.path
+
+
+def read_tsv(paths: Iterable[str]) -> Dict[str, str]:
+    """Read `word<TAB>translation` lines, e.g. of a dictionary export."""
+    translations = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                word, _, translation = line.rstrip("\n").partition("\t")
+                translations[word] = translation
+    return translations
+
+
+def main(argv=None):
+    """Main."""
+    parser = argparse.ArgumentParser(description="LinguaVitamin vocab lexicon")
+    parser.add_argument("--output_root", type=str, default="")
+    parser.add_argument("--source_lang", type=str, default="de")
+    parser.add_argument("--target_lang", type=str, default="en")
+    parser.add_argument("command", choices=("import", "lookup"))
+    parser.add_argument("keys", nargs="*", help="TSV files to import, or words")
+    args = parser.parse_args(argv)
+
+    path = get_path(
+        utils.get_state_path(args.output_root, LEXICON_DIR),
+        args.source_lang,
+        args.target_lang,
+    )
+    with Lexicon(path) as lexicon:
+        if args.command == "import":
+            logging.info("Importing %d words.", lexicon.learn(read_tsv(args.keys)))
+            lexicon.save()
+            return
+
+        for word in args.keys:
+            print(f"{word}\t{lexicon.get(word) or ''}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    main(sys.argv[1:])
@@ -0,0 +1,312 @@
+"""Sentence-level translation memory for near-repeat sentences.
+
+Much of the input is templated, e.g. boilerplate sentences of arXiv abstracts,
+stock phrasing of institutional feeds, or `Article URL / Comments URL / Points`
+of hacker-news. Texts are split into sentences, and each sentence is looked up
+in a memory of past model translations per language pair: Candidates come from
+a MinHash LSH index, and are verified by a token diff. A candidate is reused if
+its match score is high enough, and if it only differs by numbers, names or
+protected spans (see `protect.py`) which its translation carries verbatim: They
+are substituted, e.g. `Points: 12` -> `Punkte: 12` gives `Points: 7` ->
+`Punkte: 7`. Only novel sentences go to the model, and are learned back.
+"""
+
+import difflib
+import functools
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from lingua_vitamin.common import minhash
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import protect
+
+MEMORY_DIR = "memory"
+
+DEFAULT_MIN_SCORE = 0.8
+# Most recent sentences kept per language pair.
+MAX_ENTRIES = 200000
+
+# Set by `--memory_min_score` for translators of `pipe.py`: Output root, and
+# match score of reused sentences.
+ROOT = None
+MIN_SCORE = DEFAULT_MIN_SCORE
+
+_NUM_PERM = 64
+# LSH recall of candidates, verified by token diffs against `min_score`.
+_LSH_THRESHOLD = 0.5
+_MAX_CANDIDATES = 5
+# Languages written without spaces between sentences.
+_NO_SPACES = ("zh",)
+
+_MEMORIES: Dict[tuple, "TranslationMemory"] = {}
+
+_SENTENCES = re.compile(r"((?<=[.!?。！？])\s+|\s*\n\s*)")
+_NUMBER = re.compile(r"\d+(?:[.,:/]\d+)*")
+_TOKENS = re.compile(rf"{protect.SPANS.pattern}|{_NUMBER.pattern}|\w+|[^\w\s]")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a text into sentences, by end punctuation or line breaks."""
+    return _SENTENCES.split(text.strip())[::2] if text and text.strip() else []
+
+
+def _join(sentences: List[str], text: str, joiner: str) -> str:
+    """Join translated sentences of a text, with its line breaks."""
+    separators = _SENTENCES.split(text.strip())[1::2]
+    parts = [sentences[0]]
+    for separator, sentence in zip(separators, sentences[1:]):
+        parts += ["\n" * separator.count("\n") or joiner, sentence]
+    return "".join(parts)
+
+
+def _tokens(sentence: str) -> List[str]:
+    return _TOKENS.findall(sentence)
+
+
+def _is_slot(token: str) -> bool:
+    """Whether a token may be substituted: Numbers, names, protected spans."""
+    return bool(
+        _NUMBER.fullmatch(token)
+        or token[:1].isupper()
+        or protect.SPANS.fullmatch(token)
+    )
+
+
+def _count(token: str, text: str) -> int:
+    return len(re.findall(rf"(?<!\w){re.escape(token)}(?!\w)", text))
+
+
+def substitute(source: str, match: str, translation: str) -> Tuple[float, str]:
+    """Translate `source` from a translation of a similar sentence `match`.
+
+    Return (match score, translation), with a translation of None if they
+    differ by more than numbers, names or protected spans carried verbatim by
+    the translation.
+    """
+    old, new = _tokens(match), _tokens(source)
+    # Numbers do not lower the score.
+    matcher = difflib.SequenceMatcher(
+        None,
+        [_NUMBER.sub("0", t) for t in old],
+        [_NUMBER.sub("0", t) for t in new],
+        autojunk=False,
+    )
+    score = matcher.ratio()
+
+    pairs = {}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag not in ("equal", "replace") or i2 - i1 != j2 - j1:
+            return score, None
+        for a, b in zip(old[i1:i2], new[j1:j2]):
+            if a == b:
+                continue
+            if not (_is_slot(a) and _is_slot(b)) or pairs.get(a, b) != b:
+                return score, None
+            pairs[a] = b
+
+    # Each substituted token once, so that it is unambiguous.
+    if any(_count(a, translation) != 1 for a in pairs):
+        return score, None
+    for i, a in enumerate(pairs):
+        translation = re.sub(rf"(?<!\w){re.escape(a)}(?!\w)", f"\0{i}\0", translation)
+    for i, b in enumerate(pairs.values()):
+        translation = translation.replace(f"\0{i}\0", b)
+    return score, translation
+
+
+class TranslationMemory:
+    """Past model translations of sentences, with a near-repeat index.
+
+    Sentences are kept in a json file at `path` if given.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        min_score: float = DEFAULT_MIN_SCORE,
+        target_lang: str = None,
+    ):
+        self.path = path
+        self.min_score = min_score
+        self.joiner = "" if target_lang in _NO_SPACES else " "
+        self.stats: Dict[str, int] = {"exact": 0, "fuzzy": 0, "novel": 0}
+
+        self._minhash = minhash.MinHash(num_perm=_NUM_PERM)
+        self._index = minhash.LSHIndex(num_perm=_NUM_PERM, threshold=_LSH_THRESHOLD)
+        self._entries: List[Tuple[str, str]] = []
+        self._exact: Dict[str, int] = {}
+        self._num_learned = 0
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for source, translation in json.load(f):
+                    self._add(source, translation)
+            logging.info("Loaded %d sentences from `%s`.", len(self), path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _signature(self, sentence: str):
+        # Numbers do not tell sentences apart.
+        return self._minhash.signature(minhash.shingles(_NUMBER.sub("0", sentence)))
+
+    def _add(self, source: str, translation: str):
+        if source in self._exact:
+            self._entries[self._exact[source]] = (source, translation)
+            return
+
+        self._exact[source] = len(self._entries)
+        self._index.add(len(self._entries), self._signature(source))
+        self._entries.append((source, translation))
+
+    def add(self, source: str, translation: str) -> None:
+        """Learn a model translation of a sentence."""
+        if source and translation:
+            self._add(source, translation)
+            self._num_learned += 1
+
+    def lookup(self, sentence: str) -> Optional[str]:
+        """Translation of a sentence from its best match, or None."""
+        if sentence in self._exact:
+            self.stats["exact"] += 1
+            return self._entries[self._exact[sentence]][1]
+
+        matches = self._index.query(self._signature(sentence))
+        for key, _ in matches[:_MAX_CANDIDATES]:
+            match, translation = self._entries[key]
+            score, translation = substitute(sentence, match, translation)
+            if translation is not None and score >= self.min_score:
+                logging.debug("Reused (%.2f): `%s` ~ `%s`.", score, sentence, match)
+                self.stats["fuzzy"] += 1
+                return translation
+        return None
+
+    def _group(self, sentences: List[str]) -> Tuple[List[str], List[str]]:
+        """Split sentences into (novel ones, near repeats of novel ones)."""
+        seen = TranslationMemory(min_score=self.min_score)
+        novel, repeats = [], []
+        for sentence in sentences:
+            # Sources carry all their tokens, as if they were translations.
+            if seen.lookup(sentence) is None:
+                seen.add(sentence, sentence)
+                novel.append(sentence)
+            else:
+                repeats.append(sentence)
+        return novel, repeats
+
+    def translate(self, func, texts: List[str]) -> List[str]:
+        """Translate texts by a batch function, with known sentences reused.
+
+        Novel sentences of all texts go to `func` in batches, and are learned
+        back: Near repeats within texts are sent only if the translation of
+        their first one cannot be reused. Return None on failures.
+        """
+        splits = [split_sentences(text) for text in texts]
+        known = {}
+        for sentence in dict.fromkeys(s for sentences in splits for s in sentences):
+            translation = self.lookup(sentence)
+            if translation is not None:
+                known[sentence] = translation
+
+        pending = [
+            s
+            for s in dict.fromkeys(s for sentences in splits for s in sentences)
+            if s not in known
+        ]
+        # Near repeats within the batch: One of them goes to the model first.
+        while pending:
+            novel, repeats = self._group(pending)
+            self.stats["novel"] += len(novel)
+            results = func(novel)
+            if results is None:
+                return None
+            for source, translation in zip(novel, results):
+                self.add(source, translation)
+                known[source] = translation
+
+            pending = []
+            for sentence in repeats:
+                translation = self.lookup(sentence)
+                if translation is None:
+                    pending.append(sentence)
+                else:
+                    known[sentence] = translation
+
+        return [
+            (
+                _join([known[s] for s in sentences], text, self.joiner)
+                if sentences
+                else text
+            )
+            for text, sentences in zip(texts, splits)
+        ]
+
+    def save(self) -> str:
+        """Save the most recent sentences into its json file: Return the path."""
+        if not self.path or not self._num_learned:
+            return self.path
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries[-MAX_ENTRIES:], f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self._num_learned = 0
+        logging.info(
+            "Saved %d sentences into `%s`: %s.", len(self), self.path, self.stats
+        )
+        return self.path
+
+
+class MemoryTranslator:
+    """A translator whose texts go through a translation memory first."""
+
+    def __init__(self, trans, memory: TranslationMemory):
+        self.trans = trans
+        self.memory = memory
+
+    def __getattr__(self, name):
+        return getattr(self.trans, name)
+
+    def translate(self, texts: List[str], profile: str = "default") -> List[str]:
+        """Translate by the memory, and the wrapped translator for novel ones."""
+        return self.memory.translate(
+            functools.partial(self.trans.translate, profile=profile), list(texts)
+        )
+
+
+def get_path(output_root: str, source_lang: str, target_lang: str) -> str:
+    """Path of the memory of a language pair."""
+    return utils.get_state_path(
+        output_root, MEMORY_DIR, f"{source_lang}-{target_lang}.json"
+    )
+
+
+def get_memory(output_root: str, source_lang: str, target_lang: str, min_score: float):
+    """Get a memory shared within the process."""
+    key = (output_root, source_lang, target_lang, min_score)
+    if key not in _MEMORIES:
+        _MEMORIES[key] = TranslationMemory(
+            get_path(output_root, source_lang, target_lang),
+            min_score=min_score,
+            target_lang=target_lang,
+        )
+    return _MEMORIES[key]
+
+
+def wrap(trans, source_lang: str, target_lang: str):
+    """Wrap a translator by the memory of `ROOT`, the same without one."""
+    if ROOT is None:
+        return trans
+    return MemoryTranslator(
+        trans, get_memory(ROOT, source_lang, target_lang, MIN_SCORE)
+    )
+
+
+def save_all() -> List[str]:
+    """Save all memories in use: Return their paths, e.g. to be published."""
+    paths = [memory.save() for memory in _MEMORIES.values()]
+    return [path for path in paths if path and os.path.exists(path)]
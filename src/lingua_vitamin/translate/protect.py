@@ -0,0 +1,114 @@
+"""Protect untranslatable spans from translation with placeholders.
+
+LaTeX, inline code, URLs, code identifiers and product names are replaced by
+compact placeholders like `[[0]]` before translation, and restored afterwards:
+Models neither spend decode steps on them nor garble them, and long LaTeX
+titles shrink below length limits. Placeholders dropped by a model are
+appended to its output, so that no span is lost.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Product names not caught by the identifier patterns below.
+PRODUCT_NAMES = ("arXiv", "CUDA", "JAX", "Kubernetes", "LLVM", "MLIR", "TensorFlow")
+
+_PATTERNS = (
+    # LaTeX
+    r"\$\$.+?\$\$",
+    r"\$(?!\s)[^$\n]+?(?<!\s)\$(?!\d)",
+    r"\\\(.+?\\\)",
+    r"\\\[.+?\\\]",
+    # Inline code
+    r"`[^`\n]+`",
+    # URLs
+    r"(?:https?://|www\.)[^\s<>\"'\]\[]+",
+    # Calls and dotted names, e.g. `torch.compile()`, `os.path`
+    r"\b[A-Za-z_]\w+(?:\.[A-Za-z_]\w+)+(?:\(\))?",
+    r"\b[A-Za-z_]\w*\(\)",
+    # snake_case
+    r"\b[A-Za-z]\w*_\w+\b",
+    # camelCase and product names, e.g. `PyTorch`, `ChatGPT`, `iPhone`
+    r"\b[A-Za-z]*[a-z][A-Z]\w*\b",
+)
+SPANS = re.compile(
+    "|".join(
+        _PATTERNS
+        + tuple(
+            rf"\b{re.escape(name)}\b"
+            for name in sorted(PRODUCT_NAMES, key=len, reverse=True)
+        )
+    )
+)
+
+_URL = re.compile(r"https?://|www\.")
+_TRAILING = ".,;:!?)"
+_PLACEHOLDER = "[[{}]]"
+_RESTORE = re.compile(r"\[\s*\[\s*(\d+)\s*\]\s*\]")
+
+
+def mask(text: str) -> Tuple[str, List[str]]:
+    """Replace protected spans by placeholders: Return (masked text, values).
+
+    A span occurring more than once shares the same placeholder.
+    """
+    values = []
+    indices: Dict[str, int] = {}
+
+    def _replace(match):
+        value = match.group(0)
+        stripped = value.rstrip(_TRAILING) if _URL.match(value) else value
+        if stripped not in indices:
+            indices[stripped] = len(values)
+            values.append(stripped)
+        return _PLACEHOLDER.format(indices[stripped]) + value[len(stripped) :]
+
+    if not text:
+        return text, values
+    return SPANS.sub(_replace, text), values
+
+
+def restore(text: str, values: List[str]) -> str:
+    """Restore placeholders of a translated text."""
+    if not values or text is None:
+        return text
+
+    seen = set()
+
+    def _replace(match):
+        index = int(match.group(1))
+        if index >= len(values):
+            return match.group(0)
+        seen.add(index)
+        return values[index]
+
+    text = _RESTORE.sub(_replace, text)
+    missing = [value for index, value in enumerate(values) if index not in seen]
+    return " ".join([text] + missing) if missing else text
+
+
+def _has_text(masked: str) -> bool:
+    """Whether anything is left to translate besides placeholders."""
+    return bool(re.search(r"\w", _RESTORE.sub("", masked)))
+
+
+def translate(func, texts: List[str]) -> List[str]:
+    """Translate texts by a batch function with protected spans.
+
+    Masks are computed once per distinct text of a batch, and texts made of
+    protected spans only are returned as they are. Return None on failures.
+    """
+    table = {text: mask(text) for text in dict.fromkeys(texts)}
+    pending = [text for text, (masked, _) in table.items() if _has_text(masked)]
+
+    translations = {}
+    if pending:
+        results = func([table[text][0] for text in pending])
+        if results is None:
+            return None
+        translations = dict(zip(pending, results))
+
+    return [
+        restore(translations[text], table[text][1]) if text in translations else text
+        for text in texts
+    ]
@@ -0,0 +1,390 @@
+"""Sharded translation via a work queue on a shared filesystem.
+
+For backfills and large arXiv categories, a coordinator splits long text lists
+of `pipe._translate_texts`, e.g. titles, and of `pipe._translate_isolated`, e.g.
+contents and abstracts without a time budget, into shard files under a shared
+directory, e.g. on NFS, and workers on other hosts translate them, without a
+message broker:
+
+    <shard_dir>/todo/<job>-<index>.json                  Shards to translate
+    <shard_dir>/claimed/<job>-<index>.json--<worker>--<ms>   Claimed at <ms>
+    <shard_dir>/done/<job>-<index>.json                  Results
+    <shard_dir>/failed/<job>-<index>.json                Out of attempts
+
+A worker claims a shard by an atomic rename from `todo` into `claimed`, which
+only one worker wins, and writes its result by an atomic replace into `done`.
+Claims older than the lease timeout, e.g. of dead workers, and shards whose
+translation raised are put back into `todo` to be retried, up to a number of
+attempts, and into `failed` after that. The coordinator works on its own shards
+too, and merges results in order: Shards which failed, or are still pending by
+its timeout, are translated locally, and all shards of a job are removed once
+it is over. Shards carry the model-loading flags of the coordinator, e.g.
+`--weights_dtype`, so that workers load models as it does.
+
+    linguavitamin worker --shard_dir /mnt/shared/shards
+    linguavitamin --arxiv cs.DC --shard_dir /mnt/shared/shards ...
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from lingua_vitamin.translate import translator
+
+TODO_DIR = "todo"
+CLAIMED_DIR = "claimed"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+DEFAULT_SHARD_SIZE = 256
+# Seconds before a claimed shard is retried.
+DEFAULT_LEASE = 600.0
+# Attempts per shard before it fails.
+DEFAULT_MAX_ATTEMPTS = 3
+# Seconds to wait for the shards of a text list, before translating the rest locally.
+DEFAULT_TIMEOUT = 3600.0
+
+# Set by `--shard_dir` for `pipe._translate_texts`.
+COORDINATOR = None
+
+_MODELS = {model: pair for pair, model in translator.SUPPORTED_PAIRS.items()}
+
+
+def _write_json(path: str, value) -> None:
+    temp_path = f"{path}.{socket.gethostname()}-{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_worker_id() -> str:
+    """Worker id: Host and process."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ShardQueue:
+    """Shards and their results under a shared directory."""
+
+    def __init__(
+        self,
+        shard_dir: str,
+        lease: float = DEFAULT_LEASE,
+        worker=None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.shard_dir = shard_dir
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.worker = (worker or get_worker_id()).replace("--", "-")
+        for name in (TODO_DIR, CLAIMED_DIR, DONE_DIR, FAILED_DIR):
+            os.makedirs(os.path.join(shard_dir, name), exist_ok=True)
+
+    def _path(self, *names) -> str:
+        return os.path.join(self.shard_dir, *names)
+
+    def put(self, name: str, shard: dict) -> None:
+        """Add a shard to translate."""
+        _write_json(self._path(TODO_DIR, name), shard)
+
+    def claim(self, prefix: str = "") -> Optional[Tuple[str, str, dict]]:
+        """Claim a shard: Return (name, claim path, shard), or None if none left."""
+        self.requeue()
+        for name in sorted(os.listdir(self._path(TODO_DIR))):
+            if not name.startswith(prefix) or not name.endswith(".json"):
+                continue
+
+            claim = self._path(
+                CLAIMED_DIR, f"{name}--{self.worker}--{int(time.time() * 1000)}"
+            )
+            try:
+                os.rename(self._path(TODO_DIR, name), claim)
+            except FileNotFoundError:
+                # Claimed by another worker.
+                continue
+            if os.path.exists(self._path(DONE_DIR, name)):
+                self._remove(claim)
+                continue
+            return name, claim, _read_json(claim)
+        return None
+
+    def complete(self, name: str, claim: str, result) -> None:
+        """Write the result of a claimed shard, unless its job is over."""
+        if not os.path.exists(claim):
+            logging.warning("Shard `%s` is no longer claimed: Dropped.", name)
+            return
+        _write_json(self._path(DONE_DIR, name), result)
+        self._remove(claim)
+
+    def release(self, name: str, claim: str) -> bool:
+        """Retry a claimed shard, or fail it after its last attempt.
+
+        Return whether it is retried.
+        """
+        # Renamed first, so that only one worker retries it.
+        retry_path = self._path(TODO_DIR, f"{name}.{self.worker}.retry")
+        try:
+            os.rename(claim, retry_path)
+        except FileNotFoundError:
+            return False
+
+        shard = _read_json(retry_path)
+        shard["attempts"] = shard.get("attempts", 0) + 1
+        retried = shard["attempts"] < self.max_attempts
+        _write_json(retry_path, shard)
+        os.replace(retry_path, self._path(TODO_DIR if retried else FAILED_DIR, name))
+        if not retried:
+            logging.warning("Shard `%s` failed %d times.", name, shard["attempts"])
+        return retried
+
+    def requeue(self) -> int:
+        """Retry shards claimed longer than the lease: Return their number."""
+        count = 0
+        now = time.time() * 1000
+        for claim in os.listdir(self._path(CLAIMED_DIR)):
+            name, _, claimed_at = claim.rsplit("--", 2)
+            if now - int(claimed_at) < self.lease * 1000:
+                continue
+            if os.path.exists(self._path(DONE_DIR, name)):
+                self._remove(self._path(CLAIMED_DIR, claim))
+                continue
+            if self.release(name, self._path(CLAIMED_DIR, claim)):
+                logging.warning("Shard `%s` over its lease: Retried.", claim)
+                count += 1
+        return count
+
+    def result(self, name: str):
+        """Result of a shard, or None if pending."""
+        path = self._path(DONE_DIR, name)
+        return _read_json(path) if os.path.exists(path) else None
+
+    def failed(self, name: str) -> bool:
+        """Whether a shard is out of attempts."""
+        return os.path.exists(self._path(FAILED_DIR, name))
+
+    def remove(self, name: str) -> None:
+        """Remove a shard wherever it is, e.g. once its job is over."""
+        for dir_name in (TODO_DIR, DONE_DIR, FAILED_DIR):
+            self._remove(self._path(dir_name, name))
+        for claim in os.listdir(self._path(CLAIMED_DIR)):
+            if claim.startswith(f"{name}--"):
+                self._remove(self._path(CLAIMED_DIR, claim))
+        for retry in os.listdir(self._path(TODO_DIR)):
+            if retry.startswith(f"{name}.") and retry.endswith(".retry"):
+                self._remove(self._path(TODO_DIR, retry))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _translate_texts(
+    trans, texts, batch: int, profile: str, stage: str = None
+) -> List[str]:
+    # Imported here: `pipe` hands its text lists over to this module.
+    from lingua_vitamin import pipe
+
+    if stage:
+        return pipe._translate_isolated(
+            trans, texts, batch, profile=profile, stage=stage
+        )
+    return pipe._translate_texts(trans, texts, batch=batch, profile=profile)
+
+
+def _set_weights(shard: dict) -> None:
+    """Load models with the model-loading flags of the coordinator of a shard."""
+    flags = (
+        shard.get("mmap_weights", translator.MMAP_WEIGHTS),
+        shard.get("weights_dtype", translator.WEIGHTS_DTYPE),
+    )
+    if flags != (translator.MMAP_WEIGHTS, translator.WEIGHTS_DTYPE):
+        logging.info("Loading models with mmap_weights, weights_dtype = %s.", flags)
+        translator.MMAP_WEIGHTS, translator.WEIGHTS_DTYPE = flags
+        # Models loaded with other flags are loaded again.
+        translator.get_translator.cache_clear()
+
+
+def translate_shard(shard: dict, get_translator=None) -> List[str]:
+    """Translate the texts of a shard as `pipe._translate_texts` would.
+
+    Shards with a `stage` are translated as by `pipe._translate_isolated`.
+    """
+    if get_translator is None:
+        _set_weights(shard)
+    trans = (get_translator or translator.get_translator)(*_MODELS[shard["model"]])
+    return _translate_texts(
+        trans,
+        shard["texts"],
+        shard["batch"],
+        shard["profile"],
+        stage=shard.get("stage"),
+    )
+
+
+def process(queue: ShardQueue, prefix: str = "", get_translator=None) -> bool:
+    """Claim and translate a shard: Return whether there was one."""
+    claimed = queue.claim(prefix)
+    if claimed is None:
+        return False
+
+    name, claim, shard = claimed
+    begin = time.time()
+    try:
+        results = translate_shard(shard, get_translator=get_translator)
+    except Exception as error:
+        logging.exception("[%s] Shard `%s` failed: <<<%s>>>", queue.worker, name, error)
+        queue.release(name, claim)
+        return True
+    queue.complete(name, claim, results)
+    logging.info(
+        "[%s] Shard `%s`: %d texts in %.2f seconds.",
+        queue.worker,
+        name,
+        len(results),
+        time.time() - begin,
+    )
+    return True
+
+
+class Coordinator:
+    """Split text lists into shards, and merge their results in order."""
+
+    def __init__(
+        self,
+        queue: ShardQueue,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        poll: float = 0.5,
+        work: bool = True,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.queue = queue
+        self.shard_size = shard_size
+        self.poll = poll
+        self.work = work
+        self.timeout = timeout
+
+    def accepts(self, trans, texts) -> bool:
+        """Whether texts are worth sharding, for a translator known to workers."""
+        return (
+            len(texts) > self.shard_size
+            and getattr(trans, "model_name", None) in _MODELS
+        )
+
+    def map(
+        self, trans, texts, batch: int, profile: str, stage: str = None
+    ) -> List[str]:
+        """Translate texts by shards: Return translations in order.
+
+        Given a `stage`, texts are translated as by `pipe._translate_isolated`.
+        Shards which failed, or are pending by the timeout, are translated here.
+        """
+        job = uuid.uuid4().hex[:12]
+        shards = {}
+        try:
+            for start in range(0, len(texts), self.shard_size):
+                name = f"{job}-{len(shards):06d}.json"
+                shards[name] = list(texts[start : start + self.shard_size])
+                self.queue.put(
+                    name,
+                    {
+                        "model": trans.model_name,
+                        "batch": batch,
+                        "profile": profile,
+                        "stage": stage,
+                        "mmap_weights": translator.MMAP_WEIGHTS,
+                        "weights_dtype": translator.WEIGHTS_DTYPE,
+                        "texts": shards[name],
+                    },
+                )
+            logging.info("[%s] %d texts in %d shards ...", job, len(texts), len(shards))
+            results = self._wait(job, shards)
+
+            pending = [name for name in shards if name not in results]
+            if pending:
+                logging.warning(
+                    "[%s] %d shards failed or timed out: Translated locally.",
+                    job,
+                    len(pending),
+                )
+            for name in pending:
+                results[name] = _translate_texts(
+                    trans, shards[name], batch, profile, stage=stage
+                )
+        finally:
+            for name in shards:
+                self.queue.remove(name)
+        return [text for name in shards for text in results[name]]
+
+    def _wait(self, job: str, shards) -> dict:
+        """Results of shards, until all are done or failed, or by the timeout."""
+        end = time.time() + self.timeout
+        results, failed = {}, set()
+        while len(results) + len(failed) < len(shards) and time.time() < end:
+            for name in shards:
+                if name not in results and name not in failed:
+                    result = self.queue.result(name)
+                    if result is not None:
+                        results[name] = result
+                    elif self.queue.failed(name):
+                        failed.add(name)
+            if len(results) + len(failed) == len(shards):
+                break
+            if not (self.work and process(self.queue, prefix=job)):
+                time.sleep(self.poll)
+        return results
+
+
+def run_worker(
+    shard_dir: str,
+    lease: float = DEFAULT_LEASE,
+    poll: float = 1.0,
+    idle_timeout: float = 0,
+    get_translator=None,
+) -> int:
+    """Translate shards until idle for `idle_timeout` if positive: Return count."""
+    queue = ShardQueue(shard_dir, lease=lease)
+    logging.info("[%s] Waiting for shards in `%s` ...", queue.worker, shard_dir)
+
+    count, idle_since = 0, time.time()
+    while not idle_timeout or time.time() - idle_since < idle_timeout:
+        if process(queue, get_translator=get_translator):
+            count += 1
+            idle_since = time.time()
+        else:
+            time.sleep(poll)
+    return count
+
+
+def main(argv=None):
+    """Main."""
+    parser = argparse.ArgumentParser(description="LinguaVitamin shard worker")
+    parser.add_argument("--shard_dir", type=str, required=True)
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE)
+    parser.add_argument("--poll", type=float, default=1.0)
+    parser.add_argument(
+        "--idle_timeout",
+        type=float,
+        default=0,
+        help="Exit after idle for seconds, 0 to run forever",
+    )
+    args = parser.parse_args(argv)
+
+    count = run_worker(
+        args.shard_dir,
+        lease=args.lease,
+        poll=args.poll,
+        idle_timeout=args.idle_timeout,
+    )
+    logging.info("Translated %d shards.", count)
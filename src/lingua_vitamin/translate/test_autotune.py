@@ -0,0 +1,144 @@
+"""Unit tests for autotune.py."""
+
+import logging
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from lingua_vitamin import pipe
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import autotune
+
+
+class _Translator:
+    """Upper-case `translation`, with a fixed cost per call."""
+
+    model_name = "opus-mt-de-en"
+
+    def __init__(self):
+        self.batches = []
+
+    def translate(self, texts, profile="default"):
+        self.batches.append(len(texts))
+        time.sleep(0.005 + 0.0001 * len(texts))
+        return [text.upper() for text in texts]
+
+
+class TestAutotune(unittest.TestCase):
+    """Unit tests for autotune.py."""
+
+    def test_get_batch_size(self):
+        """Unit test for get_batch_size: Calibrated once, then persisted per host."""
+        texts = [f"Satz {i}" for i in range(300)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = autotune.get_path(temp_dir)
+            trans = _Translator()
+            tuner = autotune.Tuner(path, memory_limit_mb=2**20, host="host")
+            batch_size = tuner.get_batch_size(trans, "title", texts, 5, "title")
+
+            # Fixed costs per call favor large batches.
+            self.assertGreaterEqual(batch_size, 64)
+            self.assertIn(1, trans.batches)
+            self.assertTrue(os.path.exists(path))
+
+            trans = _Translator()
+            tuner = autotune.Tuner(path, memory_limit_mb=2**20, host="host")
+            self.assertEqual(
+                tuner.get_batch_size(trans, "title", texts, 5, "title"), batch_size
+            )
+            self.assertEqual(trans.batches, [])
+            self.assertIsNone(tuner.get("opus-mt-de-en", "word"))
+
+            # Other hosts are calibrated on their own.
+            tuner = autotune.Tuner(path, memory_limit_mb=2**20, host="other")
+            self.assertIsNone(tuner.get("opus-mt-de-en", "title"))
+
+    def test_get_host(self):
+        """Unit test for get_host: By hardware, the same across host names."""
+        hosts = set()
+        for name in ("runner-1", "runner-2"):
+            with mock.patch("socket.gethostname", return_value=name):
+                hosts.add(autotune.get_host())
+        self.assertEqual(len(hosts), 1)
+        self.assertIn(f"-{os.cpu_count()}cpu-", hosts.pop())
+
+    def test_memory_limit(self):
+        """Unit test for Tuner: Nothing fits below the ceiling, batches shrink."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tuner = autotune.Tuner(
+                autotune.get_path(temp_dir), memory_limit_mb=1, host="host"
+            )
+            trans = _Translator()
+            self.assertEqual(
+                tuner.get_batch_size(trans, "word", ["a", "b"] * 50, 5000, "word"), 5000
+            )
+            self.assertEqual(trans.batches, [1] * len(autotune.get_thread_counts()))
+
+            tuner.set(trans.model_name, "word", {"batch_size": 16, "num_threads": 1})
+            self.assertEqual(tuner.shrink(trans, "word", 16), 8)
+            self.assertEqual(tuner.get(trans.model_name, "word")["batch_size"], 8)
+
+            trans = _Translator()
+            with mock.patch.object(autotune, "TUNER", tuner):
+                results = pipe._translate_texts(
+                    trans, ["a"] * 20, batch=8, profile="word"
+                )
+            self.assertEqual(results, ["A"] * 20)
+            self.assertEqual(trans.batches, [8, 4, 2, 1, 1, 1, 1, 1, 1])
+
+    def test_memory_per_candidate(self):
+        """Unit test for tune: Memory is measured while each candidate runs."""
+        rss_mb = [100.0]
+
+        class _MemoryTranslator(_Translator):
+            """10 MB per text while translating."""
+
+            def translate(self, texts, profile="default"):
+                rss_mb[0] = 100.0 + 10 * len(texts)
+                time.sleep(0.05)
+                rss_mb[0] = 100.0
+                return super().translate(texts, profile=profile)
+
+        trans = _MemoryTranslator()
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            mock.patch.object(
+                autotune.utils, "get_memory_usage", lambda: {"rss_mb": rss_mb[0]}
+            ),
+        ):
+            tuner = autotune.Tuner(
+                autotune.get_path(temp_dir), memory_limit_mb=500, host="host"
+            )
+            config = tuner.tune(trans, "title", ["a"] * 100, "title")
+
+        self.assertEqual(config["batch_size"], 16)
+        self.assertEqual(config["rss_mb"], 260)
+        # Each thread count tries large batches again, up to the ceiling.
+        self.assertEqual(
+            trans.batches, [1, 4, 16, 64] * len(autotune.get_thread_counts())
+        )
+
+    def test_short_sample(self):
+        """Unit test for get_batch_size: Short samples are not calibrated on."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tuner = autotune.Tuner(autotune.get_path(temp_dir), host="host")
+            trans = _Translator()
+            self.assertEqual(
+                tuner.get_batch_size(trans, "title", ["a"] * 5, 8, "title"), 8
+            )
+            self.assertEqual(trans.batches, [])
+            self.assertIsNone(tuner.get(trans.model_name, "title"))
+
+    def test_no_tuner(self):
+        """Unit test for get_batch_size: Defaults without a tuner."""
+        trans = _Translator()
+        self.assertEqual(autotune.get_batch_size(trans, "word", ["a"] * 10, 5000), 5000)
+        self.assertEqual(autotune.shrink(trans, "word", 5000), 5000)
+        self.assertEqual(trans.batches, [])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
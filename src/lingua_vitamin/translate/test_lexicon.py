@@ -0,0 +1,96 @@
+"""Unit tests for lexicon.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+
+from lingua_vitamin.translate import lexicon
+
+LOGGING_FORMAT = "%(asctime)s [%(filename)s:%(lineno)d] %(levelname)s - %(message)s"
+
+_WORDS = {
+    "Kanzler": "chancellor",
+    "Merz": "Merz",
+    "Zölle": "tariffs",
+    "Über": "About",
+    "die": "the",
+    "Ärzte": "doctors",
+    "a": "a",
+}
+
+
+class TestLexicon(unittest.TestCase):
+    """Unit tests for lexicon.py."""
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = lexicon.get_path(
+            os.path.join(self._temp_dir.name, "lexicon"), "de", "en"
+        )
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_empty(self):
+        """Unit test for Lexicon: No file yet."""
+        with lexicon.Lexicon(self.path) as lex:
+            self.assertIsNone(lex.get("Kanzler"))
+            self.assertEqual(list(lex.items()), [])
+            self.assertEqual(lex.save(), self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    @parameterized.expand(((1,), (3,), (len(_WORDS),)))
+    def test_learn(self, size):
+        """Unit test for learn, save and get, learning in several rounds."""
+        items = sorted(_WORDS.items())
+        for start in range(0, len(items), size):
+            with lexicon.Lexicon(self.path) as lex:
+                lex.learn(dict(items[start : start + size]))
+                lex.save()
+
+        with lexicon.Lexicon(self.path) as lex:
+            self.assertEqual(list(lex.items()), items)
+            for word, translation in _WORDS.items():
+                self.assertEqual(lex.get(word), translation)
+            for word in ("", "Kanzlerin", "A", "Zoll", "zz", "0"):
+                self.assertIsNone(lex.get(word))
+
+    def test_learn_overwrite(self):
+        """Unit test for learn: Learned translations win, empty ones are skipped."""
+        with lexicon.Lexicon(self.path) as lex:
+            lex.learn(_WORDS)
+            lex.save()
+
+        with lexicon.Lexicon(self.path) as lex:
+            self.assertEqual(
+                lex.learn({"die": "the (f.)", "Haus": "", "Welt": "the\tworld\n"}), 2
+            )
+            self.assertEqual(lex.get("die"), "the (f.)")
+            lex.save()
+            self.assertEqual(lex.get("die"), "the (f.)")
+            self.assertEqual(lex.get("Welt"), "the world")
+            self.assertIsNone(lex.get("Haus"))
+            self.assertEqual(len(list(lex.items())), len(_WORDS) + 1)
+
+    def test_main(self):
+        """Unit test for main: Import a TSV dictionary."""
+        tsv_path = os.path.join(self._temp_dir.name, "dict.tsv")
+        with open(tsv_path, "w", encoding="utf-8") as f:
+            f.write("".join(f"{w}\t{t}\n" for w, t in _WORDS.items()))
+
+        lexicon.main(["--output_root", self._temp_dir.name, "import", tsv_path])
+        with lexicon.Lexicon(
+            lexicon.get_path(
+                os.path.join(self._temp_dir.name, ".lingua_vitamin", "lexicon"),
+                "de",
+                "en",
+            )
+        ) as lex:
+            self.assertEqual(lex.get("Zölle"), "tariffs")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
+    unittest.main()
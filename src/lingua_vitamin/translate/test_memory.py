@@ -0,0 +1,153 @@
+"""Unit tests for memory.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from lingua_vitamin import pipe
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import memory
+
+
+class _Translator:
+    """Upper-case `translation`, but for numbers, names and URLs."""
+
+    model_name = "opus-mt-en-de"
+
+    def __init__(self):
+        self.calls = []
+
+    def translate(self, texts, profile="default"):
+        self.calls.append(list(texts))
+        return [
+            " ".join(w if w[:1].isupper() else w.upper() for w in text.split(" "))
+            for text in texts
+        ]
+
+
+class TestMemory(unittest.TestCase):
+    """Unit tests for memory.py."""
+
+    @parameterized.expand(
+        (
+            # Numbers
+            (
+                "Points: 7 # Comments: 3",
+                "Points: 12 # Comments: 5",
+                "Punkte: 12 # Kommentare: 5",
+                "Punkte: 7 # Kommentare: 3",
+            ),
+            # URLs
+            (
+                "Article URL: https://example.com/b",
+                "Article URL: https://example.com/a",
+                "Artikel-URL: https://example.com/a",
+                "Artikel-URL: https://example.com/b",
+            ),
+            # Names carried verbatim
+            (
+                "Merz meets Macron in Paris.",
+                "Merz meets Trump in Berlin.",
+                "Merz trifft Trump in Berlin.",
+                "Merz trifft Macron in Paris.",
+            ),
+            # Names not carried verbatim
+            (
+                "Der Kanzler kommt.",
+                "Der Präsident kommt.",
+                "The President is coming.",
+                None,
+            ),
+            # Other words
+            (
+                "Merz visits Trump in Berlin.",
+                "Merz meets Trump in Berlin.",
+                "Merz trifft Trump in Berlin.",
+                None,
+            ),
+            # Ambiguous substitutions
+            (
+                "5 of 7 papers.",
+                "5 of 5 papers.",
+                "5 von 5 Arbeiten.",
+                None,
+            ),
+        )
+    )
+    def test_substitute(self, source, match, translation, expected):
+        """Unit test for substitute."""
+        _, result = memory.substitute(source, match, translation)
+        self.assertEqual(result, expected)
+
+    def test_translate(self):
+        """Unit test for translate: Only novel sentences go to the model."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = memory.get_path(temp_dir, "en", "de")
+            mem = memory.TranslationMemory(path, min_score=0.8)
+            trans = _Translator()
+            self.assertEqual(
+                mem.translate(
+                    trans.translate,
+                    ["We study 12 models. Code is available.", "Points: 12"],
+                ),
+                ["We STUDY 12 MODELS. Code IS AVAILABLE.", "Points: 12"],
+            )
+            self.assertEqual(mem.save(), path)
+
+            mem = memory.TranslationMemory(path, min_score=0.8)
+            trans = _Translator()
+            self.assertEqual(
+                mem.translate(
+                    trans.translate,
+                    ["We study 7 models.\n\nCode is available. It is new.", ""],
+                ),
+                ["We STUDY 7 MODELS.\n\nCode IS AVAILABLE. It IS NEW.", ""],
+            )
+            self.assertEqual(trans.calls, [["It is new."]])
+            self.assertEqual(mem.stats, {"exact": 1, "fuzzy": 1, "novel": 1})
+
+            # Failures are not learned.
+            self.assertIsNone(mem.translate(lambda texts: None, ["Brand new."]))
+            self.assertIsNone(mem.lookup("Brand new."))
+
+    def test_wrap(self):
+        """Unit test for wrap: News by the memory when enabled."""
+        articles = [
+            {"title": "Points: 12", "content": "Read more. Comments: 5"},
+            {"title": "Points: 7", "content": "Read more. Comments: 3"},
+        ]
+        translators = {"de": _Translator()}
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            mock.patch.object(
+                pipe, "get_translator", side_effect=lambda _, t: translators[t]
+            ),
+        ):
+            self.assertIs(memory.wrap(translators["de"], "en", "de"), translators["de"])
+
+            with (
+                mock.patch.object(memory, "ROOT", temp_dir),
+                mock.patch.dict(memory._MEMORIES, clear=True),
+            ):
+                results = pipe._translate_news(articles, "en", ("de",))
+                paths = memory.save_all()
+
+            self.assertEqual(
+                translators["de"].calls,
+                [["Points: 12"], ["Read more.", "Comments: 5"]],
+            )
+            self.assertEqual(
+                (results["title-de"][1], results["content-de"][1]),
+                ("Points: 7", "Read MORE. Comments: 3"),
+            )
+            self.assertEqual(paths, [memory.get_path(temp_dir, "en", "de")])
+            self.assertTrue(os.path.exists(paths[0]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
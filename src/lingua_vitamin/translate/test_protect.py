@@ -0,0 +1,93 @@
+"""Unit tests for protect.py."""
+
+import logging
+import unittest
+from parameterized import parameterized
+
+from lingua_vitamin.translate import protect
+
+LOGGING_FORMAT = "%(asctime)s [%(filename)s:%(lineno)d] %(levelname)s - %(message)s"
+
+
+class _FakeTranslate:
+    """Upper-case `translation`, with spaces in placeholders."""
+
+    def __init__(self, drop: bool = False):
+        self.drop = drop
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(texts)
+        if self.drop:
+            return ["DROPPED" for _ in texts]
+        return [text.upper().replace("[[", "[ [") for text in texts]
+
+
+class TestProtect(unittest.TestCase):
+    """Unit tests for protect.py."""
+
+    @parameterized.expand(
+        (
+            ("No spans.", "No spans.", []),
+            (
+                "See https://dw.com/a?b=1, or www.x.org.",
+                "See [[0]], or [[1]].",
+                ["https://dw.com/a?b=1", "www.x.org"],
+            ),
+            ("(https://x.org/a)", "([[0]])", ["https://x.org/a"]),
+            (
+                r"Sorting in $O(n \log n)$ and \(k^2\) time",
+                "Sorting in [[0]] and [[1]] time",
+                [r"$O(n \log n)$", r"\(k^2\)"],
+            ),
+            ("It costs $5 and $10 today", "It costs $5 and $10 today", []),
+            (
+                "Faster `torch.compile` for PyTorch on CUDA",
+                "Faster [[0]] for [[1]] on [[2]]",
+                ["`torch.compile`", "PyTorch", "CUDA"],
+            ),
+            (
+                "ChatGPT beats ChatGPT via tokio.spawn() and max_new_tokens",
+                "[[0]] beats [[0]] via [[1]] and [[2]]",
+                ["ChatGPT", "tokio.spawn()", "max_new_tokens"],
+            ),
+            ("Z.B. der Kanzler", "Z.B. der Kanzler", []),
+            ("", "", []),
+        )
+    )
+    def test_mask(self, text, expected, values):
+        """Unit test for mask and restore."""
+        self.assertEqual(protect.mask(text), (expected, values))
+        self.assertEqual(protect.restore(expected, values), text)
+
+    def test_restore(self):
+        """Unit test for restore: Placeholders are kept anyway."""
+        values = ["https://x.org/a", "https://x.org/b"]
+        self.assertEqual(
+            protect.restore("Siehe [ [1 ]] und [[7]].", values),
+            "Siehe https://x.org/b und [[7]]. https://x.org/a",
+        )
+        self.assertIsNone(protect.restore(None, values))
+
+    def test_translate(self):
+        """Unit test for translate."""
+        func = _FakeTranslate()
+        self.assertEqual(
+            protect.translate(
+                func, ["see https://x.org/AbC.", "ok", "PyTorch", "ok", "$x^2$."]
+            ),
+            ["SEE https://x.org/AbC.", "OK", "PyTorch", "OK", "$x^2$."],
+        )
+        self.assertEqual(func.calls, [["see [[0]].", "ok"]])
+
+        func = _FakeTranslate(drop=True)
+        self.assertEqual(
+            protect.translate(func, ["see https://x.org/a"]),
+            ["DROPPED https://x.org/a"],
+        )
+        self.assertIsNone(protect.translate(lambda texts: None, ["ok"]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,223 @@
+"""Unit tests for shard.py."""
+
+import functools
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from lingua_vitamin import pipe
+from lingua_vitamin.common import deadline
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import shard
+
+_MODEL = "Helsinki-NLP/opus-mt-de-en"
+
+
+class _Translator:
+    """`target:text` translations, with the processes which made them."""
+
+    model_name = _MODEL
+
+    def __init__(self, target, pids_dir=None, seconds=0.0):
+        self.target = target
+        self.pids_dir = pids_dir
+        self.seconds = seconds
+
+    def translate(self, texts, profile="default"):
+        if self.pids_dir:
+            with open(os.path.join(self.pids_dir, str(os.getpid())), "w"):
+                pass
+        time.sleep(self.seconds)
+        return [f"{self.target}:{text}" for text in texts]
+
+
+def _get_translator(pids_dir, seconds, source_lang, target_lang):
+    return _Translator(target_lang, pids_dir=pids_dir, seconds=seconds)
+
+
+def _claim_and_die(shard_dir):
+    """A worker which dies with a claimed shard."""
+    shard.ShardQueue(shard_dir, worker="dead").claim()
+    os._exit(1)
+
+
+class TestShard(unittest.TestCase):
+    """Unit tests for shard.py."""
+
+    def test_map(self):
+        """Unit test for Coordinator: Shards by worker processes, in order."""
+        texts = [f"Satz {i}" for i in range(40)]
+        context = multiprocessing.get_context("spawn")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            shard_dir, pids_dir = temp_dir + "/shards", temp_dir + "/pids"
+            os.makedirs(pids_dir)
+            workers = [
+                context.Process(
+                    target=shard.run_worker,
+                    args=(shard_dir,),
+                    kwargs={
+                        "poll": 0.05,
+                        "idle_timeout": 2,
+                        "get_translator": functools.partial(
+                            _get_translator, pids_dir, 0.1
+                        ),
+                    },
+                )
+                for _ in range(2)
+            ]
+            for worker in workers:
+                worker.start()
+
+            coordinator = shard.Coordinator(
+                shard.ShardQueue(shard_dir), shard_size=4, poll=0.05, work=False
+            )
+            self.assertTrue(coordinator.accepts(_Translator("en"), texts))
+            self.assertFalse(coordinator.accepts(_Translator("en"), texts[:4]))
+            results = coordinator.map(_Translator("en"), texts, 2, "title")
+            for worker in workers:
+                worker.join()
+
+            self.assertEqual(results, [f"en:{text}" for text in texts])
+            self.assertEqual(
+                sorted(os.listdir(pids_dir)), sorted(str(w.pid) for w in workers)
+            )
+            for name in (shard.TODO_DIR, shard.CLAIMED_DIR, shard.DONE_DIR):
+                self.assertEqual(os.listdir(os.path.join(shard_dir, name)), [])
+
+    def test_lease(self):
+        """Unit test for ShardQueue: Shards of dead workers are retried."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue = shard.ShardQueue(temp_dir, lease=0.5)
+            queue.put("job-000000.json", {"model": _MODEL, "texts": ["a"]})
+            queue.put("job-000001.json", {"model": _MODEL, "texts": ["b"]})
+
+            process = multiprocessing.get_context("spawn").Process(
+                target=_claim_and_die, args=(temp_dir,)
+            )
+            process.start()
+            process.join()
+            self.assertEqual(process.exitcode, 1)
+
+            # Within its lease, a claimed shard is left alone.
+            name, claim, value = queue.claim()
+            self.assertEqual((name, value["texts"]), ("job-000001.json", ["b"]))
+            queue.complete(name, claim, ["B"])
+            self.assertIsNone(queue.claim())
+            self.assertEqual(queue.requeue(), 0)
+
+            time.sleep(0.6)
+            name, claim, value = queue.claim()
+            self.assertEqual((name, value["texts"]), ("job-000000.json", ["a"]))
+            queue.complete(name, claim, ["A"])
+            self.assertEqual(queue.result("job-000000.json"), ["A"])
+            self.assertEqual(os.listdir(os.path.join(temp_dir, shard.CLAIMED_DIR)), [])
+
+    def _assert_empty(self, shard_dir):
+        for name in os.listdir(shard_dir):
+            self.assertEqual(os.listdir(os.path.join(shard_dir, name)), [])
+
+    def test_map_failed(self):
+        """Unit test for Coordinator: Failing shards are translated locally."""
+        texts = [f"Satz {i}" for i in range(10)]
+
+        def _fail(source_lang, target_lang):
+            raise RuntimeError("Out of memory.")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue = shard.ShardQueue(temp_dir, max_attempts=2)
+            coordinator = shard.Coordinator(queue, shard_size=4, poll=0.01)
+            with mock.patch.object(shard.translator, "get_translator", _fail):
+                results = coordinator.map(_Translator("en"), texts, 2, "title")
+            self.assertEqual(results, [f"en:{text}" for text in texts])
+            self._assert_empty(temp_dir)
+
+            # Failed locally too: Shards are removed all the same.
+            trans = mock.Mock(model_name=_MODEL)
+            trans.translate.side_effect = RuntimeError("Out of memory.")
+            with mock.patch.object(shard.translator, "get_translator", _fail):
+                with self.assertRaises(RuntimeError):
+                    coordinator.map(trans, texts, 2, "title")
+            self._assert_empty(temp_dir)
+
+    def test_map_timeout(self):
+        """Unit test for Coordinator: Without workers, translated by the timeout."""
+        texts = [f"Satz {i}" for i in range(10)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            coordinator = shard.Coordinator(
+                shard.ShardQueue(temp_dir),
+                shard_size=4,
+                poll=0.01,
+                work=False,
+                timeout=0.1,
+            )
+            results = coordinator.map(_Translator("en"), texts, 2, "title")
+            self.assertEqual(results, [f"en:{text}" for text in texts])
+            self._assert_empty(temp_dir)
+
+    def test_translate_texts(self):
+        """Unit test for _translate_texts: Long lists by shards, if enabled."""
+        texts = [f"Satz {i}" for i in range(10)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            coordinator = shard.Coordinator(shard.ShardQueue(temp_dir), shard_size=3)
+            with (
+                mock.patch.object(shard, "COORDINATOR", coordinator),
+                mock.patch.object(
+                    shard.translator,
+                    "get_translator",
+                    functools.partial(_get_translator, None, 0),
+                ),
+                mock.patch.object(
+                    coordinator, "map", wraps=coordinator.map
+                ) as map_func,
+            ):
+                results = pipe._translate_texts(_Translator("en"), texts, batch=2)
+                self.assertEqual(results, [f"en:{text}" for text in texts])
+                self.assertEqual(map_func.call_count, 1)
+
+                # Short lists are translated locally.
+                pipe._translate_texts(_Translator("en"), texts[:3], batch=2)
+                self.assertEqual(map_func.call_count, 1)
+
+                # Contents and abstracts, without a time budget only.
+                results = pipe._translate_isolated(
+                    _Translator("en"), texts, 2, profile="content", stage="abstract"
+                )
+                self.assertEqual(results, [f"en:{text}" for text in texts])
+                self.assertEqual(map_func.call_args.kwargs, {"stage": "abstract"})
+                pipe._translate_isolated(
+                    _Translator("en"), texts, 2, deadline=deadline.Deadline(60)
+                )
+                self.assertEqual(map_func.call_count, 2)
+
+    def test_weights(self):
+        """Unit test for translate_shard: Models loaded as by the coordinator."""
+        get_translator = mock.Mock()
+        with (
+            mock.patch.object(shard.translator, "MMAP_WEIGHTS", False),
+            mock.patch.object(shard.translator, "WEIGHTS_DTYPE", "bfloat16"),
+            tempfile.TemporaryDirectory() as temp_dir,
+        ):
+            queue = shard.ShardQueue(temp_dir)
+            coordinator = shard.Coordinator(queue, shard_size=4, work=False, timeout=0)
+            with mock.patch.object(queue, "put", wraps=queue.put) as put:
+                coordinator.map(_Translator("en"), ["a"] * 5, 2, "title")
+            value = put.call_args.args[1]
+            self.assertEqual(
+                (value["mmap_weights"], value["weights_dtype"]), (False, "bfloat16")
+            )
+
+            with mock.patch.object(shard.translator, "get_translator", get_translator):
+                shard._set_weights(value)
+                get_translator.cache_clear.assert_not_called()
+                shard._set_weights({**value, "weights_dtype": None})
+                get_translator.cache_clear.assert_called_once()
+                self.assertIsNone(shard.translator.WEIGHTS_DTYPE)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
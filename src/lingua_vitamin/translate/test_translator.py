@@ -2,6 +2,7 @@
 
 import logging
 import unittest
+from unittest import mock
 from parameterized import parameterized
 
 from lingua_vitamin.translate import translator
@@ -86,6 +87,40 @@ class TestTranslator(unittest.TestCase):
         """Unit tests for translate: None for long sequences."""
         self.assertIsNone(translator.Translator(src, target).translate((text,)))
 
+    @parameterized.expand(
+        [
+            ("word", ["Kanzler"], {"num_beams": 1, "max_new_tokens": 8}),
+            ("title", ["Merz in Berlin"], {"num_beams": 2, "max_new_tokens": 14}),
+            ("content", ["a " * 300], {"num_beams": 4, "max_new_tokens": 512}),
+            ("default", ["Kanzler"], {}),
+        ]
+    )
+    def test_translate_profile(self, profile, texts, expected):
+        """Unit tests for translate: Generation kwargs per profile."""
+
+        class _Pipeline:
+            def __init__(self):
+                self.kwargs = None
+                self.tokenizer = lambda texts: {
+                    "input_ids": [text.split() for text in texts]
+                }
+
+            def __call__(self, texts, **kwargs):
+                self.kwargs = kwargs
+                return [{"translation_text": text.upper()} for text in texts]
+
+        pipeline = _Pipeline()
+        with mock.patch.object(translator, "pipeline", return_value=pipeline):
+            trans = translator.Translator("de", "en", mmap_weights=False)
+
+        self.assertEqual(
+            trans.translate(texts, profile=profile), [t.upper() for t in texts]
+        )
+        self.assertEqual(pipeline.kwargs, expected)
+
+        with self.assertRaises(ValueError):
+            trans.translate(texts, profile="unknown")
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format=LOGGING_FORMAT)
@@ -0,0 +1,122 @@
+"""Unit tests for warmup.py."""
+
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from huggingface_hub import constants
+from parameterized import parameterized
+
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import warmup
+
+
+class _Translator:
+    """Upper-case `translation`, recording profiles."""
+
+    def __init__(self):
+        self.profiles = []
+
+    def translate(self, texts, profile="default"):
+        self.profiles.append(profile)
+        return [text.upper() for text in texts]
+
+
+class TestWarmup(unittest.TestCase):
+    """Unit tests for warmup.py."""
+
+    @parameterized.expand(
+        [
+            (
+                [{"langid": False}],
+                [("de", "en"), ("de", "es"), ("de", "zh"), ("de", "fr")],
+            ),
+            ([{"arxiv": "cs.DC"}], [("en", "de"), ("en", "zh")]),
+            (
+                [
+                    {
+                        "source_lang": "es",
+                        "target_langs": ["en", "zh", "es"],
+                        "langid": False,
+                    },
+                    {"arxiv": "cs.PL", "target_langs": ["zh"]},
+                    {"source_lang": "es", "target_langs": ["en"], "langid": False},
+                ],
+                [("es", "en"), ("es", "zh"), ("en", "zh")],
+            ),
+            # Routed by detected languages.
+            (
+                [{"target_langs": ["en"]}, {"arxiv": "cs.PL", "target_langs": ["zh"]}],
+                [("de", "en"), ("en", "zh"), ("es", "en"), ("fr", "en"), ("zh", "en")],
+            ),
+        ]
+    )
+    def test_get_pairs(self, jobs, expected):
+        """Unit test for get_pairs: Unique supported pairs, in order."""
+        self.assertEqual(warmup.get_pairs(jobs), expected)
+
+    def test_main(self):
+        """Unit test for main: Pairs of a job file are prepared and warmed up."""
+        env_offline = (os.getenv("HF_HUB_OFFLINE"), constants.HF_HUB_OFFLINE)
+        jobs = {
+            "defaults": {"target_langs": ["en"], "langid": False},
+            "jobs": [{"source_lang": "de"}, {"arxiv": "cs.DC", "target_langs": ["de"]}],
+        }
+        trans = _Translator()
+        offline = []
+
+        def _get_translator(source, target):
+            offline.append((os.getenv("HF_HUB_OFFLINE"), constants.HF_HUB_OFFLINE))
+            return trans
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            jobs_file = os.path.join(temp_dir, "jobs.json")
+            with open(jobs_file, "w", encoding="utf-8") as f:
+                json.dump(jobs, f)
+
+            with (
+                mock.patch.object(
+                    warmup, "prefetch", side_effect=lambda name, offline: name
+                ) as prefetch,
+                mock.patch.object(
+                    warmup.weights,
+                    "get_safetensors_path",
+                    return_value="model.safetensors",
+                ) as get_path,
+                mock.patch.object(
+                    warmup.translator, "get_translator", side_effect=_get_translator
+                ),
+            ):
+                report = warmup.main(["--jobs", jobs_file, "--offline"])
+
+        self.assertEqual([row["pair"] for row in report], ["de-en", "en-de"])
+        self.assertEqual(
+            [call.args[0] for call in prefetch.call_args_list],
+            ["Helsinki-NLP/opus-mt-de-en", "Helsinki-NLP/opus-mt-en-de"],
+        )
+        self.assertTrue(all(call.kwargs["offline"] for call in prefetch.call_args_list))
+        self.assertEqual(get_path.call_count, 2)
+        self.assertEqual(trans.profiles, ["word", "title", "content"] * 2)
+        # Loaded offline, and online again afterwards.
+        self.assertEqual(offline, [("1", True)] * 2)
+        self.assertEqual(
+            (os.getenv("HF_HUB_OFFLINE"), constants.HF_HUB_OFFLINE), env_offline
+        )
+        for row in report:
+            self.assertEqual(row["weights"], "model.safetensors")
+            self.assertIn("content_seconds", row)
+
+    def test_warm_up_error(self):
+        """Unit test for warm_up: Failed translations are errors."""
+        trans = mock.Mock()
+        trans.translate.return_value = None
+        with self.assertRaises(RuntimeError):
+            warmup.warm_up(trans, "de")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Unit tests for weights.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+
+import torch
+from safetensors.torch import save_file
+from transformers import MarianConfig, MarianMTModel
+
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import weights
+
+
+def _get_model():
+    torch.manual_seed(0)
+    config = MarianConfig(
+        vocab_size=64,
+        d_model=16,
+        encoder_layers=1,
+        decoder_layers=1,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=32,
+        decoder_ffn_dim=32,
+        max_position_embeddings=32,
+        pad_token_id=63,
+        decoder_start_token_id=63,
+        eos_token_id=0,
+    )
+    return MarianMTModel(config).eval()
+
+
+def _logits(model):
+    with torch.no_grad():
+        return model(
+            input_ids=torch.tensor([[5, 6, 7, 0]]),
+            decoder_input_ids=torch.tensor([[63, 5, 6]]),
+        ).logits
+
+
+class TestWeights(unittest.TestCase):
+    """Unit tests for weights.py."""
+
+    def test_load_safetensors(self):
+        """Unit test for load_safetensors: Views into one file-backed storage."""
+        tensors = {
+            "a": torch.arange(6, dtype=torch.float32).reshape(2, 3),
+            "b": torch.tensor([1, 2, 3], dtype=torch.int64),
+            "c": torch.tensor([True, False]),
+        }
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "model.safetensors")
+            save_file(tensors, path)
+            loaded = weights.load_safetensors(path)
+
+            self.assertEqual(set(loaded), set(tensors))
+            for name, tensor in tensors.items():
+                self.assertTrue(torch.equal(loaded[name], tensor))
+            self.assertEqual(
+                loaded["a"].untyped_storage().nbytes(), os.path.getsize(path)
+            )
+
+            # Private mapping: Writes are not persisted.
+            loaded["a"][0, 0] = 100
+            self.assertEqual(weights.load_safetensors(path)["a"][0, 0], 0)
+
+    def test_load_model(self):
+        """Unit test for load_model: Same outputs, with memory-mapped weights."""
+        model = _get_model()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model.save_pretrained(temp_dir)
+            loaded = weights.load_model(temp_dir, convert=False)
+
+            self.assertTrue(torch.allclose(_logits(model), _logits(loaded)))
+            size = os.path.getsize(os.path.join(temp_dir, weights.SAFETENSORS_FILE))
+            embeddings = loaded.get_input_embeddings().weight
+            self.assertEqual(embeddings.untyped_storage().nbytes(), size)
+            self.assertEqual(embeddings.data_ptr(), loaded.lm_head.weight.data_ptr())
+            self.assertFalse(any(p.is_meta for p in loaded.parameters()))
+            # Sinusoidal positions, if not in the file, are rebuilt.
+            for name, tensor in model.state_dict().items():
+                self.assertTrue(torch.equal(loaded.state_dict()[name], tensor), name)
+            self.assertIn("rss_mb", utils.get_memory_usage())
+
+    def test_load_model_convert(self):
+        """Unit test for load_model: Checkpoints without safetensors are converted."""
+        model = _get_model()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model.config.save_pretrained(temp_dir)
+            torch.save(model.state_dict(), os.path.join(temp_dir, "pytorch_model.bin"))
+            with self.assertRaises(Exception):
+                weights.load_model(temp_dir, convert=False)
+
+            loaded = weights.load_model(temp_dir)
+            self.assertTrue(
+                os.path.exists(os.path.join(temp_dir, weights.SAFETENSORS_FILE))
+            )
+            self.assertTrue(torch.allclose(_logits(model), _logits(loaded)))
+
+    def test_load_model_dtype(self):
+        """Unit test for load_model: Converted into bfloat16, still memory-mapped."""
+        model = _get_model()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            model.save_pretrained(temp_dir)
+            loaded = weights.load_model(temp_dir, dtype="bfloat16")
+
+            path = os.path.join(temp_dir, "model.bfloat16.safetensors")
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual({p.dtype for p in loaded.parameters()}, {torch.bfloat16})
+            self.assertEqual(
+                loaded.get_input_embeddings().weight.untyped_storage().nbytes(),
+                os.path.getsize(path),
+            )
+            self.assertTrue(
+                torch.allclose(
+                    _logits(model), _logits(loaded).float(), atol=0.1, rtol=0.1
+                )
+            )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
@@ -1,10 +1,17 @@
 """Translate with HF models."""
 
+import functools
 import logging
-from typing import List
+import time
+from typing import Dict, List
 
 import torch
-from transformers import pipeline
+from transformers import AutoTokenizer, pipeline
+
+from lingua_vitamin.common import profiling
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import protect
+from lingua_vitamin.translate import weights
 
 
 _KEY_TEXT = "translation_text"
@@ -19,30 +26,105 @@ SUPPORTED_PAIRS = {
 }
 
 
+# Decoding profiles per workload: Beams, and a cap on new tokens which is
+# proportional to the longest input of a batch given `length_ratio`.
+PROFILES = {
+    # Pipeline defaults.
+    "default": {},
+    # Single vocab words: Greedy, with a few tokens.
+    "word": {"num_beams": 1, "max_new_tokens": 8},
+    "title": {"num_beams": 2, "length_ratio": 2.0, "max_new_tokens": 128},
+    "content": {"num_beams": 4, "length_ratio": 2.0, "max_new_tokens": 512},
+}
+
+_LENGTH_MARGIN = 8
+
+# Load weights memory-mapped from safetensors files on CPU, see `weights.py`:
+# Set by `--mmap_weights` for translators shared via `get_translator`.
+MMAP_WEIGHTS = True
+# Converted copies of memory-mapped weights, e.g. `bfloat16`, by `--weights_dtype`.
+WEIGHTS_DTYPE = None
+
+
 class Translator:
     """Translator with HF models."""
 
-    def __init__(self, src_lang: str, target_lang: str):
+    def __init__(self, src_lang: str, target_lang: str, mmap_weights: bool = None):
         model_key = (src_lang, target_lang)
         if model_key not in SUPPORTED_PAIRS:
             raise ValueError(f"No translation model for {src_lang} → {target_lang}")
 
-        model_name = SUPPORTED_PAIRS[model_key]
+        model_name = self.model_name = SUPPORTED_PAIRS[model_key]
+        if mmap_weights is None:
+            mmap_weights = MMAP_WEIGHTS and not torch.cuda.is_available()
+
+        begin = time.time()
         try:
+            model, tokenizer = model_name, None
+            if mmap_weights:
+                model = self._load_model(model_name)
+                tokenizer = AutoTokenizer.from_pretrained(model_name)
             self.translator = pipeline(
                 "translation",
-                model=model_name,
+                model=model,
+                tokenizer=tokenizer,
                 device=0 if torch.cuda.is_available() else -1,
             )
         except OSError as e:
             raise RuntimeError(f"Model {model_name} could not be loaded: {str(e)}")
+        logging.info(
+            "Loaded `%s` in %.2f seconds: %s.",
+            model_name,
+            time.time() - begin,
+            utils.get_memory_usage(),
+        )
 
-    def translate(self, texts: List[str]) -> List[str]:
-        """Translate with HF models."""
+    @staticmethod
+    def _load_model(model_name: str):
+        """Memory-mapped model, or its name to load it as usual on failures."""
         try:
-            results = self.translator(list(texts))
+            return weights.load_model(model_name, dtype=WEIGHTS_DTYPE)
+        except Exception as error:
+            logging.warning("Unable to memory-map `%s`: <<<%s>>>.", model_name, error)
+            return model_name
+
+    def translate(self, texts: List[str], profile: str = "default") -> List[str]:
+        """Translate with HF models, keeping e.g. LaTeX, code and URLs as they are.
+
+        `profile` is one of `PROFILES`, e.g. `word` for vocab words.
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown generation profile `{profile}`.")
+        return protect.translate(
+            functools.partial(self._translate, profile=profile), texts
+        )
+
+    def _get_kwargs(self, texts: List[str], profile: str) -> Dict[str, int]:
+        """Generation kwargs of a profile for a batch."""
+        kwargs = dict(PROFILES[profile])
+        ratio = kwargs.pop("length_ratio", None)
+        if ratio and texts:
+            length = max(
+                len(ids) for ids in self.translator.tokenizer(texts)["input_ids"]
+            )
+            kwargs["max_new_tokens"] = min(
+                kwargs["max_new_tokens"], int(ratio * length) + _LENGTH_MARGIN
+            )
+        return kwargs
+
+    def _translate(self, texts: List[str], profile: str = "default") -> List[str]:
+        try:
+            texts = list(texts)
+            with profiling.generation(self.model_name):
+                results = self.translator(texts, **self._get_kwargs(texts, profile))
         except Exception as error:
             logging.exception("Unable to translate `%s`: <<<%s>>>.", texts, error)
             return None
 
         return [r[_KEY_TEXT] for r in results]
+
+
+@functools.lru_cache(maxsize=None)
+def get_translator(src_lang: str, target_lang: str) -> Translator:
+    """Get a translator shared within the process, loading its model only once."""
+    return Translator(src_lang, target_lang)
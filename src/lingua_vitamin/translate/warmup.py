@@ -0,0 +1,241 @@
+"""Prefetch and warm up translation models ahead of time-critical jobs.
+
+Models of every language pair used by a job config are downloaded into the HF
+cache, verified to load from the cache only, optionally converted into
+memory-mapped safetensors files (see `weights.py`), and warmed up with a small
+batch per generation profile: Daily jobs may then run with `HF_HUB_OFFLINE=1`,
+and start with weights in the page cache.
+
+    python -m lingua_vitamin.translate.warmup --jobs jobs.json
+    python -m lingua_vitamin.translate.warmup --source_lang de --target_langs en zh
+    python -m lingua_vitamin.translate.warmup --no-langid --target_langs en
+"""
+
+import argparse
+import contextlib
+import glob
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import translator
+from lingua_vitamin.translate import weights
+
+# Model files to prefetch, besides weights: Configs and tokenizers.
+_PATTERNS = ["*.json", "*.spm", "*.txt", "*.model"]
+
+_WARMUP_TEXTS = {
+    "de": "Der Bundeskanzler trifft am Montag den Präsidenten in Berlin.",
+    "en": "The chancellor meets the president in Berlin on Monday.",
+    "es": "El canciller se reúne con el presidente en Berlín el lunes.",
+    "fr": "Le chancelier rencontre le président à Berlin lundi.",
+    "zh": "总理周一在柏林会见总统。",
+}
+
+# Defaults of `main.py`.
+_DEFAULT_SOURCE_LANG = "de"
+_DEFAULT_TARGET_LANGS = ("en", "es", "zh", "fr")
+_DEFAULT_ARXIV_TARGET_LANGS = ("de", "zh")
+
+
+def get_pairs(jobs: Iterable[Dict]) -> List[Tuple[str, str]]:
+    """Get supported (source, target) pairs of jobs, in order.
+
+    News items are routed to the models of their detected languages unless
+    `--no-langid`, so the pairs of every supported language into the targets of
+    news jobs go after the pairs of their source languages.
+    """
+    pairs, routed = {}, {}
+    for job in jobs:
+        if job.get("arxiv"):
+            source = "en"
+            targets = job.get("target_langs") or _DEFAULT_ARXIV_TARGET_LANGS
+        else:
+            source = job.get("source_lang") or _DEFAULT_SOURCE_LANG
+            targets = job.get("target_langs") or _DEFAULT_TARGET_LANGS
+
+        for target in targets:
+            if (source, target) in translator.SUPPORTED_PAIRS:
+                pairs[(source, target)] = None
+            elif source != target:
+                logging.warning("No translation model for %s → %s.", source, target)
+
+            if job.get("arxiv") or not job.get("langid", True):
+                continue
+            for lang in translator.SUPPORTED_LANGS:
+                if (lang, target) in translator.SUPPORTED_PAIRS:
+                    routed[(lang, target)] = None
+    return list({**pairs, **routed})
+
+
+def load_jobs(jobs_file: str, defaults: Dict) -> List[Dict]:
+    """Load jobs of a json job file as `batch.py` does, with defaults."""
+    # pylint: disable=import-outside-toplevel
+    from lingua_vitamin import batch
+    from lingua_vitamin import main as lingua_main
+
+    defaults = {**vars(lingua_main.parse_args([])), **defaults}
+    return [vars(job) for job in batch.load_jobs(jobs_file, defaults)]
+
+
+@contextlib.contextmanager
+def offline_mode():
+    """Without any request to the hub, as jobs with `HF_HUB_OFFLINE=1`.
+
+    The hub and transformers read the environment once on import, so their
+    flags are set for the time being as well.
+    """
+    # pylint: disable=import-outside-toplevel
+    from huggingface_hub import constants
+    from transformers.utils import hub as transformers_hub
+
+    env = {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1"}
+    flags = [
+        (module, name)
+        for module, name in (
+            (constants, "HF_HUB_OFFLINE"),
+            (transformers_hub, "_is_offline_mode"),
+        )
+        if hasattr(module, name)
+    ]
+    saved_env = {key: os.environ.get(key) for key in env}
+    saved_flags = [getattr(module, name) for module, name in flags]
+    os.environ.update(env)
+    for module, name in flags:
+        setattr(module, name, True)
+    try:
+        yield
+    finally:
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        for (module, name), value in zip(flags, saved_flags):
+            setattr(module, name, value)
+
+
+def prefetch(model_name: str, offline: bool = False) -> str:
+    """Download a model into the HF cache unless cached: Return its local dir."""
+    # pylint: disable=import-outside-toplevel
+    from huggingface_hub import snapshot_download
+
+    patterns = _PATTERNS + ["*.safetensors"]
+    if not offline:
+        local_dir = snapshot_download(model_name, allow_patterns=patterns)
+        if not glob.glob(os.path.join(local_dir, "*.safetensors")):
+            # Converted into safetensors files by `weights.py`.
+            snapshot_download(model_name, allow_patterns=["pytorch_model.bin"])
+
+    # Verified: Loadable with `HF_HUB_OFFLINE=1`.
+    return snapshot_download(model_name, local_files_only=True)
+
+
+def warm_up(trans, source_lang: str) -> Dict[str, float]:
+    """Translate a small batch per generation profile: Return seconds per profile."""
+    text = _WARMUP_TEXTS.get(source_lang, _WARMUP_TEXTS["en"])
+    inputs = {
+        "word": text.split()[:4],
+        "title": [text],
+        "content": [" ".join([text] * 4)],
+    }
+
+    seconds = {}
+    for profile, texts in inputs.items():
+        begin = time.time()
+        if trans.translate(texts, profile=profile) is None:
+            raise RuntimeError(f"Unable to translate `{texts}` ({profile}).")
+        seconds[profile] = time.time() - begin
+    return seconds
+
+
+def run(pairs, offline: bool = False, convert: bool = True, dtype: str = None):
+    """Prefetch, convert and warm up models of language pairs: Return a report."""
+    report = []
+    for source, target in pairs:
+        model_name = translator.SUPPORTED_PAIRS[(source, target)]
+        begin = time.time()
+        row = {"pair": f"{source}-{target}", "model": model_name}
+        # Offline: Loaded from the cache only, or failed.
+        with offline_mode() if offline else contextlib.nullcontext():
+            row["local_dir"] = prefetch(model_name, offline=offline)
+            if convert:
+                row["weights"] = weights.get_safetensors_path(model_name, dtype=dtype)
+            row["prepare_seconds"] = time.time() - begin
+
+            begin = time.time()
+            trans = translator.get_translator(source, target)
+            row["load_seconds"] = time.time() - begin
+            row.update({f"{k}_seconds": v for k, v in warm_up(trans, source).items()})
+        row.update(utils.get_memory_usage())
+
+        logging.info("Warmed up `%s`: %s", model_name, row)
+        report.append(row)
+    return report
+
+
+def main(argv=None):
+    """Main."""
+    parser = argparse.ArgumentParser(description="LinguaVitamin model warmup")
+    parser.add_argument("--jobs", type=str, default="", help="Json job file")
+    parser.add_argument("--source_lang", type=str, default=_DEFAULT_SOURCE_LANG)
+    parser.add_argument("--target_langs", nargs="+", default=None)
+    parser.add_argument("--arxiv", type=str, default="", help="Arxiv subject")
+    parser.add_argument(
+        "--langid",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Also prepare models of news items routed by their detected languages",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only verify the local cache, without downloads",
+    )
+    parser.add_argument(
+        "--convert",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Prepare safetensors files to load memory-mapped",
+    )
+    parser.add_argument(
+        "--weights_dtype",
+        type=str,
+        default="",
+        choices=("", "bfloat16"),
+        help="Convert weights into this dtype, for `--weights_dtype` of jobs",
+    )
+    args = parser.parse_args(argv)
+
+    job = {
+        "source_lang": args.source_lang,
+        "target_langs": args.target_langs,
+        "arxiv": args.arxiv,
+        "langid": args.langid,
+    }
+    jobs = load_jobs(args.jobs, job) if args.jobs else [job]
+
+    translator.MMAP_WEIGHTS = args.convert
+    translator.WEIGHTS_DTYPE = args.weights_dtype or None
+    report = run(
+        get_pairs(jobs),
+        offline=args.offline,
+        convert=args.convert,
+        dtype=args.weights_dtype or None,
+    )
+    for row in report:
+        print(
+            "\t".join(
+                f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}"
+                for k, v in row.items()
+            )
+        )
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    main(sys.argv[1:])
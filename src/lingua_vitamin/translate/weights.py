@@ -0,0 +1,186 @@
+"""Load model weights memory-mapped from safetensors files.
+
+Tensors are views into a private (copy-on-write) memory map of the safetensors
+file, instead of copies in anonymous memory: Processes loading the same model
+share its weights through the page cache, and loading is almost free once the
+file is warm. Models without a safetensors file on the hub are converted once
+into a local cache.
+"""
+
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+from typing import Dict
+
+import torch
+import transformers
+from transformers import AutoConfig, AutoModelForSeq2SeqLM
+
+from lingua_vitamin.common import utils
+
+SAFETENSORS_FILE = "model.safetensors"
+
+# `from_pretrained(torch_dtype=...)` was renamed to `dtype` in transformers 4.56,
+# where the pinned 4.40 rejects the new name.
+_DTYPE_KWARG = (
+    "dtype"
+    if tuple(int(x) for x in transformers.__version__.split(".")[:2]) >= (4, 56)
+    else "torch_dtype"
+)
+
+_DTYPES = {
+    "BF16": torch.bfloat16,
+    "BOOL": torch.bool,
+    "F16": torch.float16,
+    "F32": torch.float32,
+    "F64": torch.float64,
+    "I8": torch.int8,
+    "I16": torch.int16,
+    "I32": torch.int32,
+    "I64": torch.int64,
+    "U8": torch.uint8,
+}
+
+
+def get_cache_dir() -> str:
+    """Directory of converted safetensors files."""
+    hf_home = os.getenv(
+        "HF_HOME", os.path.join(os.path.expanduser("~"), ".cache", "huggingface")
+    )
+    return os.path.join(hf_home, "lingua_vitamin")
+
+
+def load_safetensors(path: str) -> Dict[str, torch.Tensor]:
+    """Load tensors as views into a private memory map of a safetensors file."""
+    with open(path, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+
+    storage = torch.UntypedStorage.from_file(
+        path, shared=False, nbytes=os.path.getsize(path)
+    )
+    start = 8 + length
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+
+        dtype = _DTYPES[info["dtype"]]
+        begin, end = info["data_offsets"]
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if (start + begin) % itemsize:
+            # Unaligned: A copy, rather than a view.
+            tensors[name] = (
+                torch.empty(0, dtype=torch.uint8)
+                .set_(storage, start + begin, (end - begin,))
+                .clone()
+                .view(dtype)
+                .reshape(info["shape"])
+            )
+            continue
+
+        tensors[name] = torch.empty(0, dtype=dtype).set_(
+            storage, (start + begin) // itemsize, info["shape"]
+        )
+    return tensors
+
+
+def _convert(model_name: str, path: str, dtype: str = None) -> str:
+    """Convert a model into a safetensors file, keeping names of tied weights."""
+    logging.info("Converting `%s` into `%s` ...", model_name, path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(
+        model_name, **{_DTYPE_KWARG: getattr(torch, dtype) if dtype else None}
+    )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path)) as temp_dir:
+        model.save_pretrained(temp_dir)
+        os.replace(os.path.join(temp_dir, SAFETENSORS_FILE), path)
+    return path
+
+
+def get_safetensors_path(
+    model_name: str, convert: bool = True, dtype: str = None
+) -> str:
+    """Get the safetensors file of a model: A local one, from the hub, or converted.
+
+    `dtype`, e.g. `bfloat16`, is a converted copy at half the size of float32.
+    Cached files go first, without any request to the hub.
+    """
+    file = f"model.{dtype}.safetensors" if dtype else SAFETENSORS_FILE
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, file)
+        if os.path.exists(path) or not convert:
+            return path
+        return _convert(model_name, path, dtype=dtype)
+
+    path = os.path.join(get_cache_dir(), model_name.replace("/", "--"), file)
+    if os.path.exists(path) or (dtype and not convert):
+        return path
+
+    if not dtype:
+        from huggingface_hub import (  # pylint: disable=import-outside-toplevel
+            hf_hub_download,
+        )
+
+        for local_files_only in (True, False):
+            try:
+                return hf_hub_download(
+                    model_name, SAFETENSORS_FILE, local_files_only=local_files_only
+                )
+            except Exception as error:
+                if not local_files_only and not convert:
+                    raise
+                logging.debug("No `%s` for `%s`: <<<%s>>>", file, model_name, error)
+
+    return _convert(model_name, path, dtype=dtype)
+
+
+@torch.no_grad()
+def _init_module(model, module) -> None:
+    """Initialize the tensors of a module, as `from_pretrained` would."""
+    if hasattr(module, "create_weight"):
+        # Sinusoidal positions of newer transformers.
+        module.weight.copy_(module.create_weight())
+    elif hasattr(module, "_init_weight"):
+        # Sinusoidal positions, which `_init_weights` of the pinned 4.40 skips.
+        module._init_weight(module.weight)  # pylint: disable=protected-access
+    else:
+        model._init_weights(module)  # pylint: disable=protected-access
+
+
+def load_model(model_name: str, convert: bool = True, dtype: str = None):
+    """Load a seq2seq model with memory-mapped weights, for inference on CPU."""
+    begin = time.time()
+    path = get_safetensors_path(model_name, convert=convert, dtype=dtype)
+    config = AutoConfig.from_pretrained(model_name)
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+
+    model.load_state_dict(load_safetensors(path), strict=False, assign=True)
+    model.tie_weights()
+
+    # Tensors not in the file, e.g. sinusoidal positions, are initialized.
+    for module in model.modules():
+        tensors = list(module.parameters(recurse=False)) + list(
+            module.buffers(recurse=False)
+        )
+        if any(t.is_meta for t in tensors):
+            module.to_empty(device="cpu", recurse=False)
+            _init_module(model, module)
+
+    if dtype:
+        # A no-op for memory-mapped tensors, which are of `dtype` already.
+        model.to(getattr(torch, dtype))
+    model.eval()
+    logging.info(
+        "Loaded `%s` memory-mapped from `%s` in %.2f seconds: %s.",
+        model_name,
+        path,
+        time.time() - begin,
+        utils.get_memory_usage(),
+    )
+    return model
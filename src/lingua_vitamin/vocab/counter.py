@@ -0,0 +1,122 @@
+"""Memory-bounded word counts for vocab files."""
+
+from array import array
+import heapq
+import itertools
+import logging
+import os
+import sys
+import tempfile
+from typing import Iterator, Tuple
+
+from lingua_vitamin.common import text as text_utils
+
+
+class VocabCounter:
+    """Word counts with interned words and array-backed counters.
+
+    For each word variant (e.g. `Die` and `die`), it keeps its count, the row id
+    of its first example and its first position: Example texts are resolved
+    by row ids at render time. Once there are more than `max_words` variants,
+    counts are spilled to sorted files on disk, and merged back in `vocab()`.
+    """
+
+    def __init__(self, max_words: int = 0, spill_dir: str = None):
+        self.max_words = max_words
+        self.spill_dir = spill_dir
+        self._spills = []
+        self._seq = 0
+        self._reset()
+
+    def _reset(self):
+        self._ids = {}
+        self._words = []
+        self._counts = array("q")
+        self._rows = array("q")
+        self._firsts = array("q")
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, text: str, row: int) -> None:
+        """Count words of a text, e.g. a title, with its row id."""
+        for word in text_utils.split_words(text):
+            index = self._ids.get(word)
+            if index is None:
+                index = self._ids[sys.intern(word)] = len(self._words)
+                self._words.append(word)
+                self._counts.append(0)
+                self._rows.append(row)
+                self._firsts.append(self._seq)
+            self._counts[index] += 1
+            self._seq += 1
+
+        if self.max_words and len(self._words) >= self.max_words:
+            self._spill()
+
+    def _sorted(self) -> Iterator[Tuple[str, str, int, int, int]]:
+        """(lower, word, count, row, first) in memory, sorted by (lower, word)."""
+        for index in sorted(
+            range(len(self._words)),
+            key=lambda i: (self._words[i].lower(), self._words[i]),
+        ):
+            word = self._words[index]
+            yield (
+                word.lower(),
+                word,
+                self._counts[index],
+                self._rows[index],
+                self._firsts[index],
+            )
+
+    def _spill(self):
+        fd, path = tempfile.mkstemp(prefix="vocab-", suffix=".tsv", dir=self.spill_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for item in self._sorted():
+                f.write("\t".join(str(x) for x in item[1:]) + "\n")
+
+        logging.info("Spilled %d words into `%s`.", len(self._words), path)
+        self._spills.append(path)
+        self._reset()
+
+    @staticmethod
+    def _read(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                word, count, row, first = line.rstrip("\n").split("\t")
+                yield word.lower(), word, int(count), int(row), int(first)
+
+    def variants(self) -> Iterator[Tuple[str, str, int, int, int]]:
+        """All (lower, word, count, row, first), sorted by (lower, word)."""
+        streams = [self._read(path) for path in self._spills] + [self._sorted()]
+        merged = heapq.merge(*streams, key=lambda x: x[:2])
+        for (lower, word), group in itertools.groupby(merged, key=lambda x: x[:2]):
+            count, row, first = 0, None, None
+            for _, _, c, r, f in group:
+                count += c
+                row = r if row is None else min(row, r)
+                first = f if first is None else min(first, f)
+            yield lower, word, count, row, first
+
+    def vocab(self) -> Iterator[Tuple[str, str, int, int]]:
+        """(lower, word, count, row) per lower case word, sorted by lower.
+
+        `word` is the most frequent variant, the earliest one on ties, and `row`
+        is the row id of its first example.
+        """
+        for lower, group in itertools.groupby(self.variants(), key=lambda x: x[0]):
+            group = list(group)
+            _, word, _, row, _ = max(group, key=lambda x: (x[2], -x[4]))
+            yield lower, word, sum(x[2] for x in group), row
+
+    def close(self):
+        """Remove spilled files."""
+        for path in self._spills:
+            os.remove(path)
+        self._spills = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,117 @@
+"""Mergeable vocab partials: Per-month count tables with translations.
+
+A partial has one row per word variant (e.g. `Die` and `die`), with columns
+`lower`, `word`, `count`, `example`, `first` and `word-{target}`, where
+`first` is a sortable `YYYY-MM:position` of its first occurrence. Partials
+merge associatively, so that months roll up into quarters, years and
+all-time vocab without re-reading daily files.
+"""
+
+import functools
+import glob
+import os
+import re
+
+import pandas as pd
+
+COLUMNS = ("lower", "word", "count", "example", "first")
+
+_MONTH = re.compile(r"^\d{4}-\d{2}$")
+_QUARTER = re.compile(r"^(\d{4})-Q([1-4])$")
+
+
+def get_first(month: str, position: int) -> str:
+    """Get a sortable key of the first occurrence."""
+    return f"{month}:{position:012d}"
+
+
+def get_months(period: str):
+    """Get the (first, last) months of a period: `all`, `YYYY`, `YYYY-Qn` or `YYYY-MM`."""
+    if period == "all":
+        return "0000-00", "9999-99"
+    if re.match(r"^\d{4}$", period):
+        return f"{period}-01", f"{period}-12"
+    if _MONTH.match(period):
+        return period, period
+
+    match = _QUARTER.match(period)
+    if not match:
+        raise ValueError(f"Invalid period `{period}`.")
+    year, quarter = match.group(1), int(match.group(2))
+    return f"{year}-{3 * quarter - 2:02d}", f"{year}-{3 * quarter:02d}"
+
+
+def get_path(partial_dir: str, month: str) -> str:
+    """Get the partial path of a month."""
+    return os.path.join(partial_dir, f"{month}.csv")
+
+
+def list_partials(partial_dir: str, period: str = "all"):
+    """Get monthly partial paths within a period, in order."""
+    first, last = get_months(period)
+    paths = []
+    for path in sorted(glob.glob(os.path.join(partial_dir, "*.csv"))):
+        month = os.path.splitext(os.path.basename(path))[0]
+        if _MONTH.match(month) and first <= month <= last:
+            paths.append(path)
+    return paths
+
+
+def read(path: str) -> pd.DataFrame:
+    """Read a partial."""
+    df = pd.read_csv(path, index_col=0, keep_default_na=False)
+    df["count"] = df["count"].astype(int)
+    return df
+
+
+def write(df: pd.DataFrame, path: str) -> str:
+    """Write a partial."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path)
+    return path
+
+
+def _first_non_empty(values):
+    for value in values:
+        if isinstance(value, str) and value:
+            return value
+    return ""
+
+
+def merge(df1: pd.DataFrame, df2: pd.DataFrame) -> pd.DataFrame:
+    """Merge two partials, with `df1` being the earlier one.
+
+    Counts add up, and the earliest example and known translations are kept.
+    """
+    df = pd.concat([df1, df2], ignore_index=True)
+    df = df.sort_values("first", kind="stable")
+
+    aggregations = {"count": "sum", "example": "first", "first": "min"}
+    for column in df.columns:
+        if column.startswith("word-"):
+            aggregations[column] = _first_non_empty
+    df = df.groupby(["lower", "word"], sort=True, as_index=False).agg(aggregations)
+
+    return df[list(COLUMNS) + sorted(c for c in df.columns if c not in COLUMNS)]
+
+
+def merge_all(dfs) -> pd.DataFrame:
+    """Merge partials in order."""
+    return functools.reduce(merge, dfs)
+
+
+def to_vocab(df: pd.DataFrame) -> pd.DataFrame:
+    """Get one row per lower case word, with its most frequent variant.
+
+    Ties go to the earliest variant, and rows are sorted by count.
+    """
+    totals = df.groupby("lower")["count"].sum()
+    df = df.sort_values(
+        ["lower", "count", "first"], ascending=[True, False, True], kind="stable"
+    )
+    df = df.drop_duplicates("lower").copy()
+    df["count"] = df["lower"].map(totals)
+
+    return df.sort_values(
+        ["count", "lower"], ascending=[False, True], kind="stable"
+    ).reset_index(drop=True)
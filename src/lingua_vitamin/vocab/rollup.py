@@ -0,0 +1,136 @@
+"""Roll monthly vocab partials up into quarter, year or all-time vocab.
+
+    python -m lingua_vitamin.vocab.rollup --output_root /tmp/LinguaVitaminNews \
+        --source_lang de --target_langs en zh --period 2025
+"""
+
+import argparse
+import calendar
+import glob
+import logging
+import os
+import sys
+
+from lingua_vitamin import pipe
+from lingua_vitamin.common import utils
+from lingua_vitamin.translate import lexicon
+from lingua_vitamin.vocab import partial as vocab_partial
+
+
+def _get_date(month: str) -> str:
+    """Last date of a month."""
+    year, month = int(month[:4]), int(month[5:])
+    return f"{year:04d}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+
+
+def _get_rollup_dir(partial_dir: str) -> str:
+    return os.path.join(partial_dir, "rollups")
+
+
+def _load_translations(partial_dir: str, columns):
+    """Known translations from earlier rollups: {column: {word: translation}}."""
+    translations = {column: {} for column in columns}
+    for path in sorted(glob.glob(os.path.join(_get_rollup_dir(partial_dir), "*.csv"))):
+        df = vocab_partial.read(path)
+        for column in columns:
+            if column in df:
+                translations[column].update(
+                    (w, t) for w, t in zip(df["word"], df[column]) if t
+                )
+    return translations
+
+
+def rollup(args):
+    """Roll up partials of a period: Return (csv_path, md_path, rollup_path)."""
+    partial_dir = pipe.get_vocab_partial_dir(args)
+    paths = vocab_partial.list_partials(partial_dir, args.period)
+    if not paths:
+        logging.warning("No vocab partials for `%s` in `%s`.", args.period, partial_dir)
+        return None
+
+    logging.info("Merging %d partials: %s.", len(paths), paths)
+    df = vocab_partial.merge_all(vocab_partial.read(path) for path in paths)
+    vocab = vocab_partial.to_vocab(df)
+
+    c_word = f"word-{args.source_lang}"
+    columns = [f"word-{t}" for t in args.target_langs]
+    known = _load_translations(partial_dir, columns)
+    for target, column in zip(args.target_langs, columns):
+        if column not in vocab:
+            vocab[column] = ""
+        vocab[column] = vocab[column].where(
+            vocab[column] != "", vocab["word"].map(known[column]).fillna("")
+        )
+
+        missing = vocab.index[vocab[column] == ""]
+        logging.info(
+            "[%s] Translating %d/ %d unknown words.", target, len(missing), len(vocab)
+        )
+        if len(missing):
+            vocab.loc[missing, column] = pipe.translate_words(
+                vocab.loc[missing, "word"],
+                args.source_lang,
+                target,
+                lexicon_path=lexicon.get_path(
+                    pipe.get_lexicon_dir(args), args.source_lang, target
+                ),
+            )
+
+    date_str = _get_date(os.path.splitext(os.path.basename(paths[-1]))[0])
+    category, tag = pipe.get_tag(args)
+    kwargs = {"year": date_str[:4], "month": date_str[5:7], "day": date_str[8:]}
+    name = f"{date_str}-VOCAB-{args.period}--{category}-{tag}"
+    md_path = os.path.join(
+        args.output_root, args.output_md.format(**kwargs), name + ".md"
+    )
+    csv_path = os.path.join(
+        args.output_root, args.output_csv.format(**kwargs), name + ".csv"
+    )
+
+    vocab[c_word] = vocab["word"]
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    pipe.write_vocab(
+        vocab[["count", "example", c_word] + columns],
+        args.source_lang,
+        args.target_langs,
+        csv_path,
+        md_path,
+        date_str,
+        title=args.period,
+    )
+    logging.info("Vocab rollup for %s written to `%s`.", args.period, md_path)
+
+    # Translations are kept for later rollups.
+    for column in columns:
+        mapping = dict(zip(vocab["word"], vocab[column]))
+        df[column] = df["word"].map(mapping).fillna(df[column] if column in df else "")
+    rollup_path = vocab_partial.write(
+        df, os.path.join(_get_rollup_dir(partial_dir), f"{args.period}.csv")
+    )
+
+    return csv_path, md_path, rollup_path
+
+
+def main(argv=None):
+    """Main."""
+    parser = argparse.ArgumentParser(description="LinguaVitamin vocab rollups")
+    parser.add_argument(
+        "--period",
+        type=str,
+        default="all",
+        help="Period to roll up: `all`, `YYYY`, `YYYY-Qn` or `YYYY-MM`",
+    )
+    parser.add_argument("--source_lang", type=str, default="de")
+    parser.add_argument("--target_langs", nargs="+", default=["en", "zh"])
+    parser.add_argument("--output_root", type=str, default="")
+    parser.add_argument("--output_md", type=str, default="_posts/news/{year}/{month}")
+    parser.add_argument("--output_csv", type=str, default="csv/news/{year}/{month}")
+    args = parser.parse_args(argv)
+    args.arxiv = ""
+
+    return rollup(args)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+"""Unit tests for counter.py."""
+
+from collections import defaultdict
+import logging
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+
+import pandas as pd
+
+from lingua_vitamin.common import text as text_utils
+from lingua_vitamin.common import utils
+from lingua_vitamin.vocab import counter
+
+_PWD = os.path.dirname(os.path.abspath(__file__))
+
+
+def _vocab(rows):
+    """Reference implementation with dicts."""
+    counts = defaultdict(lambda: defaultdict(int))
+    examples = {}
+    for index, row in enumerate(rows):
+        for word in text_utils.split_words(row):
+            counts[word.lower()][word] += 1
+            examples.setdefault(word, index)
+
+    vocab = []
+    for key, d_count in sorted(counts.items()):
+        max_key = max(d_count, key=d_count.get)
+        vocab.append((key, max_key, sum(d_count.values()), examples[max_key]))
+    return vocab
+
+
+class TestCounter(unittest.TestCase):
+    """Unit tests for counter.py."""
+
+    @parameterized.expand(((0,), (1,), (3,), (10,), (10000,)))
+    def test_vocab(self, max_words):
+        """Unit test for vocab: Same as dicts, with or without spills."""
+        rows = []
+        for file in ("news-de.csv", "news-en.csv"):
+            df = pd.read_csv(os.path.join(_PWD, "..", "testdata", file))
+            for column in df.columns[1:]:
+                rows += list(df[column])
+        rows += ["Die die DIE die", "die Die", "Die"]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with counter.VocabCounter(max_words, spill_dir=temp_dir) as vocab:
+                for index, row in enumerate(rows):
+                    vocab.add(row, index)
+                self.assertEqual(list(vocab.vocab()), _vocab(rows))
+                self.assertEqual(bool(os.listdir(temp_dir)), 0 < max_words < 1000)
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_vocab_ties(self):
+        """Unit test for vocab: The earliest variant wins on ties."""
+        vocab = counter.VocabCounter()
+        vocab.add("x die", 0)
+        vocab.add("Die", 1)
+        self.assertEqual(list(vocab.vocab()), [("die", "die", 2, 0), ("x", "x", 1, 0)])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
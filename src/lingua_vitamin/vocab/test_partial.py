@@ -0,0 +1,112 @@
+"""Unit tests for partial.py."""
+
+import logging
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+
+import pandas as pd
+
+from lingua_vitamin.common import utils
+from lingua_vitamin.vocab import counter
+from lingua_vitamin.vocab import partial
+
+_PWD = os.path.dirname(os.path.abspath(__file__))
+
+_ROWS = list(
+    pd.read_csv(os.path.join(_PWD, "..", "testdata", "news-de.csv"))["title-de"]
+) + ["Merz merz MERZ", "Die die", "die Haus"]
+
+
+def _partial(month, rows):
+    with counter.VocabCounter() as vocab:
+        for index, row in enumerate(rows):
+            vocab.add(row, index)
+        df = pd.DataFrame(
+            [
+                (lower, word, count, rows[row], partial.get_first(month, first))
+                for lower, word, count, row, first in vocab.variants()
+            ],
+            columns=partial.COLUMNS,
+        )
+    df["word-en"] = df["word"].str.upper()
+    return df
+
+
+class TestPartial(unittest.TestCase):
+    """Unit tests for partial.py."""
+
+    @parameterized.expand(
+        (
+            ("all", ("0000-00", "9999-99")),
+            ("2025", ("2025-01", "2025-12")),
+            ("2025-Q2", ("2025-04", "2025-06")),
+            ("2025-Q4", ("2025-10", "2025-12")),
+            ("2025-06", ("2025-06", "2025-06")),
+        )
+    )
+    def test_get_months(self, period, expected):
+        """Unit test for get_months."""
+        self.assertEqual(partial.get_months(period), expected)
+
+    @parameterized.expand((("2025-Q5",), ("last",)))
+    def test_get_months_invalid(self, period):
+        """Unit test for get_months: Invalid periods."""
+        with self.assertRaises(ValueError):
+            partial.get_months(period)
+
+    def test_merge(self):
+        """Unit test for merge: Associative, and the same as counting all rows."""
+        dfs = [
+            _partial("2025-04", _ROWS[:2]),
+            _partial("2025-05", _ROWS[2:4]),
+            _partial("2025-06", _ROWS[4:]),
+        ]
+        df1 = partial.merge(partial.merge(dfs[0], dfs[1]), dfs[2])
+        df2 = partial.merge(dfs[0], partial.merge(dfs[1], dfs[2]))
+        pd.testing.assert_frame_equal(df1, df2)
+        pd.testing.assert_frame_equal(df1, partial.merge_all(dfs))
+
+        vocab = partial.to_vocab(df1)
+        expected = partial.to_vocab(_partial("2025-04", _ROWS))
+        self.assertEqual(
+            list(zip(vocab["lower"], vocab["word"], vocab["count"], vocab["example"])),
+            list(
+                zip(
+                    expected["lower"],
+                    expected["word"],
+                    expected["count"],
+                    expected["example"],
+                )
+            ),
+        )
+        self.assertEqual(list(vocab["word-en"]), list(vocab["word"].str.upper()))
+        self.assertEqual(vocab["word"][0], "Merz")
+        self.assertEqual(vocab["count"][0], 6)
+
+    def test_list_partials(self):
+        """Unit test for list_partials, read and write."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for month in ("2025-03", "2025-04", "2025-06", "2026-01"):
+                partial.write(
+                    _partial(month, _ROWS[:1]), partial.get_path(temp_dir, month)
+                )
+            partial.write(_partial("x", _ROWS[:1]), os.path.join(temp_dir, "x.csv"))
+
+            self.assertEqual(
+                [
+                    os.path.basename(p)
+                    for p in partial.list_partials(temp_dir, "2025-Q2")
+                ],
+                ["2025-04.csv", "2025-06.csv"],
+            )
+            self.assertEqual(len(partial.list_partials(temp_dir)), 4)
+
+            df = partial.read(partial.get_path(temp_dir, "2025-04"))
+            pd.testing.assert_frame_equal(df, _partial("2025-04", _ROWS[:1]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()
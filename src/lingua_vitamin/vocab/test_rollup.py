@@ -0,0 +1,95 @@
+"""Unit tests for rollup.py."""
+
+import argparse
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from lingua_vitamin import pipe
+from lingua_vitamin.common import utils
+from lingua_vitamin.vocab import partial
+from lingua_vitamin.vocab import rollup
+
+_PWD = os.path.dirname(os.path.abspath(__file__))
+
+
+class _Translator:
+    """Upper-case `translation`, recording words."""
+
+    def __init__(self):
+        self.texts = []
+        self.profiles = set()
+
+    def translate(self, texts, profile="default"):
+        self.texts += list(texts)
+        self.profiles.add(profile)
+        return [text.upper() for text in texts]
+
+
+class TestRollup(unittest.TestCase):
+    """Unit tests for rollup.py."""
+
+    def test_rollup(self):
+        """Unit test for rollup: Only unknown words are translated."""
+        rows = list(
+            pd.read_csv(os.path.join(_PWD, "..", "testdata", "news-de.csv"))["title-de"]
+        )
+        argv = ["--source_lang", "de", "--target_langs", "en", "--period", "2025-Q2"]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            argv += ["--output_root", temp_dir]
+            args = argparse.Namespace(
+                output_root=temp_dir,
+                output_md="_posts/news",
+                arxiv="",
+                source_lang="de",
+            )
+            partial_dir = pipe.get_vocab_partial_dir(args)
+
+            trans = _Translator()
+            with mock.patch.object(pipe, "get_translator", return_value=trans):
+                for month, month_rows in (("2025-05", rows[:2]), ("2025-06", rows[2:])):
+                    pipe.run_vocab(
+                        month_rows,
+                        "de",
+                        ("en",),
+                        os.path.join(temp_dir, f"{month}.csv"),
+                        os.path.join(temp_dir, f"{month}.md"),
+                        f"{month}-30",
+                        partial_path=partial.get_path(partial_dir, month),
+                    )
+                # Words from May, while `Merz` is translated in both months.
+                self.assertEqual(trans.texts.count("Merz"), 2)
+
+                trans.texts = []
+                csv_path, md_path, rollup_path = rollup.main(argv)
+                self.assertEqual(trans.texts, [])
+
+                self.assertTrue(
+                    md_path.endswith("2025/06/2025-06-30-VOCAB-2025-Q2--news-de.md")
+                )
+                df = pd.read_csv(csv_path, index_col=0)
+                self.assertEqual(list(df["word-de"][:2]), ["Merz", "Trump"])
+                self.assertEqual(list(df["count"][:2]), [3, 2])
+                self.assertEqual(list(df["word-en"]), list(df["word-de"].str.upper()))
+                self.assertIn("German vocab 2025-Q2: 019", utils.load_file(md_path))
+
+                # A new target language: Translated once, then kept in rollups.
+                argv[3] = "zh"
+                rollup.main(argv)
+                self.assertEqual(len(trans.texts), len(df))
+                self.assertEqual(trans.profiles, {"word"})
+                self.assertIn("word-zh", partial.read(rollup_path).columns)
+
+                trans.texts = []
+                rollup.main(argv)
+                self.assertEqual(trans.texts, [])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=utils.LOGGING_FORMAT)
+    unittest.main()